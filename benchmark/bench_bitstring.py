@@ -0,0 +1,189 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+##
+# @brief Micro-benchmarks for bitstring and the instruction helpers.
+#
+# Each benchmark reports the best time per operation over several runs, in nanoseconds,
+# and the number of bitstring objects created per operation. Results can be written to a
+# JSON file and compared with a previous run:
+#
+#     python benchmark/bench_bitstring.py -o before.json
+#     python benchmark/bench_bitstring.py --compare before.json
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cmdis.bitstring import (bitstring, word32, bit0, bit1, concat)
+from cmdis.helpers import (AddWithCarry, Shift_C, SRType, ThumbExpandImm_C, DecodeImmShift,
+                           ParallelAddSub_int)
+
+x32 = bitstring(0x89abcdef, 32)
+y32 = bitstring(0x12345678, 32)
+w32 = word32(0x89abcdef)
+v32 = word32(0x12345678)
+x8 = bitstring(0xa5, 8)
+y8 = bitstring(0x3c, 8)
+S = bitstring('1')
+I1 = bitstring('0')
+I2 = bitstring('1')
+imm10 = bitstring(0x2aa, 10)
+imm11 = bitstring(0x555, 11)
+imm12_rep = bitstring(0x3a5, 12)
+imm12_rot = bitstring(0xca5, 12)
+imm5 = bitstring('00101')
+type_asr = bitstring('10')
+
+## @brief Benchmarks as (name, callable) pairs, in report order.
+BENCHMARKS = [
+    ("construct_int", lambda: bitstring(0x1234, 32)),
+    ("construct_str", lambda: bitstring('0110')),
+    ("construct_copy", lambda: bitstring(x32)),
+    ("get_bit", lambda: x32[7]),
+    ("slice", lambda: x32[4:12]),
+    ("slice_step", lambda: x32[0:16:2]),
+    ("concat_2", lambda: imm10 % imm11),
+    ("concat_chain_6", lambda: S % I1 % I2 % imm10 % imm11 % '0'),
+    ("concat_fn_6", lambda: concat(S, I1, I2, imm10, imm11, '0')),
+    ("add", lambda: x32 + y32),
+    ("add_int", lambda: x32 + 4),
+    ("sub", lambda: x32 - y32),
+    ("and", lambda: x32 & y32),
+    ("xor", lambda: x32 ^ y32),
+    ("lshift", lambda: x32 << 3),
+    ("invert", lambda: x32.inverted),
+    ("signed", lambda: x32.signed),
+    ("sign_extend", lambda: x8.sign_extend(32)),
+    ("zero_extend", lambda: x8.zero_extend(32)),
+    ("compare_str", lambda: type_asr == '10'),
+    ("compare_int", lambda: x8 == 0xa5),
+    ("word32_add", lambda: w32 + v32),
+    ("word32_and", lambda: w32 & 0xff),
+    ("AddWithCarry_32", lambda: AddWithCarry(x32, y32, bit1)),
+    ("AddWithCarry_8", lambda: AddWithCarry(x8, y8, bit0)),
+    ("Shift_C_LSL", lambda: Shift_C(x32, SRType.SRType_LSL, 5, bit0)),
+    ("Shift_C_ASR", lambda: Shift_C(x32, SRType.SRType_ASR, 7, bit0)),
+    ("Shift_C_ROR", lambda: Shift_C(x32, SRType.SRType_ROR, 9, bit0)),
+    ("ThumbExpandImm_C_replicate", lambda: ThumbExpandImm_C(imm12_rep, bit0)),
+    ("ThumbExpandImm_C_rotate", lambda: ThumbExpandImm_C(imm12_rot, bit0)),
+    ("DecodeImmShift", lambda: DecodeImmShift(type_asr, imm5)),
+    ("ParallelAddSub_sadd16", lambda: ParallelAddSub_int(0x89abcdef, 0x12345678, 's', 'add16')),
+    ("ParallelAddSub_uqadd8", lambda: ParallelAddSub_int(0x89abcdef, 0x12345678, 'uq', 'add8')),
+    ]
+
+def _plain_new(cls, *args, **kwargs):
+    return object.__new__(cls)
+
+##
+# @brief Count the bitstring objects created per call of each benchmark.
+#
+# Creation is counted by installing a __new__ on bitstring, which its subclasses inherit.
+# Removing it again doesn't give back the original behaviour on CPython, so a __new__
+# that only creates the object is left in place. Run this after all timing.
+def count_allocations(benchmarks, number=1000):
+    counter = [0]
+    def counting_new(cls, *args, **kwargs):
+        counter[0] += 1
+        return object.__new__(cls)
+    result = {}
+    bitstring.__new__ = staticmethod(counting_new)
+    try:
+        for name, fn in benchmarks:
+            counter[0] = 0
+            for _ in range(number):
+                fn()
+            result[name] = counter[0] / float(number)
+    finally:
+        bitstring.__new__ = staticmethod(_plain_new)
+    return result
+
+## @brief Pick an iteration count that makes one run take about @a target seconds.
+def calibrate(fn, target):
+    number = 1
+    while True:
+        elapsed = timeit.timeit(fn, number=number)
+        if elapsed >= target / 10.0 or number >= 10 ** 7:
+            return max(1, int(number * target / max(elapsed, 1e-9)))
+        number *= 10
+
+def run(pattern=None, repeat=5, target=0.1):
+    benchmarks = [(name, fn) for name, fn in BENCHMARKS if pattern is None or pattern in name]
+    results = {}
+    for name, fn in benchmarks:
+        number = calibrate(fn, target)
+        best = min(timeit.repeat(fn, number=number, repeat=repeat))
+        results[name] = {
+            'ns_per_op': best / number * 1e9,
+            'iterations': number,
+            }
+    for name, allocs in count_allocations(benchmarks).items():
+        results[name]['allocs_per_op'] = allocs
+    return results
+
+def report(results, baseline=None):
+    header = "%-28s %12s %10s" % ("benchmark", "ns/op", "allocs/op")
+    if baseline is not None:
+        header += " %10s %10s" % ("base ns", "speedup")
+    print(header)
+    for name, _ in BENCHMARKS:
+        r = results.get(name)
+        if r is None:
+            continue
+        line = "%-28s %12.1f %10.2f" % (name, r['ns_per_op'], r['allocs_per_op'])
+        if baseline is not None and name in baseline:
+            base = baseline[name]['ns_per_op']
+            line += " %10.1f %9.2fx" % (base, base / r['ns_per_op'])
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="bitstring and helpers micro-benchmarks")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("-c", "--compare", help="compare with results from this JSON file")
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="number of timed runs (default 5)")
+    parser.add_argument("-t", "--time", type=float, default=0.1,
+        help="approximate seconds per timed run (default 0.1)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    results = run(args.filter, args.repeat, args.time)
+    report(results, baseline)
+
+    if args.output:
+        data = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'results': results,
+            }
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,7 @@ import cmdis
 from cmdis import __version__
 import cmdis.model
 import cmdis.disasm
+import cmdis.index
 import cmdis.registers
 import cmdis.mock_cpu
 
@@ -268,6 +269,7 @@ class SimTool(object):
     def __init__(self):
         self.board = None
         self.exitCode = 0
+        self.disasm_index = cmdis.index.DisassemblyIndex()
         self.command_list = {
                 'info' :    self.handle_info,
                 'i' :       self.handle_info,
@@ -424,16 +426,40 @@ class SimTool(object):
         else:
             count = self.convert_value(other[1])
 
+        # Since we're disassembling, make sure the Thumb bit is cleared.
+        addr &= ~1
+
         if args.center:
+            endAddr = addr + count // 2
             addr -= count // 2
 
-        # Since we're disassembling, make sure the Thumb bit is cleared.
-        addr &= ~1
+            # Start on the boundary of the instruction containing the address.
+            self.update_disasm_index(addr)
+            i = self.disasm_index.instruction_at(addr)
+            if i is not None:
+                addr = i.address
+            count = endAddr - addr
 
         # Print disasm of data.
         data = self.cpu.read_memory_block(addr, count)
         self.print_disasm(data, addr)
 
+    ## @brief Refresh the disassembly of the memory region containing an address.
+    #
+    # Regions are disassembled in full the first time, then incrementally so only
+    # memory that has been modified since is decoded again.
+    def update_disasm_index(self, addr):
+        mem, offset = self.cpu.delegate._find_mem(addr)
+        if not mem:
+            return
+        dis = cmdis.disasm.Disassembler()
+        previous = self.disasm_index.region_at(mem.start)
+        if previous is None:
+            region = dis.disasm_image(mem.data, mem.start)
+        else:
+            region = dis.disasm_incremental(mem.data, previous)
+        self.disasm_index.add(region)
+
     def handle_read8(self, args):
         return self.do_read(args, 8)
 
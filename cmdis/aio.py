@@ -0,0 +1,64 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# This module requires Python 3.6 or later for async generators.
+
+from .decoder import UndefinedInstructionError
+from .disasm import decoder
+from .utilities import bytes_to_le16
+
+## @brief Disassemble code read from an asyncio stream.
+#
+# This is an async generator version of Disassembler.disasm(). Each instruction is yielded
+# as soon as all of its bytes have been received. Bytes of an instruction split across
+# reads are kept in a carry-over buffer until the rest arrives.
+#
+# As with disasm(), an undefined instruction raises UndefinedInstructionError unless it is
+# in the last few bytes of the stream.
+#
+# @param reader An asyncio.StreamReader, or any object with a compatible read() coroutine.
+# @param address Address of the first byte of the stream.
+# @param chunkSize Maximum number of bytes requested from @a reader at a time.
+async def disasm_stream(reader, address=0, chunkSize=4096):
+    buffer = bytearray()
+    eof = False
+    while not eof:
+        chunk = await reader.read(chunkSize)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+        offset = 0
+        while len(buffer) - offset >= 2:
+            size = decoder.instruction_size(bytes_to_le16(buffer, offset))
+            if len(buffer) - offset < size and not eof:
+                # Wait for the rest of the instruction.
+                break
+
+            try:
+                i = decoder.decode(buffer[offset:offset + size], address)
+            except UndefinedInstructionError:
+                # Ignore the undefined error if it's the last few bytes.
+                if eof and len(buffer) - offset < 4:
+                    return
+                raise
+
+            yield i
+
+            address += i.size
+            offset += i.size
+        del buffer[:offset]
@@ -18,6 +18,20 @@ import six
 import collections
 import functools
 
+_literals = {}
+
+## @brief Return the width and value of a binary string such as '0110'.
+#
+# Results are cached, so comparing a bitstring with a string literal costs a dict
+# lookup instead of parsing the string each time. Only short strings are cached.
+def _parse_literal(s):
+    result = _literals.get(s)
+    if result is None:
+        result = (len(s), int(s, base=2))
+        if len(s) <= 64 and len(_literals) < 4096:
+            _literals[s] = result
+    return result
+
 ##
 # @brief Variable length bit string.
 class bitstring(object):
@@ -37,8 +51,7 @@ class bitstring(object):
             self._value = val
         elif isinstance(val, six.string_types):
             # String.
-            self._width = len(val)
-            self._value = int(val, base=2)
+            self._width, self._value = _parse_literal(val)
         elif isinstance(val, collections.Sequence):
             # Iterable.
             # TODO support iterables of '0','1' as well as ints
@@ -77,7 +90,7 @@ class bitstring(object):
         w1 = self._width - 1
         s = (self._value >> w1) & 1
         if s:
-            v = -(self.invert().value & ((1 << w1) - 1)) - 1
+            v = -(self.inverted.value & ((1 << w1) - 1)) - 1
         else:
             v = self._value & ((1 << w1) - 1)
         return v
@@ -154,7 +167,8 @@ class bitstring(object):
             else:
                 return self._value == other
         elif isinstance(other, six.string_types):
-            return self.__eq__(bitstring(other))
+            width, value = _parse_literal(other)
+            return self._width == width and self._value == value
         else:
             return (self._width == other._width and self._value == other._value) \
                 if isinstance(other, bitstring) else NotImplemented
@@ -170,7 +184,8 @@ class bitstring(object):
             else:
                 return self._value < other
         elif isinstance(other, six.string_types):
-            return self.__lt__(bitstring(other))
+            width, value = _parse_literal(other)
+            return (self._width < width) if (self._value == value) else (self._value < value)
         else:
             return ((self._width < other._width) if (self._value == other._value) \
                 else (self._value < other._value)) \
@@ -200,7 +215,7 @@ class bitstring(object):
     def get_bit(self, bitpos):
         if bitpos < 0:
             bitpos = self._width + bitpos
-        return bitstring((self._value >> bitpos) & 1, 1)
+        return _INTERNED[1][(self._value >> bitpos) & 1]
 
     def get_bit_value(self, bitpos):
         return (self._value >> bitpos) & 1
@@ -220,10 +235,10 @@ class bitstring(object):
         return self._value == self._mask
 
     def is_zero_bit(self):
-        return bitstring('1') if self.is_zero() else bitstring('0')
+        return bit1 if self._value == 0 else bit0
 
     def is_ones_bit(self):
-        return bitstring('1') if self.is_ones() else bitstring('0')
+        return bit1 if self._value == self._mask else bit0
 
     def lowest_set_bit(self):
         v = self._value
@@ -242,6 +257,12 @@ class bitstring(object):
     def __getitem__(self, key):
         if isinstance(key, slice):
             start, stop, step = key.indices(self._width)
+            if step == 1:
+                width = max(stop - start, 0)
+                value = (self._value >> start) & ((1 << width) - 1)
+                if width <= INTERNED_WIDTH:
+                    return _INTERNED[width][value]
+                return _new(value, width)
             i = start
             result = bitstring()
             while (i < stop) if (step > 0) else (i > stop):
@@ -369,11 +390,10 @@ class bitstring(object):
         if isinstance(other, bitstring):
             width = max(self._width, other._width)
             other = other._value
-            width = self._width
         else:
             width = self._width
         if isinstance(other, six.string_types):
-            other = bitstring(other).unsigned
+            other = _parse_literal(other)[1]
         return bitstring(self._value & other, width)
 
     def __xor__(self, other):
@@ -383,7 +403,7 @@ class bitstring(object):
         else:
             width = self._width
         if isinstance(other, six.string_types):
-            other = bitstring(other).unsigned
+            other = _parse_literal(other)[1]
         return bitstring(self._value ^ other, width)
 
     def __or__(self, other):
@@ -393,7 +413,7 @@ class bitstring(object):
         else:
             width = self._width
         if isinstance(other, six.string_types):
-            other = bitstring(other).unsigned
+            other = _parse_literal(other)[1]
         return bitstring(self._value | other, width)
 
     def __radd__(self, other):
@@ -426,7 +446,7 @@ class bitstring(object):
         elif isinstance(other, six.integer_types):
             value = other
         elif isinstance(other, six.string_types):
-            value = bitstring(other).unsigned
+            value = _parse_literal(other)[1]
         else:
             return NotImplemented
         self._value += value
@@ -439,7 +459,7 @@ class bitstring(object):
         elif isinstance(other, six.integer_types):
             value = other
         elif isinstance(other, six.string_types):
-            value = bitstring(other).unsigned
+            value = _parse_literal(other)[1]
         else:
             return NotImplemented
         self._value -= value
@@ -452,7 +472,7 @@ class bitstring(object):
         elif isinstance(other, six.integer_types):
             value = other
         elif isinstance(other, six.string_types):
-            value = bitstring(other).unsigned
+            value = _parse_literal(other)[1]
         else:
             return NotImplemented
         self._value *= value
@@ -465,7 +485,7 @@ class bitstring(object):
         elif isinstance(other, six.integer_types):
             value = other
         elif isinstance(other, six.string_types):
-            value = bitstring(other).unsigned
+            value = _parse_literal(other)[1]
         else:
             return NotImplemented
         self._value //= value
@@ -515,8 +535,279 @@ class bitstring(object):
     def __hex__(self):
         return "%d'h%0*x" % (self._width, (self._width + 3) // 4, self._value)
 
-bit0 = bitstring('0')
-bit1 = bitstring('1')
+## @brief Create a bitstring from an already masked integer value.
+#
+# This skips the argument type checks of the constructor.
+def _new(value, width):
+    b = bitstring.__new__(bitstring)
+    b._width = width
+    b._mask = (1 << width) - 1
+    b._value = value
+    return b
+
+##
+# @brief Bit string with a fixed width of 32 bits.
+#
+# word32 is a bitstring, and compares, hashes and formats the same as a 32-bit
+# bitstring. Operations whose result is still 32 bits wide, such as arithmetic, shifts,
+# bitwise operations with integers or narrower bitstrings, and inversion, return a word32
+# without going through the generic width handling of bitstring. Concatenation and
+# extension return a plain bitstring. The width cannot be changed in place.
+class word32(bitstring):
+    __slots__ = ()
+
+    WIDTH = 32
+    MASK = 0xffffffff
+
+    def __init__(self, val=0):
+        if isinstance(val, six.integer_types):
+            self._value = val & 0xffffffff
+            self._width = 32
+            self._mask = 0xffffffff
+        elif isinstance(val, bitstring):
+            self._value = val._value & 0xffffffff
+            self._width = 32
+            self._mask = 0xffffffff
+        else:
+            bitstring.__init__(self, val, 32)
+
+    @property
+    def signed(self):
+        v = self._value
+        return v - 0x100000000 if v & 0x80000000 else v
+
+    @property
+    def inverted(self):
+        return _word32(self._value ^ 0xffffffff)
+
+    @property
+    def width(self):
+        return 32
+
+    @width.setter
+    def width(self, val):
+        if val != 32:
+            raise ValueError("cannot change the width of a word32")
+
+    def set(self, other):
+        if not isinstance(other, bitstring):
+            raise TypeError("argument is not a bitstring")
+        if other._width != 32:
+            raise ValueError("cannot change the width of a word32")
+        self._value = other._value
+
+    def get_bit(self, bitpos):
+        if bitpos < 0:
+            bitpos += 32
+        return _INTERNED[1][(self._value >> bitpos) & 1]
+
+    def __getitem__(self, key):
+        if isinstance(key, six.integer_types):
+            return self.get_bit(key)
+        return bitstring.__getitem__(self, key)
+
+    def invert(self):
+        self._value ^= 0xffffffff
+        return self
+
+    def _operand(self, other):
+        if isinstance(other, bitstring):
+            return other._value
+        elif isinstance(other, six.integer_types):
+            return other
+        elif isinstance(other, six.string_types):
+            return _parse_literal(other)[1]
+        return None
+
+    def __add__(self, other):
+        value = self._operand(other)
+        if value is None:
+            return NotImplemented
+        return _word32((self._value + value) & 0xffffffff)
+
+    def __sub__(self, other):
+        value = self._operand(other)
+        if value is None:
+            return NotImplemented
+        return _word32((self._value - value) & 0xffffffff)
+
+    def __mul__(self, other):
+        value = self._operand(other)
+        if value is None:
+            return NotImplemented
+        return _word32((self._value * value) & 0xffffffff)
+
+    def __floordiv__(self, other):
+        value = self._operand(other)
+        if value is None:
+            return NotImplemented
+        return _word32((self._value // value) & 0xffffffff)
+
+    def __imod__(self, other):
+        # Concatenation changes the width, so it can't be done in place.
+        return bitstring.__mod__(self, other)
+
+    def __lshift__(self, other):
+        if isinstance(other, six.integer_types):
+            return _word32((self._value << other) & 0xffffffff)
+        return NotImplemented
+
+    def __rshift__(self, other):
+        if isinstance(other, six.integer_types):
+            return _word32(self._value >> other)
+        return NotImplemented
+
+    def __and__(self, other):
+        if isinstance(other, bitstring) and other._width > 32:
+            return bitstring.__and__(self, other)
+        value = self._operand(other)
+        if value is None:
+            return bitstring.__and__(self, other)
+        return _word32(self._value & value & 0xffffffff)
+
+    def __xor__(self, other):
+        if isinstance(other, bitstring) and other._width > 32:
+            return bitstring.__xor__(self, other)
+        value = self._operand(other)
+        if value is None:
+            return bitstring.__xor__(self, other)
+        return _word32((self._value ^ value) & 0xffffffff)
+
+    def __or__(self, other):
+        if isinstance(other, bitstring) and other._width > 32:
+            return bitstring.__or__(self, other)
+        value = self._operand(other)
+        if value is None:
+            return bitstring.__or__(self, other)
+        return _word32((self._value | value) & 0xffffffff)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __rand__(self, other):
+        return self.__and__(other)
+
+    def __rxor__(self, other):
+        return self.__xor__(other)
+
+    def __ror__(self, other):
+        return self.__or__(other)
+
+    def __invert__(self):
+        return _word32(self._value ^ 0xffffffff)
+
+## @brief Create a word32 from an already masked integer value.
+def _word32(value):
+    w = word32.__new__(word32)
+    w._width = 32
+    w._mask = 0xffffffff
+    w._value = value
+    return w
+
+def _immutable(self, *args):
+    raise TypeError("shared bitstring cannot be modified")
+
+##
+# @brief Bit string that cannot be modified in place.
+#
+# Used for the shared instances returned by interned(). Methods that would modify the
+# value raise TypeError, and in-place operators return a new bitstring instead.
+class _frozenbitstring(bitstring):
+    __slots__ = ()
+
+    value = property(bitstring.value.fget, _immutable)
+    width = property(bitstring.width.fget, _immutable)
+    set = _immutable
+    reverse = _immutable
+    invert = _immutable
+    __setitem__ = _immutable
+
+    def __invert__(self):
+        return _new(self._mask & ~self._value, self._width)
+
+    def __iadd__(self, other):
+        return self.__add__(other)
+
+    def __isub__(self, other):
+        return self.__sub__(other)
+
+    def __imul__(self, other):
+        return self.__mul__(other)
+
+    def __ifloordiv__(self, other):
+        return self.__floordiv__(other)
+
+    def __imod__(self, other):
+        return self.__mod__(other)
+
+    def __ilshift__(self, other):
+        return self.__lshift__(other)
+
+    def __irshift__(self, other):
+        return self.__rshift__(other)
+
+    def __iand__(self, other):
+        return self.__and__(other)
+
+    def __ixor__(self, other):
+        return self.__xor__(other)
+
+    def __ior__(self, other):
+        return self.__or__(other)
+
+## @brief Widest bitstrings returned by interned().
+INTERNED_WIDTH = 8
+
+def _make_interned(width):
+    result = []
+    for value in range(1 << width):
+        b = _frozenbitstring.__new__(_frozenbitstring)
+        b._width = width
+        b._mask = (1 << width) - 1
+        b._value = value
+        result.append(b)
+    return result
+
+# Shared instances indexed by width and then value, 511 in total.
+_INTERNED = [_make_interned(width) for width in range(INTERNED_WIDTH + 1)]
+
+## @brief Return a bitstring of @a width bits with the low bits of @a value.
+#
+# For widths up to INTERNED_WIDTH, the result is a shared instance that cannot be
+# modified. Wider bitstrings are created as usual.
+def interned(value, width):
+    if width <= INTERNED_WIDTH:
+        return _INTERNED[width][value & ((1 << width) - 1)]
+    return bitstring(value, width)
+
+bit0 = _INTERNED[1][0]
+bit1 = _INTERNED[1][1]
+
+## @brief Concatenate bitstrings, most significant first.
+#
+# Equivalent to <tt>parts[0] % parts[1] % ...</tt>, but computes the result in one pass
+# instead of creating a bitstring for each intermediate result. Parts may be bitstrings,
+# binary strings, or the integers 0 and 1.
+def concat(*parts):
+    width = 0
+    value = 0
+    for part in parts:
+        if isinstance(part, bitstring):
+            w, v = part._width, part._value
+        elif isinstance(part, six.string_types):
+            w, v = _parse_literal(part)
+        elif isinstance(part, six.integer_types):
+            if part not in (0, 1):
+                raise ValueError("cannot add integer to a bitstring that is neither 0 or 1")
+            w, v = 1, part
+        else:
+            raise TypeError("cannot concatenate %s to a bitstring" % type(part).__name__)
+        value = (value << w) | v
+        width += w
+    return _new(value, width)
 
 def zeros(count):
     return bitstring('0' * count)
@@ -0,0 +1,284 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import six
+
+from .bitstring import bitstring
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+## @brief Widest bitvector supported.
+MAX_WIDTH = 64
+
+def _u64(value):
+    return np.uint64(value)
+
+## @brief Return the values of a bitvector, or a bitstring or integer as a NumPy scalar.
+#
+# The result can be combined with a bitvector's values in NumPy expressions. Returns None
+# for unsupported types.
+def vector_values(v):
+    if isinstance(v, bitvector):
+        return v._values
+    elif isinstance(v, bitstring):
+        return _u64(v.unsigned)
+    elif isinstance(v, six.integer_types):
+        return _u64(v & 0xffffffffffffffff)
+    elif isinstance(v, six.string_types):
+        return _u64(bitstring(v).unsigned)
+    return None
+
+##
+# @brief Array of bit strings that all have the same width.
+#
+# A bitvector holds many values at once in a NumPy uint64 array, and supports the
+# bitstring operations that the instruction helpers use: bit access and slices, sign and
+# zero extension, concatenation, shifts, and arithmetic and bitwise operations. Each
+# operation applies to all elements and returns a new bitvector.
+#
+# Unlike bitstring, len() is the number of elements, and iterating yields each element as
+# a bitstring. Indexing with an integer or slice still selects bits, as with bitstring;
+# use element() to read a single element. Comparisons return NumPy bool arrays.
+#
+# Widths up to 64 bits are supported. NumPy must be installed.
+class bitvector(object):
+    __slots__ = ("_width", "_mask", "_values")
+
+    ## @brief Constructor.
+    #
+    # @param values A NumPy array, or an iterable of integers or bitstrings. Values are
+    #   truncated to @a width bits; negative integers are stored in two's complement.
+    # @param width Number of bits in each element.
+    def __init__(self, values, width=32):
+        if np is None:
+            raise ImportError("bitvector requires NumPy")
+        if not 0 <= width <= MAX_WIDTH:
+            raise ValueError("bitvector width must be between 0 and %d" % MAX_WIDTH)
+        self._width = width
+        self._mask = _u64((1 << width) - 1)
+        if isinstance(values, bitvector):
+            values = values._values
+        elif not isinstance(values, np.ndarray):
+            values = [(v.unsigned if isinstance(v, bitstring) else int(v)) & 0xffffffffffffffff
+                        for v in values]
+            values = np.array(values, dtype=np.uint64)
+        if values.dtype.kind == 'i':
+            values = values.astype(np.int64).view(np.uint64)
+        self._values = values.astype(np.uint64) & self._mask
+
+    @classmethod
+    def _make(cls, values, width):
+        v = cls.__new__(cls)
+        v._width = width
+        v._mask = _u64((1 << width) - 1)
+        v._values = values & v._mask
+        return v
+
+    ## @brief Create a bitvector of @a count copies of @a value.
+    @classmethod
+    def full(cls, count, value, width=32):
+        if isinstance(value, bitstring):
+            value = value.unsigned
+        return cls(np.full(count, value & ((1 << width) - 1), dtype=np.uint64), width)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def mask(self):
+        return int(self._mask)
+
+    ## @brief The elements as a NumPy uint64 array.
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def unsigned(self):
+        return self._values
+
+    ## @brief The elements interpreted as two's complement, as a NumPy int64 array.
+    @property
+    def signed(self):
+        if self._width == 0:
+            return np.zeros(len(self._values), dtype=np.int64)
+        sign = _u64(1 << (self._width - 1))
+        return ((self._values ^ sign).astype(np.int64) - np.int64(sign)) \
+            if self._width < 64 else self._values.view(np.int64)
+
+    @property
+    def inverted(self):
+        return bitvector._make(~self._values, self._width)
+
+    ## @brief Return element @a n as a bitstring.
+    def element(self, n):
+        return bitstring(int(self._values[n]), self._width)
+
+    ## @brief Return the elements as a list of bitstrings.
+    def to_bitstrings(self):
+        return [bitstring(int(v), self._width) for v in self._values]
+
+    ## @brief Return bit @a bitpos of each element as a 1-bit bitvector.
+    def get_bit(self, bitpos):
+        if bitpos < 0:
+            bitpos += self._width
+        return bitvector._make(self._values >> _u64(bitpos), 1)
+
+    ## @brief Return bit @a bitpos of each element as a NumPy array.
+    def get_bit_value(self, bitpos):
+        return (self._values >> _u64(bitpos)) & _u64(1)
+
+    def is_zero(self):
+        return self._values == 0
+
+    def is_ones(self):
+        return self._values == self._mask
+
+    def is_zero_bit(self):
+        return bitvector._make(self.is_zero().astype(np.uint64), 1)
+
+    def is_ones_bit(self):
+        return bitvector._make(self.is_ones().astype(np.uint64), 1)
+
+    def sign_extend(self, width):
+        if width < self._width:
+            raise ValueError("new width is smaller than current")
+        return bitvector._make(self.signed.view(np.uint64), width)
+
+    def zero_extend(self, width):
+        if width < self._width:
+            raise ValueError("new width is smaller than current")
+        return bitvector._make(self._values, width)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._width)
+            if step != 1:
+                raise ValueError("bitvector slices must have a step of 1")
+            width = max(stop - start, 0)
+            return bitvector._make(self._values >> _u64(start), width)
+        elif isinstance(key, six.integer_types):
+            return self.get_bit(key)
+        else:
+            raise TypeError("index must be an integer or slice")
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        for v in self._values:
+            yield bitstring(int(v), self._width)
+
+    def __repr__(self):
+        return "<bitvector %d x %d'h[%s]>" % (len(self._values), self._width,
+            " ".join("%x" % v for v in self._values[:8]) + (" ..." if len(self._values) > 8 else ""))
+
+    def _width_of(self, other):
+        if isinstance(other, (bitvector, bitstring)):
+            return max(self._width, other.width)
+        return self._width
+
+    def __eq__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return self._values == value
+
+    def __ne__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return self._values != value
+
+    def __add__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return bitvector._make(self._values + value, self._width)
+
+    def __sub__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return bitvector._make(self._values - value, self._width)
+
+    def __mul__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return bitvector._make(self._values * value, self._width)
+
+    def __and__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return bitvector._make(self._values & value, self._width)
+
+    def __or__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return bitvector._make(self._values | value, self._width_of(other))
+
+    def __xor__(self, other):
+        value = vector_values(other)
+        if value is None:
+            return NotImplemented
+        return bitvector._make(self._values ^ value, self._width_of(other))
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __lshift__(self, other):
+        if not isinstance(other, six.integer_types):
+            return NotImplemented
+        if other >= 64:
+            return bitvector._make(np.zeros_like(self._values), self._width)
+        return bitvector._make(self._values << _u64(other), self._width)
+
+    def __rshift__(self, other):
+        if not isinstance(other, six.integer_types):
+            return NotImplemented
+        if other >= 64:
+            return bitvector._make(np.zeros_like(self._values), self._width)
+        return bitvector._make(self._values >> _u64(other), self._width)
+
+    ## @brief Concatenate, with this vector in the upper bits.
+    def __mod__(self, other):
+        if isinstance(other, six.string_types):
+            other = bitstring(other)
+        if isinstance(other, bitstring):
+            width, value = other.width, _u64(other.unsigned)
+        elif isinstance(other, bitvector):
+            width, value = other._width, other._values
+        else:
+            return NotImplemented
+        if self._width + width > MAX_WIDTH:
+            raise ValueError("concatenated bitvector is wider than %d bits" % MAX_WIDTH)
+        return bitvector._make((self._values << _u64(width)) | value, self._width + width)
+
+    def __invert__(self):
+        return self.inverted
+
+    # Elements are mutable NumPy arrays, so bitvectors aren't hashable.
+    __hash__ = None
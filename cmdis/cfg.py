@@ -0,0 +1,154 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from bisect import bisect_right
+
+from .instructions import (Branch, Pop, LoadMultiple)
+
+## @brief Returns True if the instruction is the last one of its basic block.
+#
+# Blocks end after any branch, including calls, and after any instruction that loads
+# the PC: pop or ldm with the PC in the register list, and data processing with PC as
+# the destination.
+def ends_block(i):
+    if isinstance(i, Branch):
+        return True
+    elif isinstance(i, (Pop, LoadMultiple)):
+        return i.writes_pc
+    else:
+        return getattr(i, 'd', None) == 15
+
+## @brief Returns True if execution can continue with the following instruction.
+def falls_through(i):
+    if isinstance(i, Branch):
+        return i.is_conditional or i.with_link
+    return not ends_block(i)
+
+##
+# @brief Straight-line sequence of instructions with a single entry and exit.
+class BasicBlock(object):
+    def __init__(self, instructions):
+        self._instructions = instructions
+        self.successors = []
+        self.predecessors = []
+
+    @property
+    def instructions(self):
+        return self._instructions
+
+    @property
+    def start_address(self):
+        return self._instructions[0].address
+
+    ## @brief Address following the last instruction of the block.
+    @property
+    def end_address(self):
+        last = self._instructions[-1]
+        return last.address + last.size
+
+    @property
+    def last_instruction(self):
+        return self._instructions[-1]
+
+    def contains(self, address):
+        return self.start_address <= address < self.end_address
+
+    def __len__(self):
+        return len(self._instructions)
+
+    def __iter__(self):
+        return iter(self._instructions)
+
+    def __repr__(self):
+        return "<%s@0x%x [0x%08x..0x%08x) succ=[%s]>" % (self.__class__.__name__, id(self),
+            self.start_address, self.end_address,
+            ", ".join("0x%08x" % b.start_address for b in self.successors))
+
+##
+# @brief Basic blocks of a Disassembly and the edges between them.
+#
+# Blocks are kept sorted by address. Since blocks never overlap, the sorted list of
+# start addresses serves as an interval index and block lookup by address is a binary
+# search.
+#
+# Calls end a block but only add an edge to the following block; the callee is not a
+# successor.
+class ControlFlowGraph(object):
+    def __init__(self, disassembly):
+        self._blocks = []
+        self._starts = []
+        self._build(disassembly.instructions)
+
+    @property
+    def blocks(self):
+        return self._blocks
+
+    ## @brief Return the block containing @a address, or None.
+    def block_at(self, address):
+        n = bisect_right(self._starts, address) - 1
+        if n < 0:
+            return None
+        block = self._blocks[n]
+        return block if address < block.end_address else None
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __iter__(self):
+        return iter(self._blocks)
+
+    def _build(self, instructions):
+        if not instructions:
+            return
+
+        # Find the first instruction of each block.
+        addresses = set(i.address for i in instructions)
+        leaders = set([instructions[0].address])
+        for n, i in enumerate(instructions):
+            if ends_block(i) and n + 1 < len(instructions):
+                leaders.add(instructions[n + 1].address)
+            if n > 0 and instructions[n - 1].address + instructions[n - 1].size != i.address:
+                # Skipped bytes in front of this instruction.
+                leaders.add(i.address)
+            if isinstance(i, Branch):
+                target = i.target
+                if target in addresses:
+                    leaders.add(target)
+
+        # Split the instruction list into blocks.
+        current = []
+        for i in instructions:
+            if i.address in leaders and current:
+                self._blocks.append(BasicBlock(current))
+                current = []
+            current.append(i)
+        self._blocks.append(BasicBlock(current))
+        self._starts = [b.start_address for b in self._blocks]
+
+        # Connect blocks.
+        blocksByStart = dict(zip(self._starts, self._blocks))
+        for block in self._blocks:
+            last = block.last_instruction
+            targets = []
+            if isinstance(last, Branch) and not last.with_link and last.target is not None:
+                targets.append(last.target)
+            if falls_through(last):
+                targets.append(block.end_address)
+            for target in targets:
+                successor = blocksByStart.get(target)
+                if successor is not None and successor not in block.successors:
+                    block.successors.append(successor)
+                    successor.predecessors.append(block)
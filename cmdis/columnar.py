@@ -0,0 +1,170 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mmap
+import struct
+import sys
+from array import array
+
+import six
+
+from .disasm import decoder
+from .table import (ColumnStore, InstructionTable, InstructionRecord, COLUMNS, NONE, FLAG_IMM)
+
+##
+# @brief Columnar binary format for disassembled instructions.
+#
+# The file starts with a fixed header followed by one column per field, each holding
+# one little-endian value per instruction, and finally the mnemonic string table.
+#
+# Header (24 bytes):
+# - magic "CMDC"
+# - u16 format version
+# - u16 reserved, 0
+# - u32 number of instructions
+# - u32 size in bytes of the string table
+# - 8 byte decoder signature, from DecoderTree.signature
+#
+# Columns, in the order of table.COLUMNS:
+# - u32 address
+# - u32 word, with the first halfword in the low 16 bits
+# - u32 imm32, or 0 if the instruction has no immediate
+# - u16 decoder ID
+# - u16 index of the mnemonic in the string table
+# - u8 size in bytes
+# - u8 flags, see table.FLAG_IMM
+# - u8 condition code, d, n, m, t register numbers; table.NONE if not present
+#
+# The string table is the NUL-terminated UTF-8 mnemonics. Columns are padded to a
+# multiple of 4 bytes, so every column is naturally aligned.
+MAGIC = b"CMDC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII8s")
+
+def _pad(length):
+    return -length % 4
+
+## @brief Serialize instructions to the columnar format.
+#
+# @param instructions An InstructionTable, or an iterable of Instruction objects such as a
+#   Disassembly.
+# @return The encoded data as bytes.
+def dumps(instructions):
+    if not isinstance(instructions, InstructionTable):
+        instructions = InstructionTable(instructions)
+    table = b"".join(s.encode('utf-8') + b"\0" for s in instructions.mnemonics)
+    parts = [HEADER.pack(MAGIC, VERSION, 0, len(instructions), len(table), decoder.signature)]
+    for name, typecode in COLUMNS:
+        column = instructions.column(name)
+        if sys.byteorder == 'big':
+            column = array(typecode, column)
+            column.byteswap()
+        data = column.tobytes() if six.PY3 else column.tostring()
+        parts.append(data + b"\0" * _pad(len(data)))
+    parts.append(table)
+    return b"".join(parts)
+
+## @brief Write instructions to a file in the columnar format.
+def dump(instructions, f):
+    f.write(dumps(instructions))
+
+## @brief Read columnar data from a bytes-like object, such as an mmap.
+def loads(data):
+    return ColumnarDisassembly(data)
+
+## @brief Memory-map a columnar file.
+#
+# The file stays mapped until the returned object is closed.
+def load(path):
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return ColumnarDisassembly(mapping, mapping)
+
+##
+# @brief Read-only view of data in the columnar format.
+#
+# On Python 3 and little-endian hosts, each column is a memoryview cast directly onto
+# the underlying buffer, so opening the data only reads the header. Otherwise the
+# columns are copied into arrays. Iterating yields InstructionRecord objects; use
+# instruction() to decode a row into an Instruction.
+class ColumnarDisassembly(ColumnStore):
+    def __init__(self, data, mapping=None):
+        self._mapping = mapping
+        self._view = memoryview(data)
+        magic, version, _, count, tableSize, signature = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            raise ValueError("not columnar disassembly data")
+        if version != VERSION:
+            raise ValueError("unsupported columnar disassembly version %d" % version)
+        self._count = count
+        self._signature = signature
+
+        offset = HEADER.size
+        self._columns = {}
+        for name, typecode in COLUMNS:
+            length = count * array(typecode).itemsize
+            self._columns[name] = self._column(offset, length, typecode)
+            offset += length + _pad(length)
+
+        table = bytes(self._view[offset:offset + tableSize])
+        self._mnemonics = [s.decode('utf-8') for s in table.split(b"\0")[:-1]]
+
+    def _column(self, offset, length, typecode):
+        view = self._view[offset:offset + length]
+        if six.PY3 and sys.byteorder == 'little':
+            return view.cast(typecode)
+        column = array(typecode)
+        if six.PY3:
+            column.frombytes(view.tobytes())
+        else:
+            column.fromstring(view.tobytes())
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column
+
+    ## @brief True if the data was written with the current decoder set.
+    #
+    # If False, the decoder IDs do not refer to the current decoders.
+    @property
+    def decoders_match(self):
+        return self._signature == decoder.signature
+
+    ## @brief Release the column views and unmap the file, if it was mapped.
+    def close(self):
+        if six.PY3:
+            for column in self._columns.values():
+                if isinstance(column, memoryview):
+                    column.release()
+            self._view.release()
+        self._columns = {}
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return self.records()
+
+    def __repr__(self):
+        return "<%s@0x%x %d instructions>" % (self.__class__.__name__, id(self), self._count)
@@ -17,21 +17,33 @@
 from __future__ import print_function
 import string
 import functools
+import hashlib
+import struct
 from collections import (defaultdict, namedtuple)
 
-from .bitstring import bitstring
+from .bitstring import (bitstring, interned)
 from .utilities import (bytes_to_le16, hamming_weight)
 from .formatter import Formatter
 
 ##
 # @brief Base class for a decoded instruction.
+#
+# Instruction classes declare the fields set by their decode handlers in __slots__, and
+# set defaults for them in the constructor. Optional fields, such as an immediate that
+# is present in only some encodings, default to None. Subclasses must declare __slots__
+# too, even if empty, or instances get a __dict__ again.
 class Instruction(object):
+    __slots__ = ('_mnemonic', '_word', '_is32bit', '_address', 'decoder_id', '_operands',
+                'imm32')
+
     def __init__(self, mnemonic, word, is32bit):
         self._mnemonic = mnemonic
         self._word = word
         self._is32bit = is32bit
         self._address = 0
-        self.operands = []
+        self.decoder_id = None
+        self._operands = None
+        self.imm32 = None
 
     @property
     def mnemonic(self):
@@ -49,20 +61,167 @@ class Instruction(object):
     def address(self, value):
         self._address = value
 
+    ## @brief List of operands for formatting.
+    #
+    # Operands are built from the decoded fields on first access by the operand builder
+    # registered for the instruction's decoder with @ref instr_operands. Execution and
+    # analysis never read them, so they are not created at decode time.
+    @property
+    def operands(self):
+        if self._operands is None:
+            builder = None
+            if self.decoder_id is not None:
+                builder = DECODER_TREE.decoders[self.decoder_id].operands_builder
+            self._operands = builder(self) if builder is not None else []
+        return self._operands
+
+    @operands.setter
+    def operands(self, value):
+        self._operands = value
+
     @property
     def bytes(self):
         return bytearray((self._word >> (8 * i)) & 0xff for i in range(self.size))
 
+    ## @brief Fix choices that depend only on the decoded fields.
+    #
+    # Called by the decoder after the handler has set the fields. Subclasses override this
+    # to select an _eval implementation for their encoding, so that execution does not
+    # test static properties of the instruction on every step.
+    def _specialize(self):
+        pass
+
     def _eval(self, cpu):
         cpu.pc += self.size
 
     def execute(self, cpu):
         return self._eval(cpu)
 
+    ## @brief Pickle decoded instructions as their decoder ID, word and address.
+    #
+    # Unpickling decodes the word again with the same decoder, see rehydrate(). Fields
+    # changed after decoding, other than the address, are not preserved.
+    def __reduce__(self):
+        if self.decoder_id is None:
+            return (_restore_slots, (type(self), _get_slots(self)))
+        return (rehydrate, (self.decoder_id, self._word, self._address))
+
+    ## @brief Shallow copy that keeps all fields, without decoding again.
+    def __copy__(self):
+        return _restore_slots(type(self), _get_slots(self))
+
     def __repr__(self):
         i = (" %08x" if self._is32bit else " %04x") % self._word
         return "<Instruction@0x%x %s %s>" % (id(self), self._mnemonic, i)
 
+_slotNames = {}
+
+## @brief Return a dict of the slot values of an instruction.
+def _get_slots(i):
+    klass = type(i)
+    names = _slotNames.get(klass)
+    if names is None:
+        names = _slotNames[klass] = [name for c in klass.__mro__
+                                    for name in c.__dict__.get('__slots__', ())]
+    state = {}
+    for name in names:
+        try:
+            state[name] = getattr(i, name)
+        except AttributeError:
+            pass
+    return state
+
+def _restore_slots(klass, state):
+    i = klass.__new__(klass)
+    for name, value in state.items():
+        setattr(i, name, value)
+    return i
+
+## @brief Decode @a word at @a address with the decoder with ID @a decoderId.
+def rehydrate(decoderId, word, address):
+    return DECODER_TREE.decoders[decoderId].decode(word, address)
+
+## @brief Wire format of one instruction: word, address and decoder ID.
+PACKED_INSTRUCTION = struct.Struct("<IIH")
+
+## @brief Encode instructions as 10 bytes each.
+#
+# The data starts with the decoder signature and the number of instructions. Only the
+# word, address and decoder ID are stored, so the result can be decoded only with the
+# same set of decoders.
+def pack_instructions(instructions):
+    parts = [b""]
+    for i in instructions:
+        parts.append(PACKED_INSTRUCTION.pack(i._word, i.address, i.decoder_id))
+    parts[0] = DECODER_TREE.signature + struct.pack("<I", len(parts) - 1)
+    return b"".join(parts)
+
+## @brief Decode data created by pack_instructions() into a list of instructions.
+#
+# @exception ValueError The data was packed with a different set of decoders.
+def unpack_instructions(data):
+    if bytes(data[:8]) != DECODER_TREE.signature:
+        raise ValueError("instructions were packed with different decoders")
+    count, = struct.unpack_from("<I", data, 8)
+    decoders = DECODER_TREE.decoders
+    result = []
+    for n in range(count):
+        word, address, decoderId = PACKED_INSTRUCTION.unpack_from(data, 12 + n * PACKED_INSTRUCTION.size)
+        result.append(decoders[decoderId].decode(word, address))
+    return result
+
+##
+# @brief Instruction at a specific address that shares a decoded template.
+#
+# All attributes are read from the template, which must not be modified. Properties
+# defined by the template's class, such as Branch.target, are evaluated with this object
+# as self, so address-dependent values are computed from this object's address. The
+# @c __class__ attribute reports the template's class so isinstance() checks behave as
+# for an ordinary instruction.
+class PlacedInstruction(object):
+    __slots__ = ('_template', '_address')
+
+    def __init__(self, template, address):
+        object.__setattr__(self, '_template', template)
+        object.__setattr__(self, '_address', address)
+
+    @property
+    def __class__(self):
+        return type(self._template)
+
+    @property
+    def template(self):
+        return self._template
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def operands(self):
+        return self._template.operands
+
+    def __getattr__(self, name):
+        attr = getattr(type(self._template), name, None)
+        if isinstance(attr, property):
+            return attr.fget(self)
+        return getattr(self._template, name)
+
+    def __setattr__(self, name, value):
+        if name == 'address':
+            object.__setattr__(self, '_address', value)
+        else:
+            raise AttributeError("shared instruction template is read-only")
+
+    def __copy__(self):
+        return PlacedInstruction(self._template, self._address)
+
+    def __reduce__(self):
+        return (rehydrate, (self._template.decoder_id, self._template._word, self._address))
+
+    def __repr__(self):
+        return "<PlacedInstruction@0x%x 0x%08x %r>" % (id(self), self._address, self._template)
+
 # A node of the decoder tree pairs a mask with a dictionary of child nodes. The dict
 # keys are the unique values for the mask. If the mask value is 0, then the node is a
 # leaf node and there is only one child.
@@ -94,12 +253,37 @@ class DecoderTree(object):
     _32bitPrefixes = [0xf800, 0xf000, 0xe800]
 
     def __init__(self):
+        self._decoders = []
         self._decoders16 = []
         self._decoders32 = []
         self._tree16 = None
         self._tree32 = None
+        self._signature = None
+        self._templates = {}
+
+    ## @brief List of all decoders, indexed by decoder ID.
+    #
+    # IDs are assigned in the order decoders are added, which is the order of the
+    # instruction definitions.
+    @property
+    def decoders(self):
+        return self._decoders
+
+    ## @brief Hash identifying the set of decoders and their IDs.
+    #
+    # Data that stores decoder IDs can save the signature to detect a different decoder
+    # set when it's read back.
+    @property
+    def signature(self):
+        if self._signature is None:
+            desc = "\n".join("%s %s %s" % (d._mnemonic, d.spec, d.spec2) for d in self._decoders)
+            self._signature = hashlib.sha1(desc.encode('utf-8')).digest()[:8]
+        return self._signature
 
     def add_decoder(self, decoder):
+        decoder.id = len(self._decoders)
+        self._decoders.append(decoder)
+        self._signature = None
         if decoder.is32bit:
             self._decoders32.append(decoder)
         else:
@@ -109,7 +293,38 @@ class DecoderTree(object):
         self._tree16 = self._build_tree(self._decoders16)
         self._tree32 = self._build_tree(self._decoders32)
 
+    ## @brief Return the size in bytes of the instruction starting with halfword @a hw1.
+    def instruction_size(self, hw1):
+        return 4 if hw1 & self._32bitMask in self._32bitPrefixes else 2
+
     def decode(self, data, dataAddress=0):
+        word, node = self._select(data)
+        return self._decode_word(word, node, dataAddress)
+
+    ## @brief Decode an instruction, sharing one template instruction per word.
+    #
+    # The first time a word is seen it is decoded into a template, which is cached. The
+    # returned object is a PlacedInstruction referring to the template, so decoding the
+    # same word again allocates only the small wrapper. Undefined and unpredictable words
+    # are cached as well and raise the same error each time.
+    def decode_shared(self, data, dataAddress=0):
+        word, node = self._select(data)
+        template = self._templates.get(word)
+        if template is None:
+            try:
+                template = self._decode_word(word, node, 0)
+            except (UndefinedInstructionError, UnpredictableError) as e:
+                template = type(e)
+            self._templates[word] = template
+        if isinstance(template, type):
+            raise template()
+        return PlacedInstruction(template, dataAddress)
+
+    ## @brief Discard the templates cached by decode_shared().
+    def clear_templates(self):
+        self._templates = {}
+
+    def _select(self, data):
         # Figure out if this is a 16-bit or 32-bit instruction and select the
         # appropriate decoder tree.
         assert len(data) >= 2
@@ -124,7 +339,9 @@ class DecoderTree(object):
         else:
             word = hw1
             node = self._tree16
+        return word, node
 
+    def _decode_word(self, word, node, dataAddress):
         while True:
             if node.mask:
                 try:
@@ -168,8 +385,8 @@ class DecoderTree(object):
             return DecoderTreeNode(mask=0, children=list(children.values())[0])
 
         # Recursively process each group of children with the same match value at this level.
-        for k, subdecoders in children.items():
-            children[k] = self._build_tree(subdecoders)
+        # A plain dict is used so that lookups of unknown values raise KeyError.
+        children = {k: self._build_tree(subdecoders) for k, subdecoders in children.items()}
 
         return DecoderTreeNode(mask=commonMask, children=children)
 
@@ -202,6 +419,8 @@ class Decoder(object):
         self.spec = spec
         self.spec2 = spec2
         self.args = kwargs
+        self.id = None
+        self.operands_builder = None
 
         fmt = parse_spec(self.spec)
         fmt.reverse()
@@ -229,11 +448,13 @@ class Decoder(object):
         # Create instruction object.
         i = self._klass(self._mnemonic, word, self.is32bit)
         i.address = address
+        i.decoder_id = self.id
         for k, v in self.args.items():
             setattr(i, k, v)
 
         # Call handler to further decode instruction.
         self._handler(i, **attrs)
+        i._specialize()
 
         return i
 
@@ -260,7 +481,8 @@ class Decoder(object):
                 else:
                     size = value
                 # Put a lambda to extract this named field from the instruction word into the d dict.
-                d[name] = lambda b,i=i+offset,size=size: bitstring(b >> i, size)
+                # Narrow fields are shared bitstring instances.
+                d[name] = lambda b,i=i+offset,size=size: interned(b >> i, size)
                 i += size
             else:
                 raise ValueError("unexpected format element in spec: %s" % f)
@@ -275,6 +497,19 @@ def instr(mnemonic, klass, spec, spec2=None, **kwargs):
         return fn
     return doit
 
+##
+# @brief Decorator to register the operand builder for the decoders of a handler.
+#
+# The builder is called with the instruction the first time its operands are read, and
+# returns the list of operands computed from the instruction's decoded fields.
+def instr_operands(handler):
+    def doit(fn):
+        for decoder in DECODER_TREE.decoders:
+            if decoder._handler is handler:
+                decoder.operands_builder = fn
+        return fn
+    return doit
+
 
 # Grammar:
 #
@@ -14,15 +14,173 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from . import instructions
-from .decoder import (DECODER_TREE, UndefinedInstructionError)
+from array import array
+from bisect import (bisect_left, bisect_right)
+
+from .instructions import LoadLiteral
+from .decoder import (DECODER_TREE, UndefinedInstructionError, UnpredictableError)
+from .cfg import ControlFlowGraph
+from .xrefs import CrossReferenceIndex
+from .functions import FunctionTable
+from .table import InstructionTable
 
 decoder = DECODER_TREE
 decoder.build()
 
+##
+# @brief Instructions decoded from a contiguous block of code.
+#
+# Halfwords that could not be decoded and literal pool entries are skipped during the
+# sweep, so they do not appear in the instruction list. The list is always sorted by
+# address. A parallel array of instruction start addresses is used to look up
+# instructions with a binary search.
+class Disassembly(object):
+    def __init__(self, data, address, instructions):
+        self._data = bytearray(data)
+        self._address = address
+        self._instructions = instructions
+        self._addresses = array('L', (i.address for i in instructions))
+        self._literals = None
+        self._cfg = None
+        self._xrefs = None
+        self._functions = None
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def end_address(self):
+        return self._address + len(self._data)
+
+    @property
+    def instructions(self):
+        return self._instructions
+
+    ## @brief Dict of literal pool entries, mapping address to size in bytes.
+    #
+    # Entries are collected from the targets of all PC-relative loads.
+    @property
+    def literals(self):
+        if self._literals is None:
+            self._literals = {}
+            for i in self._instructions:
+                if isinstance(i, LoadLiteral):
+                    self._literals[i.target] = i.memsize // 8
+        return self._literals
+
+    ## @brief Return the value of a literal pool entry, or None if it's outside the data.
+    def read_literal(self, address, size):
+        offset = address - self._address
+        if offset < 0 or offset + size > len(self._data):
+            return None
+        return sum(self._data[offset + n] << (8 * n) for n in range(size))
+
+    ## @brief Return the index of the instruction starting at @a address, or None.
+    def index_of(self, address):
+        n = bisect_left(self._addresses, address)
+        if n < len(self._addresses) and self._addresses[n] == address:
+            return n
+        return None
+
+    ## @brief Return the instruction containing @a address, or None.
+    def instruction_at(self, address):
+        n = self._index_at(address)
+        return self._instructions[n] if n is not None else None
+
+    ## @brief Return the instruction containing @a address with its neighbours.
+    #
+    # Up to @a before instructions preceding and @a after instructions following the
+    # instruction at @a address are included. If no instruction contains @a address, the
+    # list is centered on the gap and the first instruction past it counts as an "after"
+    # instruction.
+    def instructions_around(self, address, before, after):
+        n = bisect_right(self._addresses, address)
+        if n > 0 and self._index_at(address) == n - 1:
+            # Include the instruction containing the address.
+            n -= 1
+            after += 1
+        return self._instructions[max(n - before, 0):n + after]
+
+    def _index_at(self, address):
+        n = bisect_right(self._addresses, address) - 1
+        if n >= 0:
+            i = self._instructions[n]
+            if address < i.address + i.size:
+                return n
+        return None
+
+    ## @brief Control flow graph of the instructions, built on first access.
+    @property
+    def cfg(self):
+        if self._cfg is None:
+            self._cfg = ControlFlowGraph(self)
+        return self._cfg
+
+    ## @brief Cross reference index of the instructions, built on first access.
+    @property
+    def xrefs(self):
+        if self._xrefs is None:
+            self._xrefs = CrossReferenceIndex(self)
+        return self._xrefs
+
+    ## @brief Function table of the instructions, built on first access.
+    @property
+    def functions(self):
+        if self._functions is None:
+            self._functions = FunctionTable(self)
+        return self._functions
+
+    def __len__(self):
+        return len(self._instructions)
+
+    def __iter__(self):
+        return iter(self._instructions)
+
+    def __repr__(self):
+        return "<%s@0x%x [0x%08x..0x%08x) %d instructions>" % (self.__class__.__name__,
+            id(self), self._address, self.end_address, len(self._instructions))
+
+## @brief Compute the byte ranges that differ between two buffers.
+#
+# Buffers are compared a block at a time, and only differing blocks are examined byte
+# by byte. Runs of changed bytes separated by fewer than @a gap unchanged bytes are
+# merged. If the lengths differ, the tail of the longer buffer is reported as changed.
+#
+# @return List of [start, end) offset pairs, sorted and non-overlapping.
+def diff_ranges(old, new, blocksize=256, gap=4):
+    ranges = []
+    length = min(len(old), len(new))
+    for start in range(0, length, blocksize):
+        stop = min(start + blocksize, length)
+        if old[start:stop] == new[start:stop]:
+            continue
+        for offset in range(start, stop):
+            if old[offset] != new[offset]:
+                if ranges and offset - ranges[-1][1] < gap:
+                    ranges[-1][1] = offset + 1
+                else:
+                    ranges.append([offset, offset + 1])
+    if len(old) != len(new):
+        if ranges and length - ranges[-1][1] < gap:
+            ranges[-1][1] = max(len(old), len(new))
+        else:
+            ranges.append([length, max(len(old), len(new))])
+    return ranges
+
+##
+# @brief Disassembles Thumb code.
+#
+# If @a shared is True, instructions are decoded with DecoderTree.decode_shared(). Each
+# distinct instruction word is then decoded only once, and the instructions returned are
+# PlacedInstruction objects referring to shared templates.
 class Disassembler(object):
-    def __init__(self):
-        pass
+    def __init__(self, shared=False):
+        self._decode = decoder.decode_shared if shared else decoder.decode
 
     def disasm(self, data, address=0):
         length = len(data)
@@ -31,7 +189,7 @@ class Disassembler(object):
         while address < endAddress:
             # Decode the next instruction.
             try:
-                i = decoder.decode(data[offset:], address)
+                i = self._decode(data[offset:], address)
             except UndefinedInstructionError:
                 # Ignore the undefined error if it's the last few bytes.
                 if endAddress - address < 4:
@@ -45,5 +203,158 @@ class Disassembler(object):
             address += i.size
             offset += i.size
 
+    ## @brief Linear sweep of an entire image.
+    #
+    # Unlike disasm(), undefined and unpredictable encodings do not stop the sweep. The
+    # offending halfword is skipped and decoding resumes at the next halfword. Literal
+    # pool entries referenced by earlier PC-relative loads are skipped as well.
+    #
+    # If a FunctionCache is passed in @a cache, functions whose bytes are identical to a
+    # cached function are not decoded again; the cached instructions are used instead.
+    # The functions of the new image are then added to the cache.
+    #
+    # @return A Disassembly object.
+    def disasm_image(self, data, address=0, cache=None):
+        sweep = _Sweep(data, address, self._decode)
+        offset = 0
+        while offset + 2 <= len(sweep.data):
+            if cache is not None:
+                resume = sweep.reuse(offset, cache)
+                if resume is not None:
+                    offset = resume
+                    continue
+            offset = sweep.step(offset)
+        result = Disassembly(sweep.data, address, sweep.instructions)
+        if cache is not None:
+            cache.update(result.functions)
+        return result
+
+    ## @brief Linear sweep of an entire image into an InstructionTable.
+    #
+    # The sweep is the same as disasm_image(), but each instruction is stored in the table
+    # as soon as it's decoded and the Instruction object is dropped.
+    def disasm_table(self, data, address=0):
+        sweep = _Sweep(data, address, self._decode)
+        sweep.instructions = InstructionTable()
+        offset = 0
+        while offset + 2 <= len(sweep.data):
+            offset = sweep.step(offset)
+        return sweep.instructions
+
+    ## @brief Disassemble an image by reusing the results for a previous version.
+    #
+    # The new image is compared with the data of @a previous, which must have the same
+    # base address. Only the changed byte ranges are decoded again. Decoding of each range
+    # starts at the old instruction boundary preceding the change and continues past the
+    # end of the change until it lands on the start of an old instruction. From that
+    # resync point on the sweep is identical to the old one, so the old instruction
+    # objects are reused until the next change.
+    #
+    # Literal pool entries found by the sweep are part of its state. If the decoded ranges
+    # add or remove references to literals beyond a resync point, decoding continues until
+    # the sweep is past them.
+    #
+    # Instructions are compared by position, so a change that moves code reports the rest
+    # of the image as changed and it is simply decoded again.
+    #
+    # @return A new Disassembly object that shares unchanged instructions with @a previous.
+    def disasm_incremental(self, data, previous):
+        sweep = _Sweep(data, previous.address, self._decode)
+        data = sweep.data
+        address = previous.address
+        changes = diff_ranges(previous.data, data)
+        if not changes:
+            return Disassembly(data, address, list(previous.instructions))
+
+        old = previous.instructions
+        oldAddresses = previous._addresses
+        offset = 0  # Offset of the sweep within the new data.
+        k = 0       # Index of the first old instruction that has not been handled.
+        delta = {}  # Literal references of decoded minus replaced instructions.
+        for start, end in changes:
+            if offset < start:
+                # Reuse old instructions that end before the change.
+                n = bisect_right(oldAddresses, address + start, k)
+                if n > k and old[n - 1].address + old[n - 1].size > address + start:
+                    n -= 1
+                if n > k:
+                    for i in old[k:n]:
+                        sweep.add(i)
+                    offset = old[n - 1].address + old[n - 1].size - address
+                    k = n
+
+            # Decode until past the end of the change and back in sync with the old sweep.
+            while offset + 2 <= len(data):
+                if offset >= end:
+                    while k < len(old) and oldAddresses[k] < address + offset:
+                        _mark_literals(delta, old[k], -1)
+                        k += 1
+                    if k < len(old) and oldAddresses[k] == address + offset:
+                        pending = [a for a, v in delta.items() if v and a >= address + offset]
+                        if not pending:
+                            break
+                count = len(sweep.instructions)
+                offset = sweep.step(offset)
+                if len(sweep.instructions) > count:
+                    _mark_literals(delta, sweep.instructions[-1], 1)
+
+        # Copy the remaining old instructions if the last change ended at a resync point.
+        if offset + 2 <= len(data):
+            sweep.instructions.extend(old[k:])
+        return Disassembly(data, address, sweep.instructions)
+
+## @brief Adjust reference counts of the literal halfwords loaded by an instruction.
+def _mark_literals(literals, i, delta):
+    if isinstance(i, LoadLiteral):
+        target = i.target
+        for a in range(target & ~1, target + i.memsize // 8, 2):
+            literals[a] = literals.get(a, 0) + delta
+
+##
+# @brief State of a linear sweep.
+#
+# Tracks the instructions decoded so far and the literal pool halfwords they reference.
+class _Sweep(object):
+    def __init__(self, data, address, decode):
+        self.data = bytearray(data)
+        self.address = address
+        self.decode = decode
+        self.instructions = []
+        self.literals = {}
+
+    ## @brief Append an instruction to the results.
+    def add(self, i):
+        self.instructions.append(i)
+        _mark_literals(self.literals, i, 1)
 
+    ## @brief Decode the instruction at @a offset.
+    # @return Offset of the next sweep position.
+    def step(self, offset):
+        address = self.address + offset
+        if self.literals.get(address):
+            return offset + 2
+        try:
+            i = self.decode(self.data[offset:offset + 4], address)
+        except (UndefinedInstructionError, UnpredictableError):
+            return offset + 2
+        if i.size == 4 and self.literals.get(address + 2):
+            return offset + 2
+        self.add(i)
+        return offset + i.size
 
+    ## @brief Add the instructions of a cached function matching the data at @a offset.
+    #
+    # The cached function is not used if any of its bytes is a literal referenced by
+    # earlier instructions, since the sweep would decode it differently.
+    #
+    # @return Offset of the next sweep position, or None if no cached function was used.
+    def reuse(self, offset, cache):
+        address = self.address + offset
+        f = cache.match(self.data, offset, address)
+        if f is None:
+            return None
+        if any(self.literals.get(a) for a in range(address, address + f.size, 2)):
+            return None
+        for i in cache.instructions_at(f, address):
+            self.add(i)
+        return offset + f.size
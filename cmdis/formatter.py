@@ -134,6 +134,24 @@ class MemoryAccessOperand(Operand):
             result += "!"
         return result
 
+##
+# @brief PC-relative memory access to a literal.
+#
+# Formatted like a memory access operand, with the literal's value as a comment when the
+# formatter can read it.
+class LiteralOperand(MemoryAccessOperand):
+    def __init__(self, offset, hideIfZero=False):
+        super(LiteralOperand, self).__init__(RegisterOperand(15),
+            ImmediateOperand(offset, hideIfZero=hideIfZero))
+
+    def format(self, formatter):
+        result = super(LiteralOperand, self).format(formatter)
+        i = formatter.instruction
+        value = formatter.read_literal(i.target, i.memsize // 8)
+        if value is not None:
+            formatter.add_comment("=0x%x" % value)
+        return result
+
 class CpsOperand(Operand):
     def __init__(self, affectPri, affectFault):
         self._affectPri = affectPri
@@ -196,10 +214,16 @@ class SpecialRegisterOperand(Operand):
                 result = "CONTROL"
         return result
 
+##
+# @brief Produces assembly text for instructions.
+#
+# Literal values are read from @a disassembly if one is provided, otherwise from the
+# memory of @a cpu.
 class Formatter(object):
-    def __init__(self, cpu):
+    def __init__(self, cpu, disassembly=None):
         self.instruction = None
         self.cpu = cpu
+        self.disassembly = disassembly
         self._comments = []
 
     def format(self, instruction):
@@ -232,5 +256,18 @@ class Formatter(object):
     def add_comment(self, comment):
         self._comments.append(comment)
 
+    ## @brief Read the value of a literal, or return None if it isn't available.
+    #
+    # Without a disassembly, the literal is read from the CPU's memory if the delegate
+    # has memory at the address.
+    def read_literal(self, address, size):
+        if self.disassembly is not None:
+            return self.disassembly.read_literal(address, size)
+        elif self.cpu is not None and self.cpu.delegate is not None:
+            if not self.cpu.delegate.is_memory_mapped(address, size):
+                return None
+            return self.cpu.read_memory(address, size * 8).unsigned
+        return None
+
 
 
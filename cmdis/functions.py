@@ -0,0 +1,231 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import hashlib
+from bisect import bisect_right
+
+from .instructions import (Branch, Push, Pop, LoadMultiple)
+from .cfg import falls_through
+from .utilities import bytes_to_le32
+
+## @brief Returns True for a push with LR in the register list.
+def is_prologue(i):
+    return isinstance(i, Push) and i.registers.get_bit_value(14) == 1
+
+## @brief Returns True for instructions that return from a function.
+#
+# These are pop and ldm with PC in the register list, and bx lr.
+def is_epilogue(i):
+    if isinstance(i, (Pop, LoadMultiple)):
+        return i.writes_pc
+    return isinstance(i, Branch) and not i.with_link and getattr(i, 'm', None) == 14
+
+##
+# @brief Code of a single function.
+#
+# The function extends from its entry point to the end of the last instruction that
+# doesn't fall through, normally a return, before the next function. Literal pools and
+# padding following that instruction are not part of the function.
+class Function(object):
+    def __init__(self, instructions, data):
+        self._instructions = instructions
+        self._data = data
+        self._digest = None
+        self.is_self_contained = True
+
+    @property
+    def start_address(self):
+        return self._instructions[0].address
+
+    @property
+    def end_address(self):
+        last = self._instructions[-1]
+        return last.address + last.size
+
+    @property
+    def size(self):
+        return self.end_address - self.start_address
+
+    @property
+    def instructions(self):
+        return self._instructions
+
+    ## @brief List of the instructions that return from the function.
+    @property
+    def epilogues(self):
+        return [i for i in self._instructions if is_epilogue(i)]
+
+    ## @brief Bytes of the function.
+    @property
+    def data(self):
+        return self._data
+
+    ## @brief SHA-1 hash of the function's bytes, as a hex string.
+    @property
+    def digest(self):
+        if self._digest is None:
+            self._digest = hashlib.sha1(bytes(self._data)).hexdigest()
+        return self._digest
+
+    def __len__(self):
+        return len(self._instructions)
+
+    def __iter__(self):
+        return iter(self._instructions)
+
+    def __repr__(self):
+        return "<%s@0x%x [0x%08x..0x%08x) %s>" % (self.__class__.__name__, id(self),
+            self.start_address, self.end_address, self.digest[:12])
+
+##
+# @brief Functions found in a Disassembly.
+#
+# Function entry points are the targets of bl instructions and push instructions with LR
+# in the register list that follow an instruction that doesn't fall through, a gap in
+# the code, or are the first instruction. Functions are sorted by address.
+#
+# A function is self-contained if every literal in its range is loaded only by the
+# function's own instructions. Only such functions decode the same way regardless of the
+# code around them, so only they are stored in a FunctionCache.
+class FunctionTable(object):
+    def __init__(self, disassembly):
+        self._functions = []
+        self._starts = []
+        self._build(disassembly)
+
+    @property
+    def functions(self):
+        return self._functions
+
+    ## @brief Return the function containing @a address, or None.
+    def function_at(self, address):
+        n = bisect_right(self._starts, address) - 1
+        if n < 0:
+            return None
+        f = self._functions[n]
+        return f if address < f.end_address else None
+
+    def __len__(self):
+        return len(self._functions)
+
+    def __iter__(self):
+        return iter(self._functions)
+
+    def _build(self, disassembly):
+        instructions = disassembly.instructions
+        if not instructions:
+            return
+
+        entries = set(t for t in disassembly.xrefs.call_targets
+                    if disassembly.index_of(t) is not None)
+        previous = None
+        for i in instructions:
+            if is_prologue(i) and (previous is None or not falls_through(previous)
+                    or previous.address + previous.size != i.address):
+                entries.add(i.address)
+            previous = i
+
+        entries = sorted(entries)
+        for n, entry in enumerate(entries):
+            # Every entry is the address of an instruction.
+            first = disassembly.index_of(entry)
+            if n + 1 < len(entries):
+                last = disassembly.index_of(entries[n + 1])
+            else:
+                last = len(instructions)
+            body = instructions[first:last]
+
+            # Trim anything after the last instruction that doesn't fall through.
+            for k in range(len(body) - 1, -1, -1):
+                if not falls_through(body[k]):
+                    body = body[:k + 1]
+                    break
+
+            start = entry - disassembly.address
+            end = body[-1].address + body[-1].size - disassembly.address
+            self._functions.append(Function(body, disassembly.data[start:end]))
+        self._starts = [f.start_address for f in self._functions]
+
+        # Find functions with literals loaded by other code.
+        for target in disassembly.xrefs.load_targets:
+            f = self.function_at(target)
+            if f is None:
+                continue
+            for source in disassembly.xrefs.loads_from(target):
+                if not (f.start_address <= source < f.end_address):
+                    f.is_self_contained = False
+
+##
+# @brief Decoded functions keyed by the hash of their contents.
+#
+# The cache is filled from the function tables of disassembled images. When an image is
+# disassembled with the cache, the sweep checks at each position whether the following
+# bytes are identical to a cached function. If so, the cached instructions are reused,
+# copied and moved to the new address if the function has moved, and the sweep continues
+# after the function.
+#
+# PC-relative loads use the PC rounded down to a multiple of 4, so the same bytes can
+# decode differently at addresses that differ by 2. Functions are cached by their digest
+# and bit 1 of their address, and only reused at addresses with the same bit 1.
+class FunctionCache(object):
+    def __init__(self):
+        self._functions = {}
+        self._byPrefix = {}
+
+    def __len__(self):
+        return len(self._functions)
+
+    def __contains__(self, digest):
+        return (digest, 0) in self._functions or (digest, 2) in self._functions
+
+    ## @brief Add the self-contained functions of a FunctionTable.
+    def update(self, table):
+        for f in table:
+            key = (f.digest, f.start_address & 2)
+            if not f.is_self_contained or f.size < 4 or key in self._functions:
+                continue
+            self._functions[key] = f
+            self._byPrefix.setdefault(bytes_to_le32(f.data), []).append(f)
+
+    ## @brief Find a cached function whose bytes match the data at @a offset.
+    #
+    # @param address Address of the data at @a offset. Only functions cached at an address
+    #   with the same alignment to 4 bytes are matched.
+    # @return The cached Function object, or None.
+    def match(self, data, offset, address):
+        if offset + 4 > len(data):
+            return None
+        candidates = self._byPrefix.get(bytes_to_le32(data, offset))
+        if candidates is None:
+            return None
+        for f in candidates:
+            if (f.start_address & 2) == (address & 2) and data[offset:offset + f.size] == f.data:
+                return f
+        return None
+
+    ## @brief Return the instructions of a cached function located at @a address.
+    @staticmethod
+    def instructions_at(f, address):
+        delta = address - f.start_address
+        if delta == 0:
+            return list(f.instructions)
+        result = []
+        for i in f.instructions:
+            i = copy.copy(i)
+            i.address += delta
+            result.append(i)
+        return result
@@ -14,10 +14,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from array import array
 from enum import Enum
 
 from .utilities import wmask
-from .bitstring import (bitstring, bit0, bit1, zeros)
+from .bitstring import (bitstring, word32, bit0, bit1, zeros, concat)
+from .bitvector import (bitvector, vector_values)
 
 class SRType(Enum):
     SRType_None = 0
@@ -39,6 +41,8 @@ def Align(value, alignment):
 # @return (bits(N), bit, bit)
 def AddWithCarry(x, y, carry_in):
     assert x.width == y.width
+    if x.width == 32:
+        return _AddWithCarry32(x.unsigned, y.unsigned, carry_in.unsigned)
     unsigned_sum = x.unsigned + y.unsigned + carry_in.unsigned
     signed_sum = x.signed + y.signed + carry_in.unsigned
     result = bitstring(unsigned_sum, x.width) # same value as signed_sum<N-1:0>
@@ -46,6 +50,10 @@ def AddWithCarry(x, y, carry_in):
     overflow = bit0 if result.signed == signed_sum else bit1
     return (result, carry_out, overflow)
 
+def _AddWithCarry32(x, y, carry_in):
+    result, carry_out, overflow = AddWithCarry_int(x, y, carry_in)
+    return (word32(result), bit1 if carry_out else bit0, bit1 if overflow else bit0)
+
 def LSL_C(x, shift):
     assert shift > 0
     ext_x = x % zeros(shift)
@@ -127,50 +135,319 @@ def Shift(value, type, amount, carry_in):
     result, _ = Shift_C(value, type, amount , carry_in)
     return result
 
-def DecodeImmShift(type, imm5):
-    if type == '00':
-        shift_t = SRType.SRType_LSL
-        shift_n = imm5.unsigned
-    elif type == '01':
-        shift_t = SRType.SRType_LSR
-        shift_n = 32 if imm5 == '00000' else imm5.unsigned
-    elif type == '10':
-        shift_t = SRType.SRType_ASR
-        shift_n = 32 if imm5 == '00000' else imm5.unsigned
-    elif type == '11':
-        if imm5 == '00000':
-            shift_t = SRType.SRType_RRX
-            shift_n = 1
+##
+# @brief Integer versions of the helpers.
+#
+# These take and return plain unsigned integers, with the width @a N in bits as the last
+# argument, and give the same results as the bitstring helpers of the same name. Carry and
+# overflow are returned as 0 or 1. Arguments must already be within @a N bits.
+
+## @return (result, carry_out, overflow)
+def AddWithCarry_int(x, y, carry_in, N=32):
+    unsigned_sum = x + y + carry_in
+    result = unsigned_sum & ((1 << N) - 1)
+    # Signed overflow if both operands have the same sign and the result's sign differs.
+    overflow = ((~(x ^ y) & (x ^ result)) >> (N - 1)) & 1
+    return (result, unsigned_sum >> N, overflow)
+
+def LSL_C_int(x, shift, N=32):
+    assert shift > 0
+    ext_x = x << shift
+    return ext_x & ((1 << N) - 1), (ext_x >> N) & 1
+
+def LSR_C_int(x, shift, N=32):
+    assert shift > 0
+    return x >> shift, (x >> (shift - 1)) & 1
+
+def ASR_C_int(x, shift, N=32):
+    assert shift > 0
+    if x >> (N - 1):
+        x -= 1 << N
+    return (x >> shift) & ((1 << N) - 1), (x >> (shift - 1)) & 1
+
+def ROR_C_int(x, shift, N=32):
+    assert shift != 0
+    m = shift % N
+    result = ((x >> m) | (x << (N - m))) & ((1 << N) - 1)
+    return result, result >> (N - 1)
+
+def RRX_C_int(x, carry_in, N=32):
+    return (carry_in << (N - 1)) | (x >> 1), x & 1
+
+def Shift_C_int(value, type, amount, carry_in, N=32):
+    assert not (type == SRType.SRType_RRX and amount != 1)
+
+    if amount == 0 or type == SRType.SRType_None:
+        return value, carry_in
+    elif type == SRType.SRType_LSL:
+        return LSL_C_int(value, amount, N)
+    elif type == SRType.SRType_LSR:
+        return LSR_C_int(value, amount, N)
+    elif type == SRType.SRType_ASR:
+        return ASR_C_int(value, amount, N)
+    elif type == SRType.SRType_ROR:
+        return ROR_C_int(value, amount, N)
+    elif type == SRType.SRType_RRX:
+        return RRX_C_int(value, carry_in, N)
+
+def Shift_int(value, type, amount, carry_in, N=32):
+    result, _ = Shift_C_int(value, type, amount, carry_in, N)
+    return result
+
+##
+# @brief Integer helpers for the DSP extension.
+#
+# The packed instructions operate on 8-bit or 16-bit lanes of 32-bit values. Each lane is
+# computed with plain integers, and lane results of the saturating forms are looked up in
+# a table of every possible lane result.
+
+## @brief Saturate @a i to an N-bit signed value.
+# @return (result, saturated) with the result as an unsigned N-bit integer.
+def SignedSatQ_int(i, N):
+    top = (1 << (N - 1)) - 1
+    if i > top:
+        return top, 1
+    elif i < -top - 1:
+        return top + 1, 1
+    return i & ((1 << N) - 1), 0
+
+## @brief Saturate @a i to an N-bit unsigned value.
+# @return (result, saturated)
+def UnsignedSatQ_int(i, N):
+    top = (1 << N) - 1
+    if i > top:
+        return top, 1
+    elif i < 0:
+        return 0, 1
+    return i, 0
+
+## @brief Signed value of the top or bottom halfword of a 32-bit integer.
+def SignedHalf_int(x, top):
+    return (((x >> 16) if top else x) & 0xffff ^ 0x8000) - 0x8000
+
+# Saturation tables, built on first use and keyed by lane width and signedness. Lane
+# results of N-bit sums and differences lie in [-2^N, 2^(N+1)), so each table is indexed
+# by the result plus 2^N.
+_SATURATION_TABLES = {}
+
+def _saturation_table(N, signed):
+    try:
+        return _SATURATION_TABLES[(N, signed)]
+    except KeyError:
+        saturate = SignedSatQ_int if signed else UnsignedSatQ_int
+        values = [saturate(i, N)[0] for i in range(-(1 << N), 1 << (N + 1))]
+        table = _SATURATION_TABLES[(N, signed)] = array('B' if N == 8 else 'H', values)
+        return table
+
+# Lane width and lanes of each parallel add and subtract operation. Lane i of the result
+# combines lane i of the first operand with the listed lane of the second operand, which
+# is added or subtracted.
+_PARALLEL_OPS = {
+    'add16' : (16, ((0, False), (1, False))),
+    'asx' :   (16, ((1, True), (0, False))),
+    'sax' :   (16, ((1, False), (0, True))),
+    'sub16' : (16, ((0, True), (1, True))),
+    'add8' :  (8, ((0, False), (1, False), (2, False), (3, False))),
+    'sub8' :  (8, ((0, True), (1, True), (2, True), (3, True))),
+    }
+
+## @brief Parallel add and subtract of the 8-bit or 16-bit lanes of two 32-bit integers.
+#
+# @param prefix One of 's', 'q', 'sh', 'u', 'uq', 'uh': signed or unsigned, and modular,
+#   saturating or halving.
+# @param op One of 'add16', 'asx', 'sax', 'sub16', 'add8', 'sub8'.
+# @return (result, ge) where ge is the new 4-bit value of the GE flags, or None for the
+#   saturating and halving forms, which leave the flags unchanged.
+def ParallelAddSub_int(x, y, prefix, op):
+    N, lanes = _PARALLEL_OPS[op]
+    mask = (1 << N) - 1
+    sign = 1 << (N - 1)
+    signed = prefix[0] != 'u'
+    kind = prefix[-1]
+    if kind == 'q':
+        table = _saturation_table(N, signed)
+    # Each 16-bit lane sets two GE flags.
+    geBits = 0b11 if N == 16 else 0b1
+    result = 0
+    ge = 0
+    for i, (j, subtract) in enumerate(lanes):
+        a = (x >> (i * N)) & mask
+        b = (y >> (j * N)) & mask
+        if signed:
+            a = (a ^ sign) - sign
+            b = (b ^ sign) - sign
+        r = a - b if subtract else a + b
+        if kind == 'q':
+            lane = table[r + mask + 1]
+        elif kind == 'h':
+            lane = (r >> 1) & mask
         else:
-            shift_t = SRType.SRType_ROR
-            shift_n = imm5.unsigned
+            lane = r & mask
+            if (r > mask) if not (signed or subtract) else (r >= 0):
+                ge |= geBits << (i * N // 8)
+        result |= lane << (i * N)
+    return result, (ge if kind in ('s', 'u') else None)
+
+## @brief Select each byte from @a x if its GE flag is set, or from @a y otherwise.
+def Select_int(x, y, ge):
+    mask = _GE_BYTE_MASKS[ge]
+    return (x & mask) | (y & ~mask & 0xffffffff)
+
+# Byte mask for each value of the GE flags.
+_GE_BYTE_MASKS = [sum(0xff << (8 * i) for i in range(4) if ge & (1 << i)) for ge in range(16)]
+
+##
+# @brief Batch versions of the helpers, operating on bitvectors.
+#
+# Each applies the same operation as the helper of the same name to every element of the
+# bitvector arguments. Shift amounts and the shift type are the same for all elements, as
+# they are for a decoded instruction. Other arguments may be bitvectors, or bitstrings or
+# integers that apply to every element. These require NumPy.
+
+## @return (bitvector(N), bitvector(1), bitvector(1))
+def AddWithCarry_batch(x, y, carry_in):
+    N = x.width
+    assert N > 0
+    xv = x.values
+    yv = vector_values(y)
+    result = bitvector(xv + yv + vector_values(carry_in), N)
+    rv = result.values
+    # Carry and overflow out of the top bit, computed from the operand and result signs.
+    carry_out = bitvector((xv & yv) | ((xv | yv) & ~rv), N).get_bit(N - 1)
+    overflow = bitvector(~(xv ^ yv) & (xv ^ rv), N).get_bit(N - 1)
+    return (result, carry_out, overflow)
+
+def LSL_C_batch(x, shift):
+    assert shift > 0
+    result = x << shift
+    carry_out = x.get_bit(x.width - shift) if shift <= x.width else x & 0
+    return result, bitvector(carry_out.values, 1)
+
+def LSR_C_batch(x, shift):
+    assert shift > 0
+    result = x >> shift
+    carry_out = x.get_bit(shift - 1) if shift <= x.width else x & 0
+    return result, bitvector(carry_out.values, 1)
+
+def ASR_C_batch(x, shift):
+    assert shift > 0
+    signed = x.signed
+    result = bitvector(signed >> min(shift, 63), x.width)
+    carry_out = bitvector(signed >> min(shift - 1, 63), 1)
+    return result, carry_out
+
+def ROR_C_batch(x, shift):
+    assert shift != 0
+    m = shift % x.width
+    result = (x >> m) | (x << (x.width - m)) if m != 0 else x
+    carry_out = result.get_bit(x.width - 1)
+    return result, carry_out
+
+def RRX_C_batch(x, carry_in):
+    if not isinstance(carry_in, bitvector):
+        carry_in = bitvector.full(len(x), carry_in, 1)
+    result = carry_in % x[1:x.width]
+    carry_out = x.get_bit(0)
+    return result, carry_out
+
+def Shift_C_batch(value, type, amount, carry_in):
+    assert not (type == SRType.SRType_RRX and amount != 1)
+
+    if amount == 0 or type == SRType.SRType_None:
+        result, carry_out = value, carry_in
+    else:
+        if type == SRType.SRType_LSL:
+            result, carry_out = LSL_C_batch(value, amount)
+        elif type == SRType.SRType_LSR:
+            result, carry_out = LSR_C_batch(value, amount)
+        elif type == SRType.SRType_ASR:
+            result, carry_out = ASR_C_batch(value, amount)
+        elif type == SRType.SRType_ROR:
+            result, carry_out = ROR_C_batch(value, amount)
+        elif type == SRType.SRType_RRX:
+            result, carry_out = RRX_C_batch(value, carry_in)
+
+    return result, carry_out
+
+def Shift_batch(value, type, amount, carry_in):
+    result, _ = Shift_C_batch(value, type, amount, carry_in)
+    return result
+
+def _decode_imm_shift(type, imm5):
+    if type == 0b00:
+        return SRType.SRType_LSL, imm5
+    elif type == 0b01:
+        return SRType.SRType_LSR, 32 if imm5 == 0 else imm5
+    elif type == 0b10:
+        return SRType.SRType_ASR, 32 if imm5 == 0 else imm5
+    elif imm5 == 0:
+        return SRType.SRType_RRX, 1
     else:
+        return SRType.SRType_ROR, imm5
+
+# (shift_t, shift_n) indexed by type and then imm5.
+_DECODE_IMM_SHIFT = [[_decode_imm_shift(type, imm5) for imm5 in range(32)] for type in range(4)]
+
+## @brief Decode the shift type and 5-bit amount of a register operand.
+#
+# @param type 2-bit bitstring or integer.
+# @param imm5 5-bit bitstring or integer.
+# @return (SRType, int)
+def DecodeImmShift(type, imm5):
+    type = int(type)
+    if not 0 <= type <= 3:
         raise ValueError("unknown type value %s" % type)
-    return shift_t, shift_n
+    return _DECODE_IMM_SHIFT[type][int(imm5)]
 
-# @param carry_in Either passed through unchanged or not used. Does not affect result imm32.
-def ThumbExpandImm_C(imm12, carry_in):
+## @brief ThumbExpandImm_C as written in the architecture pseudocode.
+#
+# Kept as the reference that the table used by ThumbExpandImm_C() is checked against.
+def _ThumbExpandImm_C_pseudocode(imm12, carry_in):
     if imm12[10:12] == '00':
         imm12_8 = imm12[8:10]
         imm12_0 = imm12[0:8]
         if imm12_8 == '00':
             imm32 = imm12_0.zero_extend(32)
         elif imm12_8 == '01':
-            imm32 = bitstring('00000000') % imm12_0 % bitstring('00000000') % imm12_0
+            imm32 = concat('00000000', imm12_0, '00000000', imm12_0)
         elif imm12_8 == '10':
-            imm32 = imm12_0 % bitstring('00000000') % imm12_0 % bitstring('00000000')
+            imm32 = concat(imm12_0, '00000000', imm12_0, '00000000')
         elif imm12_8 == '11':
-            imm32 = imm12_0 % imm12_0 % imm12_0 % imm12_0
+            imm32 = concat(imm12_0, imm12_0, imm12_0, imm12_0)
         carry_out = carry_in
     else:
-        unrotated_value = (bit1 % imm12[0:7]).zero_extend(32)
+        unrotated_value = concat(bit1, imm12[0:7]).zero_extend(32)
         imm32, carry_out = ROR_C(unrotated_value, imm12[7:12].unsigned)
     return imm32, carry_out
 
+def _expand_imm(imm12):
+    if imm12 >> 10 == 0:
+        b = imm12 & 0xff
+        imm32 = (b, (b << 16) | b, (b << 24) | (b << 8), b * 0x01010101)[(imm12 >> 8) & 3]
+        return imm32, None
+    return ROR_C_int(0x80 | (imm12 & 0x7f), imm12 >> 7)
+
+# Expanded value and carry out for each imm12 value. A carry of None means the carry in
+# is passed through.
+_THUMB_EXPAND_IMM = [_expand_imm(imm12) for imm12 in range(4096)]
+
+## @brief Expand a 12-bit modified immediate to 32 bits.
+#
+# The result is looked up in a table of all 4096 encodings.
+#
+# @param imm12 12-bit bitstring or integer.
+# @param carry_in Either passed through unchanged or not used. Does not affect result imm32.
+# @return (word32, bit)
+def ThumbExpandImm_C(imm12, carry_in):
+    imm32, carry_out = _THUMB_EXPAND_IMM[int(imm12)]
+    if carry_out is None:
+        carry_out = carry_in
+    else:
+        carry_out = bit1 if carry_out else bit0
+    return word32(imm32), carry_out
+
 def ThumbExpandImm(imm12):
-    # Carry in param to this call is ignored.
-    imm32, _ = ThumbExpandImm_C(imm12, bit0)
-    return imm32
+    return word32(_THUMB_EXPAND_IMM[int(imm12)][0])
 
 
 
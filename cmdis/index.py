@@ -0,0 +1,64 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from bisect import bisect_right
+
+##
+# @brief Address index over the disassembled regions of a memory map.
+#
+# Each region is a Disassembly object, which holds a sorted array of the start addresses
+# of its instructions. Finding the region for an address and then the instruction within
+# the region are both binary searches.
+class DisassemblyIndex(object):
+    def __init__(self, regions=()):
+        self._regions = []
+        self._starts = []
+        for region in regions:
+            self.add(region)
+
+    @property
+    def regions(self):
+        return self._regions
+
+    ## @brief Add a region, replacing any region with the same start address.
+    def add(self, disassembly):
+        n = bisect_right(self._starts, disassembly.address) - 1
+        if n >= 0 and self._starts[n] == disassembly.address:
+            self._regions[n] = disassembly
+            return
+        self._starts.insert(n + 1, disassembly.address)
+        self._regions.insert(n + 1, disassembly)
+
+    ## @brief Return the region containing @a address, or None.
+    def region_at(self, address):
+        n = bisect_right(self._starts, address) - 1
+        if n >= 0 and address < self._regions[n].end_address:
+            return self._regions[n]
+        return None
+
+    ## @brief Return the instruction containing @a address, or None.
+    def instruction_at(self, address):
+        region = self.region_at(address)
+        return region.instruction_at(address) if region is not None else None
+
+    ## @brief Return the instruction containing @a address with its neighbours.
+    #
+    # The result is limited to the region containing @a address.
+    def instructions_around(self, address, before, after):
+        region = self.region_at(address)
+        if region is None:
+            return []
+        return region.instructions_around(address, before, after)
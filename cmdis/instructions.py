@@ -18,11 +18,13 @@ from collections import namedtuple
 from enum import Enum
 import operator
 
-from .decoder import (Instruction, instr, DecodeError, UnpredictableError)
-from .bitstring import (bitstring, bit0, bit1)
+from .decoder import (Instruction, instr, instr_operands, DecodeError, UnpredictableError,
+                      UndefinedInstructionError)
+from .bitstring import (bitstring, bit0, bit1, concat)
 from .formatter import (RegisterOperand, ImmediateOperand, LabelOperand,
                         ShiftRotateOperand, BarrierOperand, MemoryAccessOperand,
-                        ReglistOperand, CpsOperand, SpecialRegisterOperand)
+                        ReglistOperand, CpsOperand, SpecialRegisterOperand,
+                        LiteralOperand)
 from .helpers import *
 from .registers import CORE_REGISTER
 
@@ -31,53 +33,104 @@ class SetFlags(Enum):
     Never = 2
     NotInITBlock = 3
 
+# ------------------------------ Specialized evaluation ------------------------------
+
+# Functions evaluating an instruction are selected when the instruction is decoded, based
+# on its static fields. Each distinct combination of fields is generated once by calling
+# the factory function, and shared by all instructions with those fields.
+_EVALUATORS = {}
+
+def _evaluator(factory, *key):
+    try:
+        return _EVALUATORS[(factory, key)]
+    except KeyError:
+        fn = _EVALUATORS[(factory, key)] = factory(*key)
+        return fn
+
+# The result may be a 32-bit bitstring or an unsigned integer, and carry and overflow
+# bitstrings or 0 and 1.
+def _update_flags(cpu, result, carry, overflow):
+    result = int(result)
+    cpu.apsr.n = result >> 31
+    cpu.apsr.z = 1 if result == 0 else 0
+    if carry is not None:
+        cpu.apsr.c = carry
+    if overflow is not None:
+        cpu.apsr.v = overflow
+
+def _update_flags_outside_it_block(cpu, result, carry, overflow):
+    if not cpu.in_it_block:
+        _update_flags(cpu, result, carry, overflow)
+
+def _keep_flags(cpu, result, carry, overflow):
+    pass
+
+_FLAG_UPDATERS = {
+    SetFlags.Always : _update_flags,
+    SetFlags.Never : _keep_flags,
+    SetFlags.NotInITBlock : _update_flags_outside_it_block,
+    }
+
 # ------------------------------ Data processing instructions ------------------------------
 
 class DataProcessing(Instruction):
+    __slots__ = ('setflags', 'd', 'n', 'm', '_update_flags')
+
     def __init__(self, mnemonic, word, is32bit):
         super(DataProcessing, self).__init__(mnemonic, word, is32bit)
         self.setflags = SetFlags.Never
+        self.d = None
+        self.n = None
+        self.m = None
+        self._update_flags = _keep_flags
+
+    def _specialize(self):
+        self._update_flags = _FLAG_UPDATERS[self.setflags]
 
     def _set_flags(self, cpu, result, carry, overflow):
-        if self.setflags == SetFlags.Always:
-            setflags = True
-        elif self.setflags == SetFlags.Never:
-            setflags = False
-        elif self.setflags == SetFlags.NotInITBlock:
-            setflags = not cpu.in_it_block
-
-        if setflags:
-            cpu.apsr.n = result[31]
-            cpu.apsr.z = result.is_zero_bit()
-            if carry is not None:
-                cpu.apsr.c = carry
-            if overflow is not None:
-                cpu.apsr.v = overflow
+        self._update_flags(cpu, result, carry, overflow)
 
     def _eval(self, cpu):
         cpu.pc += self.size
 
+def _add_sub_evaluator(immediate, sub, use_carry):
+    carry_in = 1 if sub else 0
+    def _eval(self, cpu):
+        # TODO handle PC + 4
+        operand2 = self.imm32.unsigned if immediate else cpu.r[self.m].unsigned
+        if sub:
+            operand2 ^= 0xffffffff
+        result, carry, overflow = AddWithCarry_int(cpu.r[self.n].unsigned, operand2,
+            cpu.apsr.c.unsigned if use_carry else carry_in)
+        cpu.r[self.d] = result
+        self._update_flags(cpu, result, carry, overflow)
+        cpu.pc += self.size
+    return _eval
+
 class AddSub(DataProcessing):
+    __slots__ = ('use_carry', 'sub', '_evaluator')
+
     def __init__(self, mnemonic, word, is32bit):
         super(AddSub, self).__init__(mnemonic, word, is32bit)
         self.use_carry = False
         self.sub = False
+        self._evaluator = None
+
+    def _specialize(self):
+        super(AddSub, self)._specialize()
+        self._evaluator = _evaluator(_add_sub_evaluator, self.imm32 is not None, self.sub,
+                            self.use_carry)
 
     def _eval(self, cpu):
-        # TODO handle PC + 4
-        if self.sub:
-            result, carry, overflow = AddWithCarry(cpu.r[self.n],
-                ~(self.imm32 if hasattr(self, 'imm32') else cpu.r[self.m]),
-                cpu.apsr.c if self.use_carry else bit1)
-        else:
-            result, carry, overflow = AddWithCarry(cpu.r[self.n],
-                self.imm32 if hasattr(self, 'imm32') else cpu.r[self.m],
-                cpu.apsr.c if self.use_carry else bit0)
-        cpu.r[self.d] = result
-        self._set_flags(cpu, result, carry, overflow)
-        super(AddSub, self)._eval(cpu)
+        self._evaluator(self, cpu)
 
 class BitOp(DataProcessing):
+    __slots__ = ('op',)
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(BitOp, self).__init__(mnemonic, word, is32bit)
+        self.op = None
+
     def _eval(self, cpu):
         result = self.op(cpu.r[self.n], cpu.r[self.m])
         cpu.r[self.d] = result
@@ -85,22 +138,39 @@ class BitOp(DataProcessing):
         super(BitOp, self)._eval(cpu)
 
 class BitClear(DataProcessing):
+    __slots__ = ()
+
     def _eval(self, cpu):
         result = cpu.r[self.n] & ~cpu.r[self.m]
         cpu.r[self.d] = result
         self._set_flags(cpu, result, None, None)
         super(BitClear, self)._eval(cpu)
 
-class ShiftOp(DataProcessing):
+def _shift_evaluator(immediate):
     def _eval(self, cpu):
-        if hasattr(self, 'shift_n'):
-            shift_n = self.shift_n
-        else:
-            shift_n = cpu.r[self.m][0:8].unsigned
-        result, carry = Shift_C(cpu.r[self.n], self.type, shift_n, cpu.apsr.c)
+        shift_n = self.shift_n if immediate else cpu.r[self.m].unsigned & 0xff
+        result, carry = Shift_C_int(cpu.r[self.n].unsigned, self.type, shift_n,
+            cpu.apsr.c.unsigned)
         cpu.r[self.d] = result
-        self._set_flags(cpu, result, carry, None)
-        super(ShiftOp, self)._eval(cpu)
+        self._update_flags(cpu, result, carry, None)
+        cpu.pc += self.size
+    return _eval
+
+class ShiftOp(DataProcessing):
+    __slots__ = ('type', 'shift_n', '_evaluator')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(ShiftOp, self).__init__(mnemonic, word, is32bit)
+        self.type = None
+        self.shift_n = None
+        self._evaluator = None
+
+    def _specialize(self):
+        super(ShiftOp, self)._specialize()
+        self._evaluator = _evaluator(_shift_evaluator, self.shift_n is not None)
+
+    def _eval(self, cpu):
+        self._evaluator(self, cpu)
 
 @instr("ands", BitOp,        "010000 0000 Rm(3) Rdn(3)", op=operator.and_)
 @instr("eors", BitOp,        "010000 0001 Rm(3) Rdn(3)", op=operator.xor)
@@ -118,7 +188,10 @@ def adc(i, Rm, Rdn):
     i.m = Rm.unsigned
     i.setflags = SetFlags.NotInITBlock
 #     shift_t, shift_n = SRType_LSL, 0
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(adc)
+def adc_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("adds", AddSub, "000 11 1 0 imm3(3) Rn(3) Rd(3)")
 @instr("subs", AddSub, "000 11 1 1 imm3(3) Rn(3) Rd(3)", sub=True)
@@ -127,7 +200,10 @@ def add_imm_t1(i, imm3, Rn, Rd):
     i.n = Rn.unsigned
     i.setflags = SetFlags.NotInITBlock
     i.imm32 = imm3.zero_extend(32)
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.imm32)]
+
+@instr_operands(add_imm_t1)
+def add_imm_t1_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.imm32)]
 
 @instr("adds", AddSub, "001 10 Rdn(3) imm8(8)")
 @instr("subs", AddSub, "001 11 Rdn(3) imm8(8)", sub=True)
@@ -136,7 +212,10 @@ def add_imm_t2(i, Rdn, imm8):
     i.n = Rdn.unsigned
     i.setflags = SetFlags.NotInITBlock
     i.imm32 = imm8.zero_extend(32)
-    i.operands = [RegisterOperand(i.d), ImmediateOperand(i.imm32)]
+
+@instr_operands(add_imm_t2)
+def add_imm_t2_operands(i):
+    return [RegisterOperand(i.d), ImmediateOperand(i.imm32)]
 
 @instr("adds", AddSub, "000 11 0 0 Rm(3) Rn(3) Rd(3)")
 @instr("subs", AddSub, "000 11 0 1 Rm(3) Rn(3) Rd(3)", sub=True)
@@ -145,21 +224,30 @@ def add_reg_t1(i, Rm, Rn, Rd):
     i.n = Rn.unsigned
     i.m = Rm.unsigned
     i.setflags = SetFlags.NotInITBlock
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(add_reg_t1)
+def add_reg_t1_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
 
 @instr("add", AddSub, "010001 00 DN Rm(4) Rdn(3)")
 def add_reg_t2(i, DN, Rm, Rdn):
     i.d = (DN % Rdn).unsigned
     i.n = i.d
     i.m = Rm.unsigned
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(add_reg_t2)
+def add_reg_t2_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("add", AddSub, "1010 1 Rd(3) imm8(8)")
 def add_sp_plus_imm_t1(i, Rd, imm8):
     i.d = Rd.unsigned
     i.n = 13
     i.imm32 = (imm8 % '00').zero_extend(32)
-    i.operands = [RegisterOperand(i.d), RegisterOperand(13), ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(add_sp_plus_imm_t1)
+def add_sp_plus_imm_t1_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(13), ImmediateOperand(i.imm32.unsigned)]
 
 @instr("add", AddSub, "01000100 DM 1101 Rdm(3)")
 def add_sp_plus_reg_t1(i, DM, Rdm):
@@ -167,7 +255,10 @@ def add_sp_plus_reg_t1(i, DM, Rdm):
     i.n = 13
     i.m = (DM % Rdm).unsigned
     i.setflags = SetFlags.Never
-    i.operands = [RegisterOperand(i.d), RegisterOperand(13), RegisterOperand(i.m)]
+
+@instr_operands(add_sp_plus_reg_t1)
+def add_sp_plus_reg_t1_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(13), RegisterOperand(i.m)]
 
 @instr("add", AddSub, "01000100 1 Rm(4) 101")
 def add_sp_plus_reg_t2(i, Rm):
@@ -177,7 +268,10 @@ def add_sp_plus_reg_t2(i, Rm):
     i.n = 13
     i.m = Rm.unsigned
     i.setflags = SetFlags.Never
-    i.operands = [RegisterOperand(13), RegisterOperand(i.m)]
+
+@instr_operands(add_sp_plus_reg_t2)
+def add_sp_plus_reg_t2_operands(i):
+    return [RegisterOperand(13), RegisterOperand(i.m)]
 
 @instr("add", AddSub, "1011 0000 0 imm7(7)")
 @instr("sub", AddSub, "1011 0000 1 imm7(7)", sub=True)
@@ -185,7 +279,10 @@ def add_sp_plus_imm_t2(i, imm7):
     i.d = 13
     i.n = 13
     i.imm32 = (imm7 % '00').zero_extend(32)
-    i.operands = [RegisterOperand(13), ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(add_sp_plus_imm_t2)
+def add_sp_plus_imm_t2_operands(i):
+    return [RegisterOperand(13), ImmediateOperand(i.imm32.unsigned)]
 
 @instr("lsls", ShiftOp, "000 stype=00 imm5(5) Rm(3) Rd(3)", type=SRType.SRType_LSL)
 @instr("lsrs", ShiftOp, "000 stype=01 imm5(5) Rm(3) Rd(3)", type=SRType.SRType_LSR)
@@ -195,13 +292,19 @@ def shift_imm_t1(i, stype, imm5, Rm, Rd):
     i.n = Rm.unsigned
     _, i.shift_n = DecodeImmShift(stype, imm5)
     i.setflags = SetFlags.NotInITBlock
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.shift_n)]
+
+@instr_operands(shift_imm_t1)
+def shift_imm_t1_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.shift_n)]
 
 # ------------------------------ Reverse subtract instructions ------------------------------
 
 class ReverseSubtract(DataProcessing):
+    __slots__ = ()
+
     def _eval(self, cpu):
-        result, carry, overflow = AddWithCarry(~cpu.r[self.n], self.imm32, bit1)
+        result, carry, overflow = AddWithCarry_int(cpu.r[self.n].unsigned ^ 0xffffffff,
+            self.imm32.unsigned, 1)
         cpu.r[self.d] = result
         self._set_flags(cpu, result, carry, overflow)
         cpu.pc += self.size
@@ -212,7 +315,10 @@ def rsb(i, Rn, Rd):
     i.n = Rn.unsigned
     i.setflags = SetFlags.NotInITBlock
     i.imm32 = zeros(32)
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(rsb)
+def rsb_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
 
 @instr("rsb", ReverseSubtract, "11110 im 0 1110 S Rn(4)", "0 imm3(3) Rd(4) imm8(8)")
 def rsb_w(i, im, S, Rn, imm3, Rd, imm8):
@@ -222,12 +328,17 @@ def rsb_w(i, im, S, Rn, imm3, Rd, imm8):
         raise UnpredictableError()
     i.setflags = (SetFlags.Never, SetFlags.Always)[S == '1']
     i._mnemonic += "s.w" if S == '1' else ".w"
-    i.imm32 = ThumbExpandImm(im % imm3 % imm8)
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
+    i.imm32 = ThumbExpandImm(concat(im, imm3, imm8))
+
+@instr_operands(rsb_w)
+def rsb_w_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
 
 # ------------------------------ Multiply instructions ------------------------------
 
 class Multiply(DataProcessing):
+    __slots__ = ()
+
     def _eval(self, cpu):
         operand1 = cpu.r[self.n].signed
         operand2 = cpu.r[self.m].signed
@@ -242,7 +353,10 @@ def mul_t1(i, Rn, Rdm):
     i.n = Rn.unsigned
     i.m = Rdm.unsigned
     i.setflags = SetFlags.NotInITBlock
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(mul_t1)
+def mul_t1_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
 
 @instr("mul", Multiply, "11111 0110 000 Rn(4)", "1111 Rd(4) 0000 Rm(4)")
 def mul_t2(i, Rn, Rd, Rm):
@@ -252,33 +366,528 @@ def mul_t2(i, Rn, Rd, Rm):
     i.setflags = SetFlags.Never
     if i.d in (13, 15) or i.n in (13, 15) or i.m in (13, 15):
         raise UnpredictableError()
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(mul_t2)
+def mul_t2_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+
+# ------------------------------ DSP extension instructions ------------------------------
+
+##
+# @brief Base class for instructions of the DSP extension.
+#
+# Executing one on a CPU without the extension raises UndefinedInstructionError.
+class DspDataProcessing(DataProcessing):
+    __slots__ = ()
+
+    def execute(self, cpu):
+        if not cpu.has_dsp_ext:
+            raise UndefinedInstructionError()
+        return self._eval(cpu)
+
+def _signed32(x):
+    return (x ^ 0x80000000) - 0x80000000
+
+def _accumulator(cpu, a):
+    return _signed32(cpu.r[a].unsigned) if a is not None else 0
+
+# Write the low 32 bits of a signed result, and set the Q flag if it doesn't fit.
+def _write_with_overflow(cpu, d, result):
+    cpu.r[d] = result & 0xffffffff
+    if not -0x80000000 <= result <= 0x7fffffff:
+        cpu.apsr.q = 1
+
+class ParallelAddSub(DspDataProcessing):
+    __slots__ = ('prefix', 'op')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(ParallelAddSub, self).__init__(mnemonic, word, is32bit)
+        self.prefix = None
+        self.op = None
+
+    def _eval(self, cpu):
+        result, ge = ParallelAddSub_int(cpu.r[self.n].unsigned, cpu.r[self.m].unsigned,
+                        self.prefix, self.op)
+        cpu.r[self.d] = result
+        if ge is not None:
+            cpu.apsr.ge = ge
+        cpu.pc += self.size
+
+@instr("sadd16",  ParallelAddSub, "11111 010 1 001 Rn(4)", "1111 Rd(4) 0 000 Rm(4)", prefix="s",  op="add16")
+@instr("sasx",    ParallelAddSub, "11111 010 1 010 Rn(4)", "1111 Rd(4) 0 000 Rm(4)", prefix="s",  op="asx")
+@instr("ssax",    ParallelAddSub, "11111 010 1 110 Rn(4)", "1111 Rd(4) 0 000 Rm(4)", prefix="s",  op="sax")
+@instr("ssub16",  ParallelAddSub, "11111 010 1 101 Rn(4)", "1111 Rd(4) 0 000 Rm(4)", prefix="s",  op="sub16")
+@instr("sadd8",   ParallelAddSub, "11111 010 1 000 Rn(4)", "1111 Rd(4) 0 000 Rm(4)", prefix="s",  op="add8")
+@instr("ssub8",   ParallelAddSub, "11111 010 1 100 Rn(4)", "1111 Rd(4) 0 000 Rm(4)", prefix="s",  op="sub8")
+@instr("qadd16",  ParallelAddSub, "11111 010 1 001 Rn(4)", "1111 Rd(4) 0 001 Rm(4)", prefix="q",  op="add16")
+@instr("qasx",    ParallelAddSub, "11111 010 1 010 Rn(4)", "1111 Rd(4) 0 001 Rm(4)", prefix="q",  op="asx")
+@instr("qsax",    ParallelAddSub, "11111 010 1 110 Rn(4)", "1111 Rd(4) 0 001 Rm(4)", prefix="q",  op="sax")
+@instr("qsub16",  ParallelAddSub, "11111 010 1 101 Rn(4)", "1111 Rd(4) 0 001 Rm(4)", prefix="q",  op="sub16")
+@instr("qadd8",   ParallelAddSub, "11111 010 1 000 Rn(4)", "1111 Rd(4) 0 001 Rm(4)", prefix="q",  op="add8")
+@instr("qsub8",   ParallelAddSub, "11111 010 1 100 Rn(4)", "1111 Rd(4) 0 001 Rm(4)", prefix="q",  op="sub8")
+@instr("shadd16", ParallelAddSub, "11111 010 1 001 Rn(4)", "1111 Rd(4) 0 010 Rm(4)", prefix="sh", op="add16")
+@instr("shasx",   ParallelAddSub, "11111 010 1 010 Rn(4)", "1111 Rd(4) 0 010 Rm(4)", prefix="sh", op="asx")
+@instr("shsax",   ParallelAddSub, "11111 010 1 110 Rn(4)", "1111 Rd(4) 0 010 Rm(4)", prefix="sh", op="sax")
+@instr("shsub16", ParallelAddSub, "11111 010 1 101 Rn(4)", "1111 Rd(4) 0 010 Rm(4)", prefix="sh", op="sub16")
+@instr("shadd8",  ParallelAddSub, "11111 010 1 000 Rn(4)", "1111 Rd(4) 0 010 Rm(4)", prefix="sh", op="add8")
+@instr("shsub8",  ParallelAddSub, "11111 010 1 100 Rn(4)", "1111 Rd(4) 0 010 Rm(4)", prefix="sh", op="sub8")
+@instr("uadd16",  ParallelAddSub, "11111 010 1 001 Rn(4)", "1111 Rd(4) 0 100 Rm(4)", prefix="u",  op="add16")
+@instr("uasx",    ParallelAddSub, "11111 010 1 010 Rn(4)", "1111 Rd(4) 0 100 Rm(4)", prefix="u",  op="asx")
+@instr("usax",    ParallelAddSub, "11111 010 1 110 Rn(4)", "1111 Rd(4) 0 100 Rm(4)", prefix="u",  op="sax")
+@instr("usub16",  ParallelAddSub, "11111 010 1 101 Rn(4)", "1111 Rd(4) 0 100 Rm(4)", prefix="u",  op="sub16")
+@instr("uadd8",   ParallelAddSub, "11111 010 1 000 Rn(4)", "1111 Rd(4) 0 100 Rm(4)", prefix="u",  op="add8")
+@instr("usub8",   ParallelAddSub, "11111 010 1 100 Rn(4)", "1111 Rd(4) 0 100 Rm(4)", prefix="u",  op="sub8")
+@instr("uqadd16", ParallelAddSub, "11111 010 1 001 Rn(4)", "1111 Rd(4) 0 101 Rm(4)", prefix="uq", op="add16")
+@instr("uqasx",   ParallelAddSub, "11111 010 1 010 Rn(4)", "1111 Rd(4) 0 101 Rm(4)", prefix="uq", op="asx")
+@instr("uqsax",   ParallelAddSub, "11111 010 1 110 Rn(4)", "1111 Rd(4) 0 101 Rm(4)", prefix="uq", op="sax")
+@instr("uqsub16", ParallelAddSub, "11111 010 1 101 Rn(4)", "1111 Rd(4) 0 101 Rm(4)", prefix="uq", op="sub16")
+@instr("uqadd8",  ParallelAddSub, "11111 010 1 000 Rn(4)", "1111 Rd(4) 0 101 Rm(4)", prefix="uq", op="add8")
+@instr("uqsub8",  ParallelAddSub, "11111 010 1 100 Rn(4)", "1111 Rd(4) 0 101 Rm(4)", prefix="uq", op="sub8")
+@instr("uhadd16", ParallelAddSub, "11111 010 1 001 Rn(4)", "1111 Rd(4) 0 110 Rm(4)", prefix="uh", op="add16")
+@instr("uhasx",   ParallelAddSub, "11111 010 1 010 Rn(4)", "1111 Rd(4) 0 110 Rm(4)", prefix="uh", op="asx")
+@instr("uhsax",   ParallelAddSub, "11111 010 1 110 Rn(4)", "1111 Rd(4) 0 110 Rm(4)", prefix="uh", op="sax")
+@instr("uhsub16", ParallelAddSub, "11111 010 1 101 Rn(4)", "1111 Rd(4) 0 110 Rm(4)", prefix="uh", op="sub16")
+@instr("uhadd8",  ParallelAddSub, "11111 010 1 000 Rn(4)", "1111 Rd(4) 0 110 Rm(4)", prefix="uh", op="add8")
+@instr("uhsub8",  ParallelAddSub, "11111 010 1 100 Rn(4)", "1111 Rd(4) 0 110 Rm(4)", prefix="uh", op="sub8")
+def parallel_add_sub(i, Rn, Rd, Rm):
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    if i.d in (13, 15) or i.n in (13, 15) or i.m in (13, 15):
+        raise UnpredictableError()
+
+@instr_operands(parallel_add_sub)
+def parallel_add_sub_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+
+class Select(DspDataProcessing):
+    __slots__ = ()
+
+    def _eval(self, cpu):
+        cpu.r[self.d] = Select_int(cpu.r[self.n].unsigned, cpu.r[self.m].unsigned,
+                            cpu.apsr.ge.unsigned)
+        cpu.pc += self.size
+
+@instr("sel", Select, "11111 010 1 010 Rn(4)", "1111 Rd(4) 1 000 Rm(4)")
+def sel(i, Rn, Rd, Rm):
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    if i.d in (13, 15) or i.n in (13, 15) or i.m in (13, 15):
+        raise UnpredictableError()
+
+@instr_operands(sel)
+def sel_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+
+##
+# @brief SSAT, USAT, SSAT16 and USAT16.
+#
+# The halfword forms saturate each halfword of the register, without shifting it.
+class Saturate(DspDataProcessing):
+    __slots__ = ('saturate_to', 'signed', 'halves', 'shift_t', 'shift_n')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(Saturate, self).__init__(mnemonic, word, is32bit)
+        self.saturate_to = 0
+        self.signed = True
+        self.halves = False
+        self.shift_t = SRType.SRType_None
+        self.shift_n = 0
+
+    # Saturate a signed value, and extend the result to the given width.
+    def _saturate(self, value, width):
+        N = self.saturate_to
+        if self.signed:
+            result, saturated = SignedSatQ_int(value, N)
+            sign = 1 << (N - 1)
+            result = ((result ^ sign) - sign) & ((1 << width) - 1)
+        else:
+            result, saturated = UnsignedSatQ_int(value, N)
+        return result, saturated
+
+    def _eval(self, cpu):
+        operand = cpu.r[self.n].unsigned
+        if self.halves:
+            low, saturated1 = self._saturate(SignedHalf_int(operand, False), 16)
+            high, saturated2 = self._saturate(SignedHalf_int(operand, True), 16)
+            result = (high << 16) | low
+            saturated = saturated1 | saturated2
+        else:
+            operand = Shift_int(operand, self.shift_t, self.shift_n, cpu.apsr.c.unsigned)
+            result, saturated = self._saturate(_signed32(operand), 32)
+        cpu.r[self.d] = result
+        if saturated:
+            cpu.apsr.q = 1
+        cpu.pc += self.size
+
+@instr("ssat", Saturate, "11110 0 11 00 sh 0 Rn(4)", "0 imm3(3) Rd(4) imm2(2) 0 satimm(5)", signed=True)
+@instr("usat", Saturate, "11110 0 11 10 sh 0 Rn(4)", "0 imm3(3) Rd(4) imm2(2) 0 satimm(5)", signed=False)
+def ssat(i, sh, Rn, imm3, Rd, imm2, satimm):
+    imm5 = imm3 % imm2
+    if sh == '1' and imm5 == '00000':
+        raise DecodeError() # See SSAT16 and USAT16
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.saturate_to = satimm.unsigned + (1 if i.signed else 0)
+    i.shift_t, i.shift_n = DecodeImmShift(sh % bit0, imm5)
+    if i.d in (13, 15) or i.n in (13, 15):
+        raise UnpredictableError()
+
+@instr_operands(ssat)
+def ssat_operands(i):
+    operands = [RegisterOperand(i.d), ImmediateOperand(i.saturate_to), RegisterOperand(i.n)]
+    if i.shift_n != 0:
+        operands.append(ShiftRotateOperand(i.shift_t, i.shift_n))
+    return operands
+
+@instr("ssat16", Saturate, "11110 0 11 00 1 0 Rn(4)", "0 000 Rd(4) 00 00 satimm(4)", signed=True, halves=True)
+@instr("usat16", Saturate, "11110 0 11 10 1 0 Rn(4)", "0 000 Rd(4) 00 00 satimm(4)", signed=False, halves=True)
+def ssat16(i, Rn, Rd, satimm):
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.saturate_to = satimm.unsigned + (1 if i.signed else 0)
+    if i.d in (13, 15) or i.n in (13, 15):
+        raise UnpredictableError()
+
+@instr_operands(ssat16)
+def ssat16_operands(i):
+    return [RegisterOperand(i.d), ImmediateOperand(i.saturate_to), RegisterOperand(i.n)]
+
+def _multiply_operands(i):
+    operands = [RegisterOperand(i.d), RegisterOperand(i.n), RegisterOperand(i.m)]
+    if i.a is not None:
+        operands.append(RegisterOperand(i.a))
+    return operands
+
+def _check_multiply_registers(i):
+    if i.d in (13, 15) or i.n in (13, 15) or i.m in (13, 15) or i.a == 13:
+        raise UnpredictableError()
+
+##
+# @brief SMLA<x><y>, SMLAW<y> and the SMUL forms without an accumulator.
+#
+# Halfword operands are selected by @a n_high and @a m_high. If @a word is set, all of
+# Rn is multiplied and the result is bits 47:16 of the product plus the accumulator.
+class MultiplyHalves(DspDataProcessing):
+    __slots__ = ('a', 'n_high', 'm_high', 'word')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(MultiplyHalves, self).__init__(mnemonic, word, is32bit)
+        self.a = None
+        self.n_high = False
+        self.m_high = False
+        self.word = False
+
+    def _eval(self, cpu):
+        operand2 = SignedHalf_int(cpu.r[self.m].unsigned, self.m_high)
+        if self.word:
+            result = (_signed32(cpu.r[self.n].unsigned) * operand2
+                        + (_accumulator(cpu, self.a) << 16)) >> 16
+        else:
+            result = (SignedHalf_int(cpu.r[self.n].unsigned, self.n_high) * operand2
+                        + _accumulator(cpu, self.a))
+        _write_with_overflow(cpu, self.d, result)
+        cpu.pc += self.size
+
+@instr("smla", MultiplyHalves, "11111 0110 001 Rn(4)", "Ra(4) Rd(4) 00 N M Rm(4)")
+def smla(i, Rn, Ra, Rd, N, M, Rm):
+    if Ra == '1111':
+        raise DecodeError() # See SMUL<x><y>
+    i._mnemonic += "bt"[N.unsigned] + "bt"[M.unsigned]
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.a = Ra.unsigned
+    i.n_high = (N == '1')
+    i.m_high = (M == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smla)
+def smla_operands(i):
+    return _multiply_operands(i)
+
+@instr("smul", MultiplyHalves, "11111 0110 001 Rn(4)", "1111 Rd(4) 00 N M Rm(4)")
+def smul(i, Rn, Rd, N, M, Rm):
+    i._mnemonic += "bt"[N.unsigned] + "bt"[M.unsigned]
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.n_high = (N == '1')
+    i.m_high = (M == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smul)
+def smul_operands(i):
+    return _multiply_operands(i)
+
+@instr("smlaw", MultiplyHalves, "11111 0110 011 Rn(4)", "Ra(4) Rd(4) 000 M Rm(4)", word=True)
+def smlaw(i, Rn, Ra, Rd, M, Rm):
+    if Ra == '1111':
+        raise DecodeError() # See SMULW<y>
+    i._mnemonic += "bt"[M.unsigned]
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.a = Ra.unsigned
+    i.m_high = (M == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smlaw)
+def smlaw_operands(i):
+    return _multiply_operands(i)
+
+@instr("smulw", MultiplyHalves, "11111 0110 011 Rn(4)", "1111 Rd(4) 000 M Rm(4)", word=True)
+def smulw(i, Rn, Rd, M, Rm):
+    i._mnemonic += "bt"[M.unsigned]
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.m_high = (M == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smulw)
+def smulw_operands(i):
+    return _multiply_operands(i)
+
+##
+# @brief SMLAD, SMLSD, SMUAD and SMUSD.
+#
+# The products of the bottom halfwords and of the top halfwords are added, or the
+# second is subtracted from the first. If @a exchange is set, the halfwords of Rm are
+# swapped first.
+class DualMultiply(DspDataProcessing):
+    __slots__ = ('a', 'exchange', 'subtract')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(DualMultiply, self).__init__(mnemonic, word, is32bit)
+        self.a = None
+        self.exchange = False
+        self.subtract = False
+
+    def _eval(self, cpu):
+        n = cpu.r[self.n].unsigned
+        m = cpu.r[self.m].unsigned
+        product1 = SignedHalf_int(n, False) * SignedHalf_int(m, self.exchange)
+        product2 = SignedHalf_int(n, True) * SignedHalf_int(m, not self.exchange)
+        result = (product1 - product2) if self.subtract else (product1 + product2)
+        _write_with_overflow(cpu, self.d, result + _accumulator(cpu, self.a))
+        cpu.pc += self.size
+
+@instr("smlad", DualMultiply, "11111 0110 010 Rn(4)", "Ra(4) Rd(4) 000 M Rm(4)")
+@instr("smlsd", DualMultiply, "11111 0110 100 Rn(4)", "Ra(4) Rd(4) 000 M Rm(4)", subtract=True)
+def smlad(i, Rn, Ra, Rd, M, Rm):
+    if Ra == '1111':
+        raise DecodeError() # See SMUAD and SMUSD
+    if M == '1':
+        i._mnemonic += "x"
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.a = Ra.unsigned
+    i.exchange = (M == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smlad)
+def smlad_operands(i):
+    return _multiply_operands(i)
+
+@instr("smuad", DualMultiply, "11111 0110 010 Rn(4)", "1111 Rd(4) 000 M Rm(4)")
+@instr("smusd", DualMultiply, "11111 0110 100 Rn(4)", "1111 Rd(4) 000 M Rm(4)", subtract=True)
+def smuad(i, Rn, Rd, M, Rm):
+    if M == '1':
+        i._mnemonic += "x"
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.exchange = (M == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smuad)
+def smuad_operands(i):
+    return _multiply_operands(i)
+
+##
+# @brief SMMLA, SMMLS and SMMUL.
+#
+# The result is the top word of the accumulator shifted up by 32 bits, plus or minus the
+# 64-bit product. If @a round is set, 0x80000000 is added before taking the top word.
+class MostSignificantMultiply(DspDataProcessing):
+    __slots__ = ('a', 'round', 'subtract')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(MostSignificantMultiply, self).__init__(mnemonic, word, is32bit)
+        self.a = None
+        self.round = False
+        self.subtract = False
+
+    def _eval(self, cpu):
+        product = _signed32(cpu.r[self.n].unsigned) * _signed32(cpu.r[self.m].unsigned)
+        accumulator = _accumulator(cpu, self.a) << 32
+        result = (accumulator - product) if self.subtract else (accumulator + product)
+        if self.round:
+            result += 0x80000000
+        cpu.r[self.d] = (result >> 32) & 0xffffffff
+        cpu.pc += self.size
+
+@instr("smmla", MostSignificantMultiply, "11111 0110 101 Rn(4)", "Ra(4) Rd(4) 000 R Rm(4)")
+@instr("smmls", MostSignificantMultiply, "11111 0110 110 Rn(4)", "Ra(4) Rd(4) 000 R Rm(4)", subtract=True)
+def smmla(i, Rn, Ra, Rd, R, Rm):
+    if Ra == '1111' and not i.subtract:
+        raise DecodeError() # See SMMUL
+    if R == '1':
+        i._mnemonic += "r"
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.a = Ra.unsigned
+    i.round = (R == '1')
+    if i.a == 15:
+        raise UnpredictableError()
+    _check_multiply_registers(i)
+
+@instr_operands(smmla)
+def smmla_operands(i):
+    return _multiply_operands(i)
+
+@instr("smmul", MostSignificantMultiply, "11111 0110 101 Rn(4)", "1111 Rd(4) 000 R Rm(4)")
+def smmul(i, Rn, Rd, R, Rm):
+    if R == '1':
+        i._mnemonic += "r"
+    i.d = Rd.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.round = (R == '1')
+    _check_multiply_registers(i)
+
+@instr_operands(smmul)
+def smmul_operands(i):
+    return _multiply_operands(i)
+
+##
+# @brief SMLAL<x><y>, SMLALD and SMLSLD.
+#
+# The product is added to the 64-bit accumulator in RdHi:RdLo. The halfword form selects
+# its operands with @a n_high and @a m_high. The @a dual forms add or subtract the
+# halfword products as DualMultiply does.
+class MultiplyAccumulateLong(DspDataProcessing):
+    __slots__ = ('dLo', 'dHi', 'n_high', 'm_high', 'dual', 'exchange', 'subtract')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(MultiplyAccumulateLong, self).__init__(mnemonic, word, is32bit)
+        self.dLo = None
+        self.dHi = None
+        self.n_high = False
+        self.m_high = False
+        self.dual = False
+        self.exchange = False
+        self.subtract = False
+
+    def _eval(self, cpu):
+        n = cpu.r[self.n].unsigned
+        m = cpu.r[self.m].unsigned
+        if self.dual:
+            product1 = SignedHalf_int(n, False) * SignedHalf_int(m, self.exchange)
+            product2 = SignedHalf_int(n, True) * SignedHalf_int(m, not self.exchange)
+            product = (product1 - product2) if self.subtract else (product1 + product2)
+        else:
+            product = SignedHalf_int(n, self.n_high) * SignedHalf_int(m, self.m_high)
+        accumulator = (cpu.r[self.dHi].unsigned << 32) | cpu.r[self.dLo].unsigned
+        result = accumulator + product
+        cpu.r[self.dHi] = (result >> 32) & 0xffffffff
+        cpu.r[self.dLo] = result & 0xffffffff
+        cpu.pc += self.size
+
+def _check_long_registers(i):
+    if i.dLo in (13, 15) or i.dHi in (13, 15) or i.n in (13, 15) or i.m in (13, 15) \
+            or i.dHi == i.dLo:
+        raise UnpredictableError()
+
+@instr("smlal", MultiplyAccumulateLong, "11111 0111 100 Rn(4)", "RdLo(4) RdHi(4) 10 N M Rm(4)")
+def smlal(i, Rn, RdLo, RdHi, N, M, Rm):
+    i._mnemonic += "bt"[N.unsigned] + "bt"[M.unsigned]
+    i.dLo = RdLo.unsigned
+    i.dHi = RdHi.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.n_high = (N == '1')
+    i.m_high = (M == '1')
+    _check_long_registers(i)
+
+@instr_operands(smlal)
+def smlal_operands(i):
+    return [RegisterOperand(i.dLo), RegisterOperand(i.dHi), RegisterOperand(i.n),
+            RegisterOperand(i.m)]
+
+@instr("smlald", MultiplyAccumulateLong, "11111 0111 100 Rn(4)", "RdLo(4) RdHi(4) 110 M Rm(4)", dual=True)
+@instr("smlsld", MultiplyAccumulateLong, "11111 0111 101 Rn(4)", "RdLo(4) RdHi(4) 110 M Rm(4)", dual=True, subtract=True)
+def smlald(i, Rn, RdLo, RdHi, M, Rm):
+    if M == '1':
+        i._mnemonic += "x"
+    i.dLo = RdLo.unsigned
+    i.dHi = RdHi.unsigned
+    i.n = Rn.unsigned
+    i.m = Rm.unsigned
+    i.exchange = (M == '1')
+    _check_long_registers(i)
+
+@instr_operands(smlald)
+def smlald_operands(i):
+    return [RegisterOperand(i.dLo), RegisterOperand(i.dHi), RegisterOperand(i.n),
+            RegisterOperand(i.m)]
 
 # ------------------------------ Address to register instructions ------------------------------
 
 class AddressToRegister(Instruction):
+    __slots__ = ('d', 'add')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(AddressToRegister, self).__init__(mnemonic, word, is32bit)
+        self.d = None
+        self.add = True
+
     def _eval(self, cpu):
         result = (Align(cpu.pc_for_instr, 4) + self.imm32) if self.add else (Align(cpu.pc_for_instr, 4) - self.imm32)
         cpu.r[self.d] = result
         cpu.pc += self.size
 
+    ## @brief Absolute address loaded into the register.
+    @property
+    def target(self):
+        base = Align(self.address + 4, 4)
+        return ((base + self.imm32.unsigned) if self.add else (base - self.imm32.unsigned)) & 0xffffffff
+
 @instr("adr", AddressToRegister, "1010 0 Rd(3) imm8(8)")
 def adr_t1(i, Rd, imm8):
     i.d = Rd.unsigned
     i.imm32 = (imm8 % '00').zero_extend(32)
     i.add = True
-    i.operands = [RegisterOperand(i.d), LabelOperand(i.imm32.unsigned)]
+
+@instr_operands(adr_t1)
+def adr_t1_operands(i):
+    return [RegisterOperand(i.d), LabelOperand(i.imm32.unsigned)]
 
 @instr("adr.w", AddressToRegister, "11110 im 10101 0 1111", "0 imm3(3) Rd(4) imm8(8)", add=False)
 @instr("adr.w", AddressToRegister, "11110 im 10000 0 1111", "0 imm3(3) Rd(4) imm8(8)", add=True)
 def adr_t2(i, im, imm3, Rd, imm8):
     i.d = Rd.unsigned
-    i.imm32 = (im % imm3 % imm8).zero_extend(32)
-    i.operands = [RegisterOperand(i.d), LabelOperand(i.imm32.unsigned)]
+    i.imm32 = concat(im, imm3, imm8).zero_extend(32)
+
+@instr_operands(adr_t2)
+def adr_t2_operands(i):
+    return [RegisterOperand(i.d), LabelOperand(i.imm32.unsigned)]
 
 # ------------------------------ Sign/unsigned extend instructions ------------------------------
 
 class Extend(DataProcessing):
+    __slots__ = ('rotation', 'width', 'signed')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(Extend, self).__init__(mnemonic, word, is32bit)
+        self.rotation = 0
+        self.width = 32
+        self.signed = False
+
     def _eval(self, cpu):
         rotated = ROR(cpu.r[self.m], self.rotation)[0:self.width]
         if self.signed:
@@ -296,7 +905,10 @@ def extend(i, Rm, Rd):
     i.m = Rm.unsigned
     i.d = Rd.unsigned
     i.rotation = 0
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(extend)
+def extend_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("sxth.w", Extend, "11111 010 0 000 1111", "1111 Rd(4) 1 0 rotate(2) Rm(4)", width=16, signed=True)
 @instr("sxtb.w", Extend, "11111 010 0 100 1111", "1111 Rd(4) 1 0 rotate(2) Rm(4)", width=8, signed=True)
@@ -306,13 +918,26 @@ def extend2(i, Rm, rotate, Rd):
     i.m = Rm.unsigned
     i.d = Rd.unsigned
     i.rotation = (0, 8, 16, 24)[rotate.unsigned]
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(extend2)
+def extend2_operands(i):
+    operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
     if i.rotation != 0:
-        i.operands.append(ShiftRotateOperand(SRType.SRType_ROR, i.rotation))
+        operands.append(ShiftRotateOperand(SRType.SRType_ROR, i.rotation))
+    return operands
 
 # ------------------------------ Byte reverse instructions ------------------------------
 
 class ByteReverse(Instruction):
+    __slots__ = ('d', 'm', 'width', 'signed')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(ByteReverse, self).__init__(mnemonic, word, is32bit)
+        self.d = None
+        self.m = None
+        self.width = 4
+        self.signed = False
+
     def _eval(self, cpu):
         result = zeros(32)
         Rm = cpu.r[self.m]
@@ -338,7 +963,10 @@ class ByteReverse(Instruction):
 def rev(i, Rm, Rd):
     i.m = Rm.unsigned
     i.d = Rd.unsigned
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(rev)
+def rev_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("rev.w", ByteReverse,   "11111 010 1 001 Rm1(4)", "1111 Rd(4) 1 000 Rm2(4)", width=4, signed=False)
 @instr("rev16.w", ByteReverse, "11111 010 1 001 Rm1(4)", "1111 Rd(4) 1 001 Rm2(4)", width=2, signed=False)
@@ -348,20 +976,29 @@ def rev(i, Rm1, Rd, Rm2):
         raise UnpredictableError()
     i.m = Rm1.unsigned
     i.d = Rd.unsigned
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(rev)
+def rev_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 # ------------------------------ Move instructions ------------------------------
 
 class Move(DataProcessing):
+    __slots__ = ('negate', 'carry')
+
     def __init__(self, mnemonic, word, is32bit):
         super(Move, self).__init__(mnemonic, word, is32bit)
         self.negate = False
+        self.carry = None
+
+    def _specialize(self):
+        if self.m == 15: # pc
+            self.setflags = SetFlags.Never
+        super(Move, self)._specialize()
 
     def _eval(self, cpu):
-        if hasattr(self, 'm'):
+        if self.m is not None:
             result = cpu.r[self.m]
-            if self.m == 15: # pc
-                self.setflags = SetFlags.Never
         else:
             result = self.imm32
         if self.negate:
@@ -375,14 +1012,20 @@ def mov0(i, D, Rm, Rd):
     i.m = Rm.unsigned
     i.d = (D % Rd).unsigned
     i.setflags = SetFlags.Never
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(mov0)
+def mov0_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("movs", Move, "000 00 00000 Rm(3) Rd(3)")
 def mov0(i, Rm, Rd):
     i.m = Rm.unsigned
     i.d = Rd.unsigned
     i.setflags = SetFlags.Always
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(mov0)
+def mov0_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("mov", Move, "11101 01 0010 S 1111", "0 000 Rd(4) 0000 Rm(4)")
 def mov_reg_t3(i, S, Rd, Rm):
@@ -390,14 +1033,20 @@ def mov_reg_t3(i, S, Rd, Rm):
     i.d = Rd.unsigned
     i.m = Rm.unsigned
     i.setflags = (SetFlags.Never, SetFlags.Always)[S.unsigned]
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(mov_reg_t3)
+def mov_reg_t3_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 @instr("movs", Move, "001 00 Rd(3) imm8(8)")
 def mov1(i, Rd, imm8):
     i.d = Rd.unsigned
     i.setflags = SetFlags.NotInITBlock
     i.imm32 = imm8.zero_extend(32)
-    i.operands = [RegisterOperand(i.d), ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(mov1)
+def mov1_operands(i):
+    return [RegisterOperand(i.d), ImmediateOperand(i.imm32.unsigned)]
 
 # TODO test
 @instr("mov", Move, "11110 im 0 0010 S 1111", "0 imm3(3) Rd(4) imm8(8)")
@@ -405,16 +1054,22 @@ def mov2(i, im, S, imm3, Rd, imm8):
     i._mnemonic += "s.w" if S else ".w"
     i.d = Rd.unsigned
     i.setflags = (SetFlags.Never, SetFlags.Always)[S.unsigned]
-    i.imm32, i.carry = ThumbExpandImm_C(im % imm3 % imm8, bit0) # TODO deal with carry_in
-    i.operands = [RegisterOperand(i.d), ImmediateOperand(i.imm32.unsigned)]
+    i.imm32, i.carry = ThumbExpandImm_C(concat(im, imm3, imm8), bit0) # TODO deal with carry_in
+
+@instr_operands(mov2)
+def mov2_operands(i):
+    return [RegisterOperand(i.d), ImmediateOperand(i.imm32.unsigned)]
 
 # TODO test
 @instr("movw", Move, "11110 im 10 0 1 0 0 imm4(4)", "0 imm3(3) Rd(4) imm8(8)")
 def movw(i, im, imm4, imm3, Rd, imm8):
     i.d = Rd.unsigned
     i.setflags = SetFlags.Never
-    i.imm32 = (imm4 % im % imm3 % imm8).zero_extend(32)
-    i.operands = [RegisterOperand(i.d), ImmediateOperand(i.imm32.unsigned)]
+    i.imm32 = concat(imm4, im, imm3, imm8).zero_extend(32)
+
+@instr_operands(movw)
+def movw_operands(i):
+    return [RegisterOperand(i.d), ImmediateOperand(i.imm32.unsigned)]
 
 # TODO test
 @instr("mvns", Move, "010000 1111 Rm(3) Rd(3)", negate=True)
@@ -422,9 +1077,19 @@ def mvn(i, Rm, Rd):
     i.d = Rd.unsigned
     i.m = Rm.unsigned
     i.setflags = SetFlags.NotInITBlock
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m)]
+
+@instr_operands(mvn)
+def mvn_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m)]
 
 class ShiftedMoveNegate(DataProcessing):
+    __slots__ = ('shift_t', 'shift_n')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(ShiftedMoveNegate, self).__init__(mnemonic, word, is32bit)
+        self.shift_t = SRType.SRType_None
+        self.shift_n = 0
+
     def _eval(self, cpu):
         shifted, carry = Shift_C(cpu.r[i.m], i.shift_t, i.shift_n, cpu.apsr.c)
         result = ~shifted
@@ -440,37 +1105,44 @@ def mvnw(i, S, imm3, Rd, imm2, type, Rm):
     i.m = Rm.unsigned
     i.setflags = (SetFlags.Never, SetFlags.Always)[S.unsigned]
     i.shift_t, i.shift_n = DecodeImmShift(type, imm3 % imm2)
-    i.operands = [RegisterOperand(i.d), RegisterOperand(i.m), ShiftRotateOperand(i.shift_t, i.shift_n)]
+
+@instr_operands(mvnw)
+def mvnw_operands(i):
+    return [RegisterOperand(i.d), RegisterOperand(i.m), ShiftRotateOperand(i.shift_t, i.shift_n)]
 
 # ------------------------------ Compare instructions ------------------------------
 
 class Compare(Instruction):
+    __slots__ = ('negate', 'n', 'm')
+
     def __init__(self, mnemonic, word, is32bit):
         super(Compare, self).__init__(mnemonic, word, is32bit)
         self.negate = True
+        self.n = None
+        self.m = None
 
     def _eval(self, cpu):
-        if hasattr(self, 'm'):
-            shifted = cpu.r[self.m]
+        if self.m is not None:
+            shifted = cpu.r[self.m].unsigned
         else:
-            shifted = self.imm32
+            shifted = self.imm32.unsigned
         if self.negate:
-            shifted = ~shifted
-            carry_in = bit1
+            shifted ^= 0xffffffff
+            carry_in = 1
         else:
-            carry_in = bit0
-        result, carry, overflow = AddWithCarry(cpu.r[self.n], shifted, carry_in)
-        cpu.apsr.n = result[31]
-        cpu.apsr.z = result.is_zero_bit()
-        cpu.apsr.c = carry
-        cpu.apsr.v = overflow
+            carry_in = 0
+        result, carry, overflow = AddWithCarry_int(cpu.r[self.n].unsigned, shifted, carry_in)
+        _update_flags(cpu, result, carry, overflow)
         cpu.pc += self.size
 
 @instr("cmp", Compare, "001 01 Rn(3) imm8(8)")
 def cmp1(i, Rn, imm8):
     i.n = Rn.unsigned
     i.imm32 = imm8.zero_extend(32)
-    i.operands = [RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(cmp1)
+def cmp1_operands(i):
+    return [RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
 
 # TODO test
 @instr("cmp", Compare, "010000 1010 Rm(3) Rn(3)")
@@ -478,26 +1150,44 @@ def cmp1(i, Rn, imm8):
 def cmp3(i, Rm, Rn):
     i.n = Rn.unsigned
     i.m = Rn.unsigned
-    i.operands = [RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(cmp3)
+def cmp3_operands(i):
+    return [RegisterOperand(i.n), RegisterOperand(i.m)]
 
 # TODO test
 @instr("cmp", Compare, "010001 01 N Rm(4) Rn(3)")
 def cmp4(i, N, Rm, Rn):
     i.n = (N % Rn).unsigned
     i.m = Rn.unsigned
-    i.operands = [RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(cmp4)
+def cmp4_operands(i):
+    return [RegisterOperand(i.n), RegisterOperand(i.m)]
 
 # TODO test
 @instr("cmp.w", Compare, "11110 im 0 1101 1 Rn(4)", "0 imm3(3) 1111 imm8(8)")
 @instr("cmn", Compare,   "11110 im 0 1000 1 Rn(4)", "0 imm3(3) 1111 imm8(8)", negate=False)
 def cmp2(i, im, Rn, imm3, imm8):
     i.n = Rn.unsigned
-    i.imm32 = ThumbExpandImm(im % imm3 % imm8)
-    i.operands = [RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
+    i.imm32 = ThumbExpandImm(concat(im, imm3, imm8))
+
+@instr_operands(cmp2)
+def cmp2_operands(i):
+    return [RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned)]
 
 # ------------------------------ Test instructions ------------------------------
 
 class Test(Instruction):
+    __slots__ = ('n', 'm', 'shift_t', 'shift_n')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(Test, self).__init__(mnemonic, word, is32bit)
+        self.n = None
+        self.m = None
+        self.shift_t = SRType.SRType_None
+        self.shift_n = 0
+
     def _eval(self, cpu):
         shifted, carry = Shift_C(cpu.r[self.m], self.shift_t, self.shift_n, cpu.apsr.c)
         result = cpu.r[self.n] & shifted
@@ -512,7 +1202,10 @@ def tst(i, Rm, Rn):
     i.m = Rm.unsigned
     i.shift_t = SRType.SRType_None
     i.shift_n = 0
-    i.operands = [RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(tst)
+def tst_operands(i):
+    return [RegisterOperand(i.n), RegisterOperand(i.m)]
 
 @instr("tst.w", Test, "11101 01 0000 1 Rn(4)", "0 imm3(3) 1111 imm2(2) type(2) Rm(4)")
 def tst_w(i, Rn, imm3, imm2, type, Rm):
@@ -521,48 +1214,72 @@ def tst_w(i, Rn, imm3, imm2, type, Rm):
     i.shift_t, i.shift_n = DecodeImmShift(type, imm3 % imm2)
     if i.n in (13, 15) or i.m in (13, 15):
         raise UnpredictableError()
-    i.operands = [RegisterOperand(i.n), RegisterOperand(i.m)]
+
+@instr_operands(tst_w)
+def tst_w_operands(i):
+    operands = [RegisterOperand(i.n), RegisterOperand(i.m)]
     if i.shift_n != 0:
-        i.operands.append(ShiftRotateOperand(i.shift_t, i.shift_n))
+        operands.append(ShiftRotateOperand(i.shift_t, i.shift_n))
+    return operands
 
 # ------------------------------ Branch instructions ------------------------------
 
-ConditionInfo = namedtuple('ConditionInfo', 'mnemonic expr')
+##
+# @brief Mnemonic suffix and test of a condition code.
+#
+# @c expr takes an object with n, z, c and v attributes, such as CpuModel.apsr. @c passed
+# holds the result of @c expr for each value of the NZCV flags, indexed by the flags as a
+# 4-bit integer with N in bit 3.
+ConditionInfo = namedtuple('ConditionInfo', 'mnemonic expr passed')
+
+_Flags = namedtuple('_Flags', 'n z c v')
+
+def _condition(mnemonic, expr):
+    passed = tuple(bool(expr(_Flags((nzcv >> 3) & 1, (nzcv >> 2) & 1, (nzcv >> 1) & 1, nzcv & 1)))
+                    for nzcv in range(16))
+    return ConditionInfo(mnemonic, expr, passed)
 
 CONDITIONS = {
-    0b0000 : ConditionInfo('eq', lambda apsr: apsr.z == 1), # Equal
-    0b0001 : ConditionInfo('ne', lambda apsr: apsr.z == 0), # Not equal
-    0b0010 : ConditionInfo('cs', lambda apsr: apsr.c == 1), # Carry set
-    0b0011 : ConditionInfo('cc', lambda apsr: apsr.c == 0), # Carry clear
-    0b0100 : ConditionInfo('mi', lambda apsr: apsr.n == 1), # Minus, negative
-    0b0101 : ConditionInfo('pl', lambda apsr: apsr.n == 0), # Plus, positive or zero
-    0b0110 : ConditionInfo('vs', lambda apsr: apsr.v == 1), # Overflow
-    0b0111 : ConditionInfo('vc', lambda apsr: apsr.v == 0), # No overflow
-    0b1000 : ConditionInfo('hi', lambda apsr: apsr.c == 1 and apsr.z == 0), # Unsigned higher
-    0b1001 : ConditionInfo('ls', lambda apsr: apsr.c == 0 or apsr.z == 1), # Unsigned lower or same
-    0b1010 : ConditionInfo('ge', lambda apsr: apsr.n == apsr.v), # Signed greater than or equal
-    0b1011 : ConditionInfo('lt', lambda apsr: apsr.n != apsr.v), # Signed less than
-    0b1100 : ConditionInfo('gt', lambda apsr: apsr.z == 0 and apsr.n == apsr.v), # Signed greater than
-    0b1101 : ConditionInfo('le', lambda apsr: apsr.z == 1 or apsr.n != apsr.v), # Signed less than or equal
-    0b1110 : ConditionInfo('', lambda apsr: True),   # never encoded
-    0b1111 : ConditionInfo('', lambda apsr: True),   # always (al)
+    0b0000 : _condition('eq', lambda apsr: apsr.z == 1), # Equal
+    0b0001 : _condition('ne', lambda apsr: apsr.z == 0), # Not equal
+    0b0010 : _condition('cs', lambda apsr: apsr.c == 1), # Carry set
+    0b0011 : _condition('cc', lambda apsr: apsr.c == 0), # Carry clear
+    0b0100 : _condition('mi', lambda apsr: apsr.n == 1), # Minus, negative
+    0b0101 : _condition('pl', lambda apsr: apsr.n == 0), # Plus, positive or zero
+    0b0110 : _condition('vs', lambda apsr: apsr.v == 1), # Overflow
+    0b0111 : _condition('vc', lambda apsr: apsr.v == 0), # No overflow
+    0b1000 : _condition('hi', lambda apsr: apsr.c == 1 and apsr.z == 0), # Unsigned higher
+    0b1001 : _condition('ls', lambda apsr: apsr.c == 0 or apsr.z == 1), # Unsigned lower or same
+    0b1010 : _condition('ge', lambda apsr: apsr.n == apsr.v), # Signed greater than or equal
+    0b1011 : _condition('lt', lambda apsr: apsr.n != apsr.v), # Signed less than
+    0b1100 : _condition('gt', lambda apsr: apsr.z == 0 and apsr.n == apsr.v), # Signed greater than
+    0b1101 : _condition('le', lambda apsr: apsr.z == 1 or apsr.n != apsr.v), # Signed less than or equal
+    0b1110 : _condition('', lambda apsr: True),   # never encoded
+    0b1111 : _condition('', lambda apsr: True),   # always (al)
     }
 
+## @brief Whether each condition passes, indexed by condition code and then NZCV flags.
+CONDITION_PASSED = [CONDITIONS[cond].passed for cond in range(16)]
+
 class Branch(Instruction):
+    __slots__ = ('with_link', 'cond', 'pc_delta', 'm')
+
     def __init__(self, mnemonic, word, is32bit):
         super(Branch, self).__init__(mnemonic, word, is32bit)
         self.with_link = False
         self.cond = CONDITIONS[0b1111]
         self.pc_delta = 0
+        self.m = None
 
     def _eval(self, cpu):
         # TODO deal with pc + 4
-        if self.cond.expr(cpu.apsr):
+        # The NZCV flags are the top 4 bits of xPSR.
+        if self.cond.passed[cpu.xpsr.unsigned >> 28]:
             next_instr = cpu.pc_for_instr + self.pc_delta
             if self.with_link:
                 cpu.lr = next_instr | 1
 
-            if hasattr(self, 'm'):
+            if self.m is not None:
                 # Branch to register
                 target = bitstring(cpu.r[self.m])
                 target[0] = 0 # clear T bit
@@ -573,27 +1290,47 @@ class Branch(Instruction):
         else:
             cpu.pc += self.size
 
+    @property
+    def is_conditional(self):
+        return self.cond is not CONDITIONS[0b1111]
+
+    ## @brief Absolute address of the branch target, or None for branches to a register.
+    @property
+    def target(self):
+        if self.m is not None:
+            return None
+        return (self.address + 4 + self.imm32.signed) & 0xffffffff
+
 @instr("b", Branch, "1101 cond(4) imm8(8)")
 def b_t1(i, cond, imm8):
     i.cond = CONDITIONS[cond.unsigned]
     i._mnemonic = 'b' + CONDITIONS[cond.unsigned].mnemonic
     i.imm32 = (imm8 % '0').sign_extend(32)
-    i.operands = [LabelOperand(i.imm32.signed)]
+
+@instr_operands(b_t1)
+def b_t1_operands(i):
+    return [LabelOperand(i.imm32.signed)]
 
 # TODO test me
 @instr("b", Branch, "11100 imm11(11)")
 def b_t2(i, imm11):
 #     i.cond = bitstring('1111')
     i.imm32 = (imm11 % '0').sign_extend(32)
-    i.operands = [LabelOperand(i.imm32.signed)]
+
+@instr_operands(b_t2)
+def b_t2_operands(i):
+    return [LabelOperand(i.imm32.signed)]
 
 @instr("bl", Branch, "11110 S imm10(10)", "11 J1 1 J2 imm11(11)")
 def bl_t1(i, S, imm10, J1, J2, imm11):
     I1 = ~(J1 ^ S)
     I2 = ~(J2 ^ S)
-    i.imm32 = (S % I1 % I2 % imm10 % imm11 % '0').sign_extend(32)
+    i.imm32 = concat(S, I1, I2, imm10, imm11, '0').sign_extend(32)
     i.with_link = True
-    i.operands = [LabelOperand(i.imm32.signed)]
+
+@instr_operands(bl_t1)
+def bl_t1_operands(i):
+    return [LabelOperand(i.imm32.signed)]
 
 @instr("blx", Branch, "010001 11 1 Rm(4) 000")
 def blx_t1(i, Rm):
@@ -601,53 +1338,100 @@ def blx_t1(i, Rm):
     # if m == 15 then UNPREDICTABLE;
     i.with_link = True
     i.pc_delta = -2
-    i.operands = [RegisterOperand(i.m)]
+
+@instr_operands(blx_t1)
+def blx_t1_operands(i):
+    return [RegisterOperand(i.m)]
 
 @instr("bx", Branch, "010001 11 0 Rm(4) 000")
 def bx_t1(i, Rm):
     i.m = Rm.unsigned
-    i.operands = [RegisterOperand(i.m)]
+
+@instr_operands(bx_t1)
+def bx_t1_operands(i):
+    return [RegisterOperand(i.m)]
 
 # ------------------------------ Load instructions ------------------------------
 
+def _offset(immediate):
+    if immediate:
+        return lambda self, cpu: self.imm32
+    else:
+        return lambda self, cpu: Shift(cpu.r[self.m], self.shift_t, self.shift_n, cpu.apsr.c)
+
+def _load_evaluator(immediate, add, index, wback, signed):
+    offset = _offset(immediate)
+    def _eval(self, cpu):
+        base = cpu.r[self.n]
+        offset_addr = (base + offset(self, cpu)) if add else (base - offset(self, cpu))
+        data = cpu.read_memory(offset_addr if index else base, self.memsize)
+        if wback:
+            cpu.r[self.n] = offset_addr
+        cpu.r[self.t] = data.sign_extend(32) if signed else data.zero_extend(32)
+        cpu.pc += self.size
+    return _eval
+
+def _store_evaluator(immediate, add, index):
+    offset = _offset(immediate)
+    def _eval(self, cpu):
+        base = cpu.r[self.n]
+        if index:
+            address = (base + offset(self, cpu)) if add else (base - offset(self, cpu))
+        else:
+            address = base
+        cpu.write_memory(address, cpu.r[self.t][0:self.memsize], self.memsize)
+        cpu.pc += self.size
+    return _eval
+
 class Load(Instruction):
+    __slots__ = ('memsize', 'signed', 't', 'n', 'm', 'index', 'add', 'wback',
+                'shift_t', 'shift_n', '_evaluator')
+
     def __init__(self, mnemonic, word, is32bit):
         super(Load, self).__init__(mnemonic, word, is32bit)
         self.memsize = 32
         self.signed = False
+        self.t = None
+        self.n = None
+        self.m = None
+        self.index = True
+        self.add = True
+        self.wback = False
+        self.shift_t = SRType.SRType_None
+        self.shift_n = 0
+        self._evaluator = None
+
+    def _specialize(self):
+        self._evaluator = _evaluator(_load_evaluator, self.imm32 is not None, self.add,
+                            self.index, self.wback, self.signed)
 
     def _eval(self, cpu):
-        if hasattr(self, 'imm32'):
-            offset = self.imm32
-        else:
-            offset = Shift(cpu.r[self.m], self.shift_t, self.shift_n, cpu.apsr.c)
-        offset_addr = (cpu.r[self.n] + offset) if self.add else (cpu.r[self.n] - offset)
-        address = offset_addr if self.index else cpu.r[self.n]
-        data = cpu.read_memory(address, self.memsize)
-        if self.wback:
-            cpu.r[self.n] = offset_addr
-        if self.signed:
-            data = data.sign_extend(32)
-        else:
-            data = data.zero_extend(32)
-        cpu.r[self.t] = data
-        cpu.pc += self.size
+        self._evaluator(self, cpu)
 
 class Store(Instruction):
+    __slots__ = ('memsize', 'signed', 't', 'n', 'm', 'index', 'add', 'wback',
+                'shift_t', 'shift_n', '_evaluator')
+
     def __init__(self, mnemonic, word, is32bit):
         super(Store, self).__init__(mnemonic, word, is32bit)
         self.memsize = 32
         self.signed = False
+        self.t = None
+        self.n = None
+        self.m = None
+        self.index = True
+        self.add = True
+        self.wback = False
+        self.shift_t = SRType.SRType_None
+        self.shift_n = 0
+        self._evaluator = None
+
+    def _specialize(self):
+        self._evaluator = _evaluator(_store_evaluator, self.imm32 is not None, self.add,
+                            self.index)
 
     def _eval(self, cpu):
-        if hasattr(self, 'imm32'):
-            offset = self.imm32
-        else:
-            offset = Shift(cpu.r[self.m], self.shift_t, self.shift_n, cpu.apsr.c)
-        offset_addr = (cpu.r[self.n] + offset) if self.add else (cpu.r[self.n] - offset)
-        address = offset_addr if self.index else cpu.r[self.n]
-        cpu.write_memory(address, cpu.r[self.t][0:self.memsize], self.memsize)
-        cpu.pc += self.size
+        self._evaluator(self, cpu)
 
 @instr("str", Store,  "0101 000 Rm(3) Rn(3) Rt(3)", memsize=32)
 @instr("strh", Store, "0101 001 Rm(3) Rn(3) Rt(3)", memsize=16)
@@ -666,7 +1450,10 @@ def ldr_str_reg(i, Rm, Rn, Rt):
     i.wback = False
     i.shift_t = SRType.SRType_None
     i.shift_n = 0
-    i.operands = [RegisterOperand(i.t), MemoryAccessOperand(RegisterOperand(i.n), RegisterOperand(i.m))]
+
+@instr_operands(ldr_str_reg)
+def ldr_str_reg_operands(i):
+    return [RegisterOperand(i.t), MemoryAccessOperand(RegisterOperand(i.n), RegisterOperand(i.m))]
 
 @instr("ldrb.w", Load,  "11111 00 0 0 00 1 Rn(4)", "Rt(4) 0 00000 imm2(2) Rm(4)", memsize=8)
 @instr("ldrh.w", Load,  "11111 00 0 0 01 1 Rn(4)", "Rt(4) 0 00000 imm2(2) Rm(4)", memsize=16)
@@ -687,7 +1474,10 @@ def ldr_str_reg_t2(i, Rn, Rt, imm2, Rm):
     i.wback = False
     i.shift_t = SRType.SRType_LSL
     i.shift_n = imm2.unsigned
-    i.operands = [RegisterOperand(i.t), MemoryAccessOperand(
+
+@instr_operands(ldr_str_reg_t2)
+def ldr_str_reg_t2_operands(i):
+    return [RegisterOperand(i.t), MemoryAccessOperand(
         RegisterOperand(i.n), RegisterOperand(i.m), ShiftRotateOperand(i.shift_t, i.shift_n))]
 
 @instr("str", Store,  "011 0 0 imm5(5) Rn(3) Rt(3)", memsize=32)
@@ -707,13 +1497,23 @@ def ldr_str_imm(i, imm5, Rn, Rt):
     i.index = True
     i.add = True
     i.wback = False
-    i.operands = [RegisterOperand(i.t), MemoryAccessOperand(
+
+@instr_operands(ldr_str_imm)
+def ldr_str_imm_operands(i):
+    return [RegisterOperand(i.t), MemoryAccessOperand(
         RegisterOperand(i.n), ImmediateOperand(i.imm32.unsigned, hideIfZero=True))]
 
 class LoadLiteral(Load):
-    def __init__(self, mnemonic, word, is32bit):
-        super(LoadLiteral, self).__init__(mnemonic, word, is32bit)
-        self.add = True
+    __slots__ = ()
+
+    def _specialize(self):
+        pass
+
+    ## @brief Absolute address of the literal.
+    @property
+    def target(self):
+        base = Align(self.address + 4, 4)
+        return ((base + self.imm32.unsigned) if self.add else (base - self.imm32.unsigned)) & 0xffffffff
 
     def _eval(self, cpu):
         base = Align(cpu.pc_for_instr, 4)
@@ -730,8 +1530,10 @@ class LoadLiteral(Load):
 def ldr_literal(i, Rt, imm8):
     i.t = Rt.unsigned
     i.imm32 = (imm8 % '00').zero_extend(32)
-    i.operands = [RegisterOperand(i.t), MemoryAccessOperand(
-        RegisterOperand(15), ImmediateOperand(i.imm32.unsigned))] # TODO label operand?
+
+@instr_operands(ldr_literal)
+def ldr_literal_operands(i):
+    return [RegisterOperand(i.t), LiteralOperand(i.imm32.unsigned)]
 
 @instr("ldr.w", LoadLiteral,   "11111 00 0 U 10 1 1111", "Rt(4) imm12(12)", memsize=32)
 @instr("ldrh.w", LoadLiteral,  "11111 00 0 U 01 1 1111", "Rt(4) imm12(12)", memsize=16)
@@ -744,9 +1546,11 @@ def ldr_literal(i, U, Rt, imm12):
         raise DecodeError()
     i.imm32 = imm12.zero_extend(32)
     i.add = (U == '1')
-    i.operands = [RegisterOperand(i.t), MemoryAccessOperand(
-        RegisterOperand(15), ImmediateOperand(
-        i.imm32.unsigned if i.add else -i.imm32.unsigned, hideIfZero=True))] # TODO label operand?
+
+@instr_operands(ldr_literal)
+def ldr_literal_operands(i):
+    return [RegisterOperand(i.t), LiteralOperand(
+        i.imm32.unsigned if i.add else -i.imm32.unsigned, hideIfZero=True)]
 
 @instr("str", Store, "1001 0 Rt(3) imm8(8)", memsize=32)
 @instr("ldr", Load,  "1001 1 Rt(3) imm8(8)", memsize=32)
@@ -757,12 +1561,22 @@ def ldr_str_imm_t2(i, Rt, imm8):
     i.index = True
     i.add = True
     i.wback = False
-    i.operands = [RegisterOperand(i.t), MemoryAccessOperand(
+
+@instr_operands(ldr_str_imm_t2)
+def ldr_str_imm_t2_operands(i):
+    return [RegisterOperand(i.t), MemoryAccessOperand(
         RegisterOperand(13), ImmediateOperand(i.imm32.unsigned, hideIfZero=True))]
 
 # ------------------------------ Push/pop instructions ------------------------------
 
 class Push(Instruction):
+    __slots__ = ('registers', 'unaligned_allowed')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(Push, self).__init__(mnemonic, word, is32bit)
+        self.registers = None
+        self.unaligned_allowed = False
+
     def _eval(self, cpu):
         address = cpu.sp - (4 * self.registers.bit_count())
         cpu.sp = address
@@ -773,6 +1587,16 @@ class Push(Instruction):
         cpu.pc += self.size
 
 class Pop(Instruction):
+    __slots__ = ('registers',)
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(Pop, self).__init__(mnemonic, word, is32bit)
+        self.registers = None
+
+    @property
+    def writes_pc(self):
+        return self.registers.get_bit_value(15) == 1
+
     def _eval(self, cpu):
         address = cpu.sp
         cpu.sp += 4 * self.registers.bit_count()
@@ -787,19 +1611,25 @@ class Pop(Instruction):
 
 @instr("push", Push, "1011 0 10 M reglist(8)")
 def push_t1(i, M, reglist):
-    i.registers = bit0 % M % '000000' % reglist
+    i.registers = concat(bit0, M, '000000', reglist)
     i.unaligned_allowed = False
     if i.registers.bit_count() == 0:
         raise UnpredictableError()
-    i.operands = [ReglistOperand(i.registers)]
+
+@instr_operands(push_t1)
+def push_t1_operands(i):
+    return [ReglistOperand(i.registers)]
 
 @instr("push.w", Push, "11101 00 100 1 0 1101", "0 M 0 reglist(13)")
 def push_t2(i, M, reglist):
-    i.registers = bit0 % M % bit0 % reglsit
+    i.registers = concat(bit0, M, bit0, reglist)
     i.unaligned_allowed = False
     if i.registers.bit_count() == 0:
         raise UnpredictableError()
-    i.operands = [ReglistOperand(i.registers)]
+
+@instr_operands(push_t2)
+def push_t2_operands(i):
+    return [ReglistOperand(i.registers)]
 
 @instr("push.w", Push, "11111 00 0 0 10 0 1101", "Rt(4) 1 101 00000100")
 def push_t3(i, Rt):
@@ -808,31 +1638,55 @@ def push_t3(i, Rt):
     i.unaligned_allowed = True
     if Rt.unsigned in (13, 15):
         raise UnpredictableError()
-    i.operands = [ReglistOperand(i.registers)]
+
+@instr_operands(push_t3)
+def push_t3_operands(i):
+    return [ReglistOperand(i.registers)]
 
 @instr("pop", Pop, "1011 1 10 P reglist(8)")
 def pop_t1(i, P, reglist):
-    i.registers = P % '0000000' % reglist
+    i.registers = concat(P, '0000000', reglist)
     if i.registers.bit_count() == 0:
         raise UnpredictableError()
-    i.operands = [ReglistOperand(i.registers)]
+
+@instr_operands(pop_t1)
+def pop_t1_operands(i):
+    return [ReglistOperand(i.registers)]
 
 @instr("pop.w", Pop, "11101 00 010 1 1 1101", "P M 0 reglist(13)")
 def pop_t2(i, P, M, reglist):
-    i.registers = P % M % '0' % reglist
+    i.registers = concat(P, M, '0', reglist)
     if i.registers.bit_count() < 2 or (P == '1' and M == '1'):
         raise UnpredictableError()
-    i.operands = [ReglistOperand(i.registers)]
+
+@instr_operands(pop_t2)
+def pop_t2_operands(i):
+    return [ReglistOperand(i.registers)]
 
 @instr("pop.w", Pop, "11111 00 0 0 10 1 1101", "Rt(4) 1 011 00000100")
 def pop_t3(i, Rt):
     i.registers = zeros(16)
     i.registers[Rt.unsigned] = 1
-    i.operands = [ReglistOperand(i.registers)]
+
+@instr_operands(pop_t3)
+def pop_t3_operands(i):
+    return [ReglistOperand(i.registers)]
 
 # ------------------------------ Load/store multiple instructions ------------------------------
 
 class LoadMultiple(Instruction):
+    __slots__ = ('n', 'registers', 'wback')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(LoadMultiple, self).__init__(mnemonic, word, is32bit)
+        self.n = None
+        self.registers = None
+        self.wback = False
+
+    @property
+    def writes_pc(self):
+        return self.registers.get_bit_value(15) == 1
+
     def _eval(self, cpu):
         address = cpu.r[self.n]
         for i in range(15):
@@ -847,6 +1701,14 @@ class LoadMultiple(Instruction):
             cpu.r[self.n] += 4 * self.registers.bit_count()
 
 class StoreMultiple(Instruction):
+    __slots__ = ('n', 'registers', 'wback')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(StoreMultiple, self).__init__(mnemonic, word, is32bit)
+        self.n = None
+        self.registers = None
+        self.wback = False
+
     def _eval(self, cpu):
         address = cpu.r[self.n]
         for i in range(15):
@@ -864,39 +1726,56 @@ class StoreMultiple(Instruction):
 @instr("ldm", LoadMultiple,  "1100 1 Rn(3) reglist(8)")
 def stm_ldm_t1(i, Rn, reglist):
     i.n = Rn.unsigned
-    i.registers = bitstring('00000000') % reglist
+    i.registers = concat('00000000', reglist)
     i.wback = (i._mnemonic == "stm") or (i.registers[i.n] == '0')
     if i.registers.bit_count() < 1:
         raise UnpredictableError()
-    i.operands = [RegisterOperand(i.n, wback=i.wback), ReglistOperand(i.registers)]
+
+@instr_operands(stm_ldm_t1)
+def stm_ldm_t1_operands(i):
+    return [RegisterOperand(i.n, wback=i.wback), ReglistOperand(i.registers)]
 
 @instr("stm.w", StoreMultiple, "11101 00 010 W 0 Rn(4)", "0 M 0 reglist(13)")
 def stm_t2(i, W, Rn, M, reglist):
     i.n = Rn.unsigned
-    i.registers = bit0 % M % bit0 % reglist
+    i.registers = concat(bit0, M, bit0, reglist)
     i.wback = (W == '1')
     if i.n == 15 or i.registers.bit_count() < 2:
         raise UnpredictableError()
     if i.wback and i.registers[i.n] == '1':
         raise UnpredictableError()
-    i.operands = [RegisterOperand(i.n, wback=i.wback), ReglistOperand(i.registers)]
+
+@instr_operands(stm_t2)
+def stm_t2_operands(i):
+    return [RegisterOperand(i.n, wback=i.wback), ReglistOperand(i.registers)]
 
 @instr("ldm.w", LoadMultiple,  "11101 00 010 W 1 Rn(4)", "P M 0 reglist(13)")
 def ldm_t2(i, W, Rn, P, M, reglist):
     if (W == '1') and (Rn == '1101'):
         raise DecodeError() # See POP (Thumb)
     i.n = Rn.unsigned
-    i.registers = P % M % '0' % reglist
+    i.registers = concat(P, M, '0', reglist)
     i.wback = (W == '1')
     if (i.n == 15) or (i.registers.bit_count() < 2) or (P == '1' and M == '1'):
         raise UnpredictableError()
     if i.wback and i.registers[i.n] == '1':
         raise UnpredictableError()
-    i.operands = [RegisterOperand(i.n, wback=i.wback), ReglistOperand(i.registers)]
+
+@instr_operands(ldm_t2)
+def ldm_t2_operands(i):
+    return [RegisterOperand(i.n, wback=i.wback), ReglistOperand(i.registers)]
 
 # ------------------------------ System instructions ------------------------------
 
 class ChangeProcessorState(Instruction):
+    __slots__ = ('enable', 'affectPri', 'affectFault')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(ChangeProcessorState, self).__init__(mnemonic, word, is32bit)
+        self.enable = False
+        self.affectPri = False
+        self.affectFault = False
+
     def _eval(self, cpu):
         # TODO if privileged
         if self.enable:
@@ -919,16 +1798,29 @@ def cps(i, im, I, F):
     i._mnemonic += 'ie' if i.enable else 'id'
     i.affectPri = (I == '1')
     i.affectFault = (F == '1')
-    i.operands = [CpsOperand(i.affectPri, i.affectFault)]
+
+@instr_operands(cps)
+def cps_operands(i):
+    return [CpsOperand(i.affectPri, i.affectFault)]
 
 @instr("bkpt", Instruction, "1011 1110 imm8(8)")
 def bkpt(i, imm8):
     i.imm32 = imm8.zero_extend(32)
-    i.operands = [ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(bkpt)
+def bkpt_operands(i):
+    return [ImmediateOperand(i.imm32.unsigned)]
 
 # ------------------------------ Move to/from special register instructions --------------------
 
 class MoveFromSpecial(Instruction):
+    __slots__ = ('d', 'SYSm')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(MoveFromSpecial, self).__init__(mnemonic, word, is32bit)
+        self.d = None
+        self.SYSm = None
+
     def _eval(self, cpu):
         r = zeros(32)
         if self.SYSm[3:8] == '00000': # xPSR access
@@ -963,6 +1855,14 @@ class MoveFromSpecial(Instruction):
         cpu.pc += self.size
 
 class MoveToSpecial(Instruction):
+    __slots__ = ('n', 'SYSm', 'mask')
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(MoveToSpecial, self).__init__(mnemonic, word, is32bit)
+        self.n = None
+        self.SYSm = None
+        self.mask = None
+
     def _eval(self, cpu):
         cpu.pc += self.size
 
@@ -972,7 +1872,10 @@ def mrs(i, Rd, SYSm):
     i.SYSm = SYSm
     if (i.d in (13, 15)) or not (SYSm.unsigned in (0,1,2,3,5,6,7,8,9,16,17,18,19,20)):
         raise UnpredictableError()
-    i.operands = [RegisterOperand(i.d), SpecialRegisterOperand(SYSm)]
+
+@instr_operands(mrs)
+def mrs_operands(i):
+    return [RegisterOperand(i.d), SpecialRegisterOperand(i.SYSm)]
 
 @instr("msr", MoveToSpecial, "11110 0 1110 0 0 Rn(4)", "10 0 0 mask(2) 0 0 SYSm(8)")
 def msr(i, Rn, mask, SYSm):
@@ -983,7 +1886,10 @@ def msr(i, Rn, mask, SYSm):
         raise UnpredictableError()
     if (i.n in (13, 15)) or not (SYSm.unsigned in (0,1,2,3,5,6,7,8,9,16,17,18,19,20)):
         raise UnpredictableError()
-    i.operands = [SpecialRegisterOperand(SYSm, mask), RegisterOperand(i.n)]
+
+@instr_operands(msr)
+def msr_operands(i):
+    return [SpecialRegisterOperand(i.SYSm, i.mask), RegisterOperand(i.n)]
 
 # ------------------------------ Nop-compatible hint instructions ------------------------------
 
@@ -997,11 +1903,22 @@ def nop(i):
 
 # ------------------------------ Barrier instructions ------------------------------
 
-@instr("dsb", Instruction, "11110 0 111 01 1 1111", "10 0 0 1111 0100 option(4)")
-@instr("dmb", Instruction, "11110 0 111 01 1 1111", "10 0 0 1111 0101 option(4)")
-@instr("isb", Instruction, "11110 0 111 01 1 1111", "10 0 0 1111 0110 option(4)")
+class Barrier(Instruction):
+    __slots__ = ('option',)
+
+    def __init__(self, mnemonic, word, is32bit):
+        super(Barrier, self).__init__(mnemonic, word, is32bit)
+        self.option = None
+
+@instr("dsb", Barrier, "11110 0 111 01 1 1111", "10 0 0 1111 0100 option(4)")
+@instr("dmb", Barrier, "11110 0 111 01 1 1111", "10 0 0 1111 0101 option(4)")
+@instr("isb", Barrier, "11110 0 111 01 1 1111", "10 0 0 1111 0110 option(4)")
 def barrier(i, option):
-    i.operands = [BarrierOperand(option.unsigned)]
+    i.option = option.unsigned
+
+@instr_operands(barrier)
+def barrier_operands(i):
+    return [BarrierOperand(i.option)]
 
 # ------------------------------ Misc instructions ------------------------------
 
@@ -1010,9 +1927,15 @@ def barrier(i, option):
 @instr("svc", Instruction, "1101 1111 imm8(8)")
 def udf_t1(i, imm8):
     i.imm32 = imm8.zero_extend(32)
-    i.operands = [ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(udf_t1)
+def udf_t1_operands(i):
+    return [ImmediateOperand(i.imm32.unsigned)]
 
 @instr("udf.w", Instruction, "111 10 1111111 imm4(4)", "1 010 imm12(12)")
 def udf_t2(i, imm4, imm12):
     i.imm32 = (imm4 % imm12).zero_extend(32)
-    i.operands = [ImmediateOperand(i.imm32.unsigned)]
+
+@instr_operands(udf_t2)
+def udf_t2_operands(i):
+    return [ImmediateOperand(i.imm32.unsigned)]
@@ -64,6 +64,10 @@ class MockCpuModelDelegate(CpuModelDelegate):
                 return m, addr - m.start
         return None, 0
 
+    def is_memory_mapped(self, addr, size):
+        mem, offset = self._find_mem(addr)
+        return mem is not None and addr + size - 1 <= mem.end
+
     def read_memory(self, addr, size=32):
         mem, offset = self._find_mem(addr)
         if mem:
@@ -21,7 +21,7 @@ import logging
 
 from .registers import register_name_to_index
 from .utilities import (bfi, bfx)
-from .bitstring import bitstring
+from .bitstring import (bitstring, word32)
 
 class RegistersInterface(object):
     def __init__(self, cpu, first, last):
@@ -46,6 +46,8 @@ class ApsrAlias(object):
     Z_BIT = 30
     C_BIT = 29
     V_BIT = 28
+    Q_BIT = 27
+    GE_BITS = slice(16, 20)
 
     def __init__(self, cpu):
         self._cpu = cpu
@@ -90,6 +92,27 @@ class ApsrAlias(object):
         v[self.V_BIT] = bitstring(value, 1)
         self._cpu.xpsr = v
 
+    @property
+    def q(self):
+        return self._cpu.xpsr[self.Q_BIT]
+
+    @q.setter
+    def q(self, value):
+        v = self._cpu.xpsr
+        v[self.Q_BIT] = bitstring(value, 1)
+        self._cpu.xpsr = v
+
+    ## @brief The 4 GE flags set by the parallel add and subtract instructions.
+    @property
+    def ge(self):
+        return self._cpu.xpsr[self.GE_BITS]
+
+    @ge.setter
+    def ge(self, value):
+        v = self._cpu.xpsr
+        v[self.GE_BITS] = bitstring(value, 4)
+        self._cpu.xpsr = v
+
 class CpuMode(Enum):
     Thread = 0
     Handler = 1
@@ -97,7 +120,8 @@ class CpuMode(Enum):
 ##
 # @brief
 #
-# All register and integer values are passed as bitstrings.
+# All register and integer values are passed as bitstrings. Registers and 32-bit memory
+# reads return word32 values.
 #
 # TODO handle CPU features better
 class CpuModel(object):
@@ -111,10 +135,19 @@ class CpuModel(object):
         self._float_registers_interface = RegistersInterface(self, 0x40, 0x5f)
         self._apsr = ApsrAlias(self)
         self._mode = CpuMode.Thread
+        self._has_dsp_ext = False
 
+    ## @brief Whether the DSP extension instructions are implemented.
+    #
+    # False by default. Executing a DSP instruction without the extension raises
+    # UndefinedInstructionError.
     @property
     def has_dsp_ext(self):
-        return False
+        return self._has_dsp_ext
+
+    @has_dsp_ext.setter
+    def has_dsp_ext(self, value):
+        self._has_dsp_ext = value
 
     @property
     def has_fp_ext(self):
@@ -225,7 +258,7 @@ class CpuModel(object):
     def read_register(self, reg):
         reg = register_name_to_index(reg)
         if self._delegate is not None:
-            return bitstring(self._delegate.read_register(reg))
+            return word32(self._delegate.read_register(reg))
 
     def write_register(self, reg, value):
         reg = register_name_to_index(reg)
@@ -238,7 +271,8 @@ class CpuModel(object):
         if isinstance(addr, bitstring):
             addr = addr.unsigned
         if self._delegate is not None:
-            return bitstring(self._delegate.read_memory(addr, size), size)
+            value = self._delegate.read_memory(addr, size)
+            return word32(value) if size == 32 else bitstring(value, size)
 
     def write_memory(self, addr, value, size=32):
         if isinstance(addr, bitstring):
@@ -307,4 +341,10 @@ class CpuModelDelegate(object):
     def write_memory(self, addr, value, size=32):
         pass
 
+    ## @brief Whether @a size bytes starting at @a addr are backed by memory.
+    #
+    # Delegates that can't tell return True.
+    def is_memory_mapped(self, addr, size):
+        return True
+
 
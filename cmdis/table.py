@@ -0,0 +1,210 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from bisect import (bisect_left, bisect_right)
+from collections import namedtuple
+
+import six
+
+from .decoder import DECODER_TREE
+from .instructions import CONDITIONS
+
+## @brief Value of the condition and register columns for missing fields.
+NONE = 0xff
+
+## @brief Flag set if the imm32 column holds the instruction's immediate.
+FLAG_IMM = 0x01
+
+## @brief Instruction columns, with their array typecode.
+COLUMNS = [
+    ('addresses', 'I'),
+    ('words', 'I'),
+    ('immediates', 'I'),
+    ('decoder_ids', 'H'),
+    ('mnemonic_ids', 'H'),
+    ('sizes', 'B'),
+    ('flags', 'B'),
+    ('conds', 'B'),
+    ('d', 'B'),
+    ('n', 'B'),
+    ('m', 'B'),
+    ('t', 'B'),
+    ]
+
+assert array('I').itemsize == 4 and array('H').itemsize == 2
+
+_CONDITION_CODES = dict((id(info), code) for code, info in CONDITIONS.items())
+
+## @brief One row of instruction columns.
+InstructionRecord = namedtuple('InstructionRecord',
+    'address word size decoder_id mnemonic imm32 cond d n m t')
+
+def _field(value):
+    if value is None:
+        return None
+    return value if isinstance(value, six.integer_types) else value.unsigned
+
+##
+# @brief Read access to instructions stored as columns.
+#
+# Subclasses set @c _columns to a dict mapping each name in COLUMNS to a sequence of
+# integers, and @c _mnemonics to the list of distinct mnemonics.
+class ColumnStore(object):
+    ## @brief List of distinct mnemonics, indexed by the mnemonic_ids column.
+    @property
+    def mnemonics(self):
+        return self._mnemonics
+
+    ## @brief Return the column called @a name.
+    def column(self, name):
+        return self._columns[name]
+
+    @property
+    def addresses(self):
+        return self._columns['addresses']
+
+    @property
+    def words(self):
+        return self._columns['words']
+
+    @property
+    def sizes(self):
+        return self._columns['sizes']
+
+    @property
+    def decoder_ids(self):
+        return self._columns['decoder_ids']
+
+    ## @brief Return the index of the instruction starting at @a address, or None.
+    #
+    # Instructions must be in address order.
+    def index_of(self, address):
+        addresses = self.addresses
+        n = bisect_left(addresses, address)
+        if n < len(addresses) and addresses[n] == address:
+            return n
+        return None
+
+    ## @brief Return the index of the instruction containing @a address, or None.
+    def index_at(self, address):
+        n = bisect_right(self.addresses, address) - 1
+        if n >= 0 and address < self.addresses[n] + self.sizes[n]:
+            return n
+        return None
+
+    ## @brief Return the mnemonic of instruction @a n.
+    def mnemonic(self, n):
+        return self._mnemonics[self._columns['mnemonic_ids'][n]]
+
+    ## @brief Return row @a n as an InstructionRecord.
+    def record(self, n):
+        c = self._columns
+        def reg(name):
+            value = c[name][n]
+            return value if value != NONE else None
+        return InstructionRecord(
+            address=c['addresses'][n],
+            word=c['words'][n],
+            size=c['sizes'][n],
+            decoder_id=c['decoder_ids'][n],
+            mnemonic=self._mnemonics[c['mnemonic_ids'][n]],
+            imm32=c['immediates'][n] if c['flags'][n] & FLAG_IMM else None,
+            cond=reg('conds'),
+            d=reg('d'),
+            n=reg('n'),
+            m=reg('m'),
+            t=reg('t'))
+
+    ## @brief Decode instruction @a n again to get an Instruction object.
+    #
+    # The instruction's decoder is looked up by ID, so the tree is not searched.
+    def instruction(self, n):
+        decoder = DECODER_TREE.decoders[self._columns['decoder_ids'][n]]
+        return decoder.decode(self._columns['words'][n], self._columns['addresses'][n])
+
+    ## @brief Return the Instruction containing @a address, or None.
+    def instruction_at(self, address):
+        n = self.index_at(address)
+        return self.instruction(n) if n is not None else None
+
+    ## @brief Iterate over all rows as InstructionRecord objects.
+    def records(self):
+        for n in range(len(self)):
+            yield self.record(n)
+
+    def __len__(self):
+        return len(self._columns['addresses'])
+
+##
+# @brief Decoded instructions stored column-wise in arrays.
+#
+# Only integers are stored, a few bytes per column per instruction, so a table holds
+# millions of instructions without creating millions of objects. Instruction objects are
+# created only when an element is read: indexing and iteration decode the stored word
+# again with the stored decoder. Slicing returns a new table.
+class InstructionTable(ColumnStore):
+    def __init__(self, instructions=()):
+        self._columns = dict((name, array(typecode)) for name, typecode in COLUMNS)
+        self._mnemonics = []
+        self._mnemonicIds = {}
+        for i in instructions:
+            self.append(i)
+
+    def append(self, i):
+        mnemonic = self._mnemonicIds.get(i.mnemonic)
+        if mnemonic is None:
+            mnemonic = self._mnemonicIds[i.mnemonic] = len(self._mnemonics)
+            self._mnemonics.append(i.mnemonic)
+        imm32 = _field(getattr(i, 'imm32', None))
+        cond = getattr(i, 'cond', None)
+
+        c = self._columns
+        c['addresses'].append(i.address)
+        c['words'].append(i._word)
+        c['immediates'].append(imm32 or 0)
+        c['decoder_ids'].append(i.decoder_id)
+        c['mnemonic_ids'].append(mnemonic)
+        c['sizes'].append(i.size)
+        c['flags'].append(FLAG_IMM if imm32 is not None else 0)
+        c['conds'].append(_CONDITION_CODES[id(cond)] if cond is not None else NONE)
+        for name in ('d', 'n', 'm', 't'):
+            value = _field(getattr(i, name, None))
+            c[name].append(value if value is not None else NONE)
+
+    def extend(self, instructions):
+        for i in instructions:
+            self.append(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            result = InstructionTable()
+            result._columns = dict((name, column[key]) for name, column in self._columns.items())
+            result._mnemonics = list(self._mnemonics)
+            result._mnemonicIds = dict(self._mnemonicIds)
+            return result
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("instruction table index out of range")
+        return self.instruction(key)
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self.instruction(n)
+
+    def __repr__(self):
+        return "<%s@0x%x %d instructions>" % (self.__class__.__name__, id(self), len(self))
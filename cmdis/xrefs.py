@@ -0,0 +1,85 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .instructions import (Branch, LoadLiteral, AddressToRegister)
+
+##
+# @brief Cross references from instructions to the addresses they use.
+#
+# The index is built in a single pass over a Disassembly. There is one dict per kind of
+# reference, mapping a target address to a tuple of the addresses of the instructions
+# referencing it, in ascending order. Lookups return these tuples, or an empty tuple, so
+# callers cannot change the index.
+#
+# - Branches: b and conditional b instructions with an immediate target.
+# - Calls: bl instructions.
+# - Loads: PC-relative ldr from a literal, and adr.
+#
+# Branches and calls to a register have no static target and are not recorded.
+class CrossReferenceIndex(object):
+    def __init__(self, disassembly):
+        self._branches = {}
+        self._calls = {}
+        self._loads = {}
+        for i in disassembly.instructions:
+            if isinstance(i, Branch):
+                target = i.target
+                if target is None:
+                    continue
+                refs = self._calls if i.with_link else self._branches
+            elif isinstance(i, (LoadLiteral, AddressToRegister)):
+                target = i.target
+                refs = self._loads
+            else:
+                continue
+            try:
+                refs[target].append(i.address)
+            except KeyError:
+                refs[target] = [i.address]
+        for refs in (self._branches, self._calls, self._loads):
+            for target, sources in refs.items():
+                refs[target] = tuple(sources)
+
+    ## @brief Addresses of the branches to @a address.
+    def branches_to(self, address):
+        return self._branches.get(address, ())
+
+    ## @brief Addresses of the calls to @a address.
+    def calls_to(self, address):
+        return self._calls.get(address, ())
+
+    ## @brief Addresses of the instructions loading from or taking the address of @a address.
+    def loads_from(self, address):
+        return self._loads.get(address, ())
+
+    ## @brief Addresses of all instructions referring to @a address, in ascending order.
+    def references_to(self, address):
+        return sorted(self.branches_to(address) + self.calls_to(address) + self.loads_from(address))
+
+    ## @brief Sorted list of the addresses that are called.
+    @property
+    def call_targets(self):
+        return sorted(self._calls)
+
+    ## @brief Sorted list of the addresses that are branched to.
+    @property
+    def branch_targets(self):
+        return sorted(self._branches)
+
+    ## @brief Sorted list of the addresses that are loaded from.
+    @property
+    def load_targets(self):
+        return sorted(self._loads)
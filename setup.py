@@ -33,6 +33,9 @@ setup(
     url='https://github.com/flit/cmdis',
     license="BSD 3-Clause",
     install_requires=["enum34"],
+    extras_require={
+        'numpy': ["numpy"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "License :: OSI Approved :: BSD License",
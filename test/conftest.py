@@ -14,5 +14,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 
+import pytest
 
+from cmdis.disasm import Disassembler
+
+# Async generators need Python 3.6 or later.
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore.append("test_aio.py")
+
+## @brief Disassembly of the test module's IMAGE at address 0x1000.
+@pytest.fixture(scope='module')
+def disasm(request):
+    return Disassembler().disasm_image(request.module.IMAGE, 0x1000)
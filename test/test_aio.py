@@ -0,0 +1,76 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+from cmdis.aio import disasm_stream
+from cmdis.disasm import Disassembler
+from cmdis.decoder import UndefinedInstructionError
+from .testutils import (code, summary)
+import pytest
+
+# push {r4, lr}; bl; movs r0, #1; bl; pop {r4, pc}
+CODE = code(0xb510, 0xf000, 0xf803, 0x2001, 0xf7ff, 0xfffd, 0xbd10, type=bytes)
+
+##
+# @brief Reader that returns the data in fixed-size pieces, one per read() call.
+class ChunkedReader(object):
+    def __init__(self, data, size):
+        self._chunks = [data[n:n + size] for n in range(0, len(data), size)]
+
+    async def read(self, n=-1):
+        await asyncio.sleep(0)
+        return self._chunks.pop(0) if self._chunks else b''
+
+def run(reader, address=0x1000):
+    async def collect():
+        return [i async for i in disasm_stream(reader, address)]
+    return asyncio.get_event_loop().run_until_complete(collect())
+
+EXPECTED = summary(Disassembler().disasm(CODE, 0x1000))
+
+class TestDisasmStream:
+    @pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 7, 64])
+    def test_chunks(self, size):
+        assert summary(run(ChunkedReader(CODE, size))) == EXPECTED
+
+    def test_stream_reader(self):
+        async def collect():
+            reader = asyncio.StreamReader()
+            reader.feed_data(CODE[:3])
+            reader.feed_data(CODE[3:])
+            reader.feed_eof()
+            return [i async for i in disasm_stream(reader, 0x1000)]
+        result = asyncio.get_event_loop().run_until_complete(collect())
+        assert summary(result) == EXPECTED
+
+    def test_yields_before_eof(self):
+        async def first():
+            reader = asyncio.StreamReader()
+            reader.feed_data(CODE[:4])
+            stream = disasm_stream(reader, 0x1000)
+            return await stream.__anext__()
+        i = asyncio.get_event_loop().run_until_complete(first())
+        assert (i.address, i.mnemonic) == (0x1000, 'push')
+
+    def test_truncated(self):
+        # The first halfword of a 32-bit instruction at the end of the stream is ignored.
+        result = run(ChunkedReader(CODE[:6], 4))
+        assert summary(result) == EXPECTED[:2]
+
+    def test_undefined(self):
+        with pytest.raises(UndefinedInstructionError):
+            run(ChunkedReader(code(0x2001, 0xe800, 0x0000, 0x2001, type=bytes), 3))
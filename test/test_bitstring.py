@@ -177,6 +177,16 @@ class TestBitstring:
         assert bitstring('010001').highest_set_bit() == 4
         assert bitstring('101011').highest_set_bit() == 5
 
+    def test_signed(self):
+        assert bitstring('0111').signed == 7
+        assert bitstring('1000').signed == -8
+        assert bitstring(0xfffffff8, 32).signed == -8
+
+        # Reading the signed value doesn't change the bitstring.
+        b = bitstring('1010')
+        assert b.signed == -6
+        assert b == bitstring('1010')
+
     def test_sign_extend(self):
         assert bitstring('00001').sign_extend(8) == bitstring('00000001')
         assert bitstring('1000').sign_extend(8) == bitstring('11111000')
@@ -347,6 +357,21 @@ class TestBitstring:
         assert x[0:x.width] == '11001'
         assert x[2:5] == '110'
 
+    def test_slice_width(self):
+        x = bitstring(0xf0f0abcd, 32)
+        assert x[16:32].width == 16
+        assert x[16:32].unsigned == 0xf0f0
+        assert x[4:-4].unsigned == 0x0f0abc
+        assert x[28:].unsigned == 0xf
+        assert x[8:8].width == 0
+        assert x[8:4].width == 0
+
+    def test_slice_step(self):
+        x = bitstring('11001')
+        assert x[0:5:2] == '101'
+        assert x[4::-1] == '10011'
+        assert x[4:0:-2] == '01'
+
     def test_setitem(self):
         x = bitstring('11001')
         assert x[0] == 1
@@ -392,3 +417,158 @@ class TestBitstring:
         with pytest.raises(ValueError):
             x.base_string(base=3)
 
+
+class TestLiterals:
+    def test_compare(self):
+        x = bitstring('0110')
+        assert x == '0110'
+        assert x != '110'
+        assert x != '00110'
+        assert x < '0111'
+        assert x > '0101'
+        assert not x < '0110'
+
+    def test_operands(self):
+        x = bitstring('1100')
+        assert x & '1010' == '1000'
+        assert x | '0011' == '1111'
+        assert x + '0001' == '1101'
+
+    def test_invalid(self):
+        x = bitstring('1100')
+        with pytest.raises(ValueError):
+            x == '12'
+        with pytest.raises(ValueError):
+            x == '12'
+
+class TestConcat:
+    def test_parts(self):
+        assert concat(bitstring('10'), '01', 1, 0) == '100110'
+        assert concat(bitstring('1'), bitstring(0x80, 8)).width == 9
+        assert concat() == bitstring()
+
+    def test_same_as_mod(self):
+        a = bitstring('101')
+        b = bitstring(0x3c, 8)
+        assert concat(a, b, '0', a) == a % b % '0' % a
+        assert a == '101'
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            concat(bitstring('1'), 2)
+        with pytest.raises(TypeError):
+            concat(bitstring('1'), 1.0)
+
+class TestWord32:
+    def test_init(self):
+        assert word32(0x123456789).unsigned == 0x23456789
+        assert word32(-1).unsigned == 0xffffffff
+        assert word32(bitstring('101')).unsigned == 5
+        assert word32('101').width == 32
+        assert word32().width == 32
+
+    def test_compatible(self):
+        x = word32(0x80000001)
+        y = bitstring(0x80000001, 32)
+        assert x == y
+        assert hash(x) == hash(y)
+        assert repr(x) == repr(y)
+        assert x.signed == y.signed == -0x7fffffff
+        assert x[31] == y[31]
+        assert x[-1] == y[-1]
+        assert x[4:12] == y[4:12]
+
+    def test_arithmetic(self):
+        x = word32(0xfffffff0)
+        assert isinstance(x + 0x20, word32)
+        assert x + 0x20 == 0x10
+        assert x - bitstring(0xfffffff1, 32) == 0xffffffff
+        assert 1 + x == 0xfffffff1
+        assert x * 2 == 0xffffffe0
+        assert x.unsigned == 0xfffffff0
+
+    def test_bitwise(self):
+        x = word32(0xf0f0f0f0)
+        assert isinstance(x & 0xff, word32)
+        assert x & 0xff == 0xf0
+        assert x | bitstring('1111') == 0xf0f0f0ff
+        assert x ^ 0xffffffff == 0x0f0f0f0f
+        assert ~x == 0x0f0f0f0f
+        assert x == 0xf0f0f0f0
+        assert x << 4 == 0x0f0f0f00
+        assert x >> 4 == 0x0f0f0f0f
+        assert (x | bitstring(0, 40)).width == 40
+
+    def test_bitwise_wide(self):
+        x = word32(0xf0f0f0f0)
+        wide = bitstring(0xffffffff0000ffff, 64)
+        for result in (x & wide, x | wide, x ^ wide):
+            assert type(result) is bitstring
+            assert result.width == 64
+        assert x & wide == 0xf0f0
+        assert x | wide == 0xfffffffff0f0ffff
+        assert x ^ wide == 0xfffffffff0f00f0f
+
+    def test_width(self):
+        x = word32(1)
+        assert (x % bitstring('1')).width == 33
+        y = x
+        y %= bitstring('1')
+        assert y.width == 33
+        assert x.width == 32
+        assert x.zero_extend(40).width == 40
+        with pytest.raises(ValueError):
+            x.width = 16
+        with pytest.raises(ValueError):
+            x.set(bitstring('1'))
+
+    def test_setitem(self):
+        x = word32(0)
+        x[31] = 1
+        x[0:4] = 0xf
+        assert x == 0x8000000f
+
+class TestInterned:
+    def test_shared(self):
+        assert interned(5, 3) is interned(5, 3)
+        assert interned(13, 3) is interned(5, 3)
+        assert interned(0, 1) is bit0
+        assert bitstring('10110')[1:4] is interned(3, 3)
+        assert bitstring('10')[1] is bit1
+
+    def test_values(self):
+        for width in range(INTERNED_WIDTH + 1):
+            for value in range(1 << width):
+                b = interned(value, width)
+                assert b == bitstring(value, width)
+                assert hash(b) == hash(bitstring(value, width))
+
+    def test_wide(self):
+        a = interned(5, 9)
+        assert a == bitstring(5, 9)
+        assert a is not interned(5, 9)
+        a[0] = 0
+        assert a == 4
+
+    def test_immutable(self):
+        b = interned(5, 4)
+        with pytest.raises(TypeError):
+            b[0] = 0
+        with pytest.raises(TypeError):
+            b.value = 1
+        with pytest.raises(TypeError):
+            b.width = 8
+        with pytest.raises(TypeError):
+            b.invert()
+        assert b == 5
+
+    def test_operators(self):
+        b = interned(5, 4)
+        c = b
+        c += 1
+        assert c == 6
+        c = b
+        c %= bitstring('1')
+        assert c == '01011'
+        assert ~b == '1010'
+        assert b == 5
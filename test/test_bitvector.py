@@ -0,0 +1,121 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from cmdis.bitstring import (bitstring, bit0, bit1)
+from cmdis.bitvector import bitvector
+from cmdis.helpers import *
+
+VALUES = [0, 1, 2, 0x7f, 0x80, 0xff, 0x7fffffff, 0x80000000, 0x80000001, 0xfffffffe,
+    0xffffffff, 0x12345678, 0xdeadbeef]
+
+@pytest.fixture(scope='module')
+def values():
+    r = random.Random(1)
+    return VALUES + [r.getrandbits(32) for _ in range(100)]
+
+def check(vector, scalars):
+    assert vector.width == scalars[0].width
+    assert [v.unsigned for v in vector.to_bitstrings()] == [v.unsigned for v in scalars]
+
+class TestBitvector:
+    def test_init(self):
+        v = bitvector([1, -1, bitstring('101'), 0x1ff], 8)
+        assert len(v) == 4
+        assert v.width == 8
+        assert list(v.values) == [1, 0xff, 5, 0xff]
+        assert list(bitvector(np.array([-2, 3]), 4).values) == [0xe, 3]
+
+    def test_signed(self):
+        v = bitvector([0, 1, 0x7f, 0x80, 0xff], 8)
+        assert list(v.signed) == [0, 1, 127, -128, -1]
+        assert list(bitvector([1 << 63], 64).signed) == [-(1 << 63)]
+
+    def test_bits(self, values):
+        v = bitvector(values)
+        check(v[4:12], [bitstring(x, 32)[4:12] for x in values])
+        check(v[31], [bitstring(x, 32)[31] for x in values])
+        check(v[-1], [bitstring(x, 32)[31] for x in values])
+        assert list(v.get_bit_value(0)) == [x & 1 for x in values]
+
+    def test_extend(self, values):
+        v = bitvector(values, 32)[0:8]
+        check(v.sign_extend(32), [bitstring(x, 32)[0:8].sign_extend(32) for x in values])
+        check(v.zero_extend(32), [bitstring(x, 32)[0:8].zero_extend(32) for x in values])
+
+    def test_operators(self, values):
+        v = bitvector(values)
+        s = [bitstring(x, 32) for x in values]
+        check(v + 0x80000000, [x + 0x80000000 for x in s])
+        check(v - bitstring(3, 32), [x - bitstring(3, 32) for x in s])
+        check(v & 0xf0f0, [x & 0xf0f0 for x in s])
+        check(v | v[0:8], [x | x[0:8] for x in s])
+        check(v ^ 0xffffffff, [x ^ 0xffffffff for x in s])
+        check(v << 3, [x << 3 for x in s])
+        check(v >> 31, [x >> 31 for x in s])
+        check(~v, [bitstring(x).inverted for x in s])
+        check(v[0:8] % '01' % v[28:32], [x[0:8] % '01' % x[28:32] for x in s])
+        assert list(v == 0xffffffff) == [x == 0xffffffff for x in s]
+
+    def test_too_wide(self):
+        with pytest.raises(ValueError):
+            bitvector([0], 65)
+        with pytest.raises(ValueError):
+            bitvector([0], 40) % bitvector([0], 30)
+
+class TestBatchHelpers:
+    def test_add_with_carry(self, values):
+        x = bitvector(values)
+        y = bitvector(list(reversed(values)))
+        for c in (bit0, bit1):
+            result, carry, overflow = AddWithCarry_batch(x, y, c)
+            expected = [AddWithCarry(bitstring(a, 32), bitstring(b, 32), c)
+                        for a, b in zip(values, reversed(values))]
+            check(result, [e[0] for e in expected])
+            check(carry, [e[1] for e in expected])
+            check(overflow, [e[2] for e in expected])
+
+    def test_add_with_carry_vector(self, values):
+        x = bitvector(values)
+        c = bitvector([n & 1 for n in range(len(values))], 1)
+        result, _, _ = AddWithCarry_batch(x, 0xffffffff, c)
+        check(result, [AddWithCarry(bitstring(a, 32), bitstring(0xffffffff, 32), bitstring(n & 1, 1))[0]
+                        for n, a in enumerate(values)])
+
+    @pytest.mark.parametrize("type", [SRType.SRType_LSL, SRType.SRType_LSR, SRType.SRType_ASR,
+                                    SRType.SRType_ROR])
+    @pytest.mark.parametrize("amount", [0, 1, 5, 31, 32])
+    def test_shift_c(self, values, type, amount):
+        v = bitvector(values)
+        result, carry = Shift_C_batch(v, type, amount, bit1)
+        expected = [Shift_C(bitstring(x, 32), type, amount, bit1) for x in values]
+        check(result, [e[0] for e in expected])
+        if amount == 0:
+            assert carry is bit1
+        else:
+            check(carry, [e[1] for e in expected])
+
+    def test_rrx(self, values):
+        v = bitvector(values)
+        for c in (bit0, bit1):
+            result, carry = Shift_C_batch(v, SRType.SRType_RRX, 1, c)
+            expected = [RRX_C(bitstring(x, 32), c) for x in values]
+            check(result, [e[0] for e in expected])
+            check(carry, [e[1] for e in expected])
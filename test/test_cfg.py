@@ -0,0 +1,77 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis.disasm import Disassembler
+from .testutils import code
+
+# 0x1000:  push {r4, lr}
+# 0x1002:  cmp r0, #0
+# 0x1004:  beq 0x100a
+# 0x1006:  movs r0, #1
+# 0x1008:  b 0x100c
+# 0x100a:  movs r0, #2
+# 0x100c:  bl 0x1014
+# 0x1010:  pop {r4, pc}
+# 0x1012:  nop
+# 0x1014:  bx lr
+IMAGE = code(0xb510, 0x2800, 0xd001, 0x2001, 0xe000, 0x2002, 0xf000, 0xf802, 0xbd10, 0xbf00,
+            0x4770)
+
+def starts(blocks):
+    return [b.start_address for b in blocks]
+
+class TestControlFlowGraph:
+    def test_blocks(self, disasm):
+        cfg = disasm.cfg
+        assert starts(cfg) == [0x1000, 0x1006, 0x100a, 0x100c, 0x1010, 0x1012, 0x1014]
+        assert [b.end_address for b in cfg] == [0x1006, 0x100a, 0x100c, 0x1010, 0x1012, 0x1014, 0x1016]
+
+    def test_successors(self, disasm):
+        cfg = disasm.cfg
+        assert [starts(b.successors) for b in cfg] == [
+            [0x100a, 0x1006], # beq
+            [0x100c],         # b
+            [0x100c],         # fall through into bl target
+            [0x1010],         # bl returns
+            [],               # pop {pc}
+            [0x1014],         # nop
+            [],               # bx lr
+            ]
+
+    def test_predecessors(self, disasm):
+        cfg = disasm.cfg
+        assert starts(cfg.block_at(0x100c).predecessors) == [0x1006, 0x100a]
+        assert starts(cfg.block_at(0x1000).predecessors) == []
+
+    def test_block_at(self, disasm):
+        cfg = disasm.cfg
+        assert cfg.block_at(0x1000).start_address == 0x1000
+        assert cfg.block_at(0x1004).start_address == 0x1000
+        assert cfg.block_at(0x100e).start_address == 0x100c
+        assert cfg.block_at(0x1015).start_address == 0x1014
+        assert cfg.block_at(0xfff) is None
+        assert cfg.block_at(0x1016) is None
+
+    def test_cached(self, disasm):
+        assert disasm.cfg is disasm.cfg
+
+    def test_gap(self):
+        # movs r0, #1; <undefined>; movs r0, #2
+        disasm = Disassembler().disasm_image(code(0x2001, 0xe800, 0xe800, 0x2002), 0)
+        cfg = disasm.cfg
+        assert starts(cfg) == [0, 6]
+        assert cfg.block_at(0).successors == []
+        assert cfg.block_at(2) is None
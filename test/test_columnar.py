@@ -0,0 +1,79 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis import columnar
+from cmdis.disasm import decoder
+from .testutils import BRANCHES_IMAGE
+import pytest
+
+IMAGE = BRANCHES_IMAGE
+
+@pytest.fixture(scope='module')
+def data(disasm):
+    return columnar.dumps(disasm)
+
+class TestColumnar:
+    def test_header(self, data):
+        assert data[:4] == b"CMDC"
+        assert columnar.HEADER.unpack_from(data)[1] == columnar.VERSION
+
+    def test_columns(self, disasm, data):
+        c = columnar.loads(data)
+        assert len(c) == 5
+        assert list(c.addresses) == [0x1000, 0x1002, 0x1006, 0x1008, 0x100a]
+        assert list(c.sizes) == [2, 4, 2, 2, 2]
+        assert c.words[1] == 0xf803f000
+        assert list(c.decoder_ids) == [i.decoder_id for i in disasm]
+        assert all(decoder.decoders[d]._mnemonic for d in c.decoder_ids)
+        assert c.decoders_match
+
+    def test_records(self, disasm, data):
+        c = columnar.loads(data)
+        assert [r.mnemonic for r in c] == [i.mnemonic for i in disasm]
+        beq = c.record(2)
+        assert beq.mnemonic == 'beq'
+        assert beq.cond == 0
+        assert beq.d is None
+        adds = c.record(3)
+        assert (adds.d, adds.n, adds.imm32, adds.cond) == (0, 1, 2, None)
+        assert c.record(0).imm32 is None
+
+    def test_mnemonics(self, data):
+        c = columnar.loads(data)
+        assert sorted(c.mnemonics) == sorted(set(r.mnemonic for r in c))
+
+    def test_index_of(self, data):
+        c = columnar.loads(data)
+        assert c.index_of(0x1006) == 2
+        assert c.index_of(0x1004) is None
+        assert c.index_of(0x2000) is None
+
+    def test_empty(self):
+        c = columnar.loads(columnar.dumps([]))
+        assert len(c) == 0
+        assert c.mnemonics == []
+
+    def test_bad_magic(self, data):
+        with pytest.raises(ValueError):
+            columnar.loads(b"XXXX" + data[4:])
+
+    def test_mmap(self, disasm, tmpdir):
+        path = str(tmpdir.join("code.cmdc"))
+        with open(path, 'wb') as f:
+            columnar.dump(disasm, f)
+        with columnar.load(path) as c:
+            assert list(c.addresses) == [i.address for i in disasm]
+            assert c.record(1).mnemonic == 'bl'
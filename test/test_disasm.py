@@ -0,0 +1,268 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis.disasm import (Disassembler, diff_ranges)
+from cmdis.formatter import Formatter
+from cmdis.instructions import Branch
+from cmdis.mock_cpu import MockCpuModelDelegate
+from cmdis.model import CpuModel
+from .testutils import code
+import pytest
+import random
+
+# 0x1000:  push {r4, lr}
+# 0x1002:  movs r0, #1
+# 0x1004:  bl .+8
+# 0x1008:  adds r0, r0, r1
+# 0x100a:  pop {r4, pc}
+# 0x100c:  movs r1, #2
+# 0x100e:  bx lr
+IMAGE = code(0xb510, 0x2001, 0xf000, 0xf802, 0x1840, 0xbd10, 0x2102, 0x4770)
+
+# 0x1000:  ldr r0, [pc, #4]
+# 0x1002:  ldr r1, [pc, #8]
+# 0x1004:  bx lr
+# 0x1006:  nop
+# 0x1008:  .word 0xf800f000
+# 0x100c:  .word 0x12345678
+# 0x1010:  movs r0, #1
+LITERALS = code(0x4801, 0x4902, 0x4770, 0xbf00, 0xf000, 0xf800, 0x5678, 0x1234, 0x2001)
+
+@pytest.fixture(scope='function')
+def dis():
+    return Disassembler()
+
+class TestDiffRanges:
+    def test_equal(self):
+        assert diff_ranges(bytearray(1000), bytearray(1000)) == []
+
+    def test_single(self):
+        new = bytearray(1000)
+        new[300] = 1
+        new[302] = 1
+        assert diff_ranges(bytearray(1000), new) == [[300, 303]]
+
+    def test_block_boundary(self):
+        new = bytearray(1000)
+        new[255] = 1
+        new[256] = 1
+        new[900] = 1
+        assert diff_ranges(bytearray(1000), new, blocksize=256) == [[255, 257], [900, 901]]
+
+    def test_length(self):
+        assert diff_ranges(bytearray(10), bytearray(14)) == [[10, 14]]
+        assert diff_ranges(bytearray(14), bytearray(10)) == [[10, 14]]
+
+class TestDisasmImage:
+    def test_image(self, dis):
+        d = dis.disasm_image(IMAGE, 0x1000)
+        assert [i.address for i in d] == [0x1000, 0x1002, 0x1004, 0x1008, 0x100a, 0x100c, 0x100e]
+        assert [i.mnemonic for i in d] == ['push', 'movs', 'bl', 'adds', 'pop', 'movs', 'bx']
+        assert d.end_address == 0x1010
+
+    def test_skip_undefined(self, dis):
+        # The 32-bit encoding is undefined, so its second halfword is decoded on its own.
+        d = dis.disasm_image(code(0x2001, 0xe800, 0x0000, 0x4770), 0)
+        assert [i.address for i in d] == [0, 4, 6]
+
+class TestLiterals:
+    def test_skip(self, dis):
+        d = dis.disasm_image(LITERALS, 0x1000)
+        assert [i.address for i in d] == [0x1000, 0x1002, 0x1004, 0x1006, 0x1010]
+        assert d.literals == {0x1008: 4, 0x100c: 4}
+
+    def test_read(self, dis):
+        d = dis.disasm_image(LITERALS, 0x1000)
+        assert d.read_literal(0x1008, 4) == 0xf800f000
+        assert d.read_literal(0x100c, 2) == 0x5678
+        assert d.read_literal(0x1010, 4) is None
+
+    def test_format(self, dis):
+        d = dis.disasm_image(LITERALS, 0x1000)
+        fmt = Formatter(None, d)
+        assert fmt.format(d.instructions[0]).endswith("; =0xf800f000")
+        assert fmt.format(d.instructions[1]).endswith("; =0x12345678")
+
+    def test_format_cpu_memory(self):
+        cpu = CpuModel()
+        cpu.delegate = MockCpuModelDelegate()
+        cpu.delegate.add_memory(0x1000, 0x100)
+        cpu.write32(0x1008, 0x12345678)
+        fmt = Formatter(cpu)
+        # ldr r0, [pc, #4]
+        i = next(Disassembler().disasm(code(0x4801), 0x1002))
+        assert fmt.format(i).endswith("; =0x12345678")
+
+    def test_format_cpu_unmapped(self):
+        cpu = CpuModel()
+        cpu.delegate = MockCpuModelDelegate()
+        cpu.delegate.add_memory(0x1000, 0x100)
+        fmt = Formatter(cpu)
+        # ldr r0, [pc, #4] at 0x8000 reads 0x8008, which isn't mapped.
+        i = next(Disassembler().disasm(code(0x4801), 0x8000))
+        assert ";" not in fmt.format(i)
+
+    def test_backward(self, dis):
+        # Literals before the load are not skipped.
+        # 0x1000: .word 0x20012001
+        # 0x1004: ldr.w r0, [pc, #-8]
+        d = dis.disasm_image(code(0x2001, 0x2001, 0xf85f, 0x0008), 0x1000)
+        assert [i.address for i in d] == [0x1000, 0x1002, 0x1004]
+        assert d.literals == {0x1000: 4}
+
+class TestLookup:
+    @pytest.fixture(scope='function')
+    def d(self, dis):
+        return dis.disasm_image(IMAGE, 0x1000)
+
+    def test_instruction_at(self, d):
+        assert d.instruction_at(0x1000).address == 0x1000
+        assert d.instruction_at(0x1001).address == 0x1000
+        assert d.instruction_at(0x1006).address == 0x1004 # second half of bl
+        assert d.instruction_at(0x100f).address == 0x100e
+        assert d.instruction_at(0xfff) is None
+        assert d.instruction_at(0x1010) is None
+
+    def test_index_of(self, d):
+        assert d.index_of(0x1000) == 0
+        assert d.index_of(0x1004) == 2
+        assert d.index_of(0x100e) == 6
+        assert d.index_of(0x1006) is None # second half of bl
+        assert d.index_of(0xffe) is None
+        assert d.index_of(0x1010) is None
+
+    def test_around(self, d):
+        assert [i.address for i in d.instructions_around(0x1006, 1, 1)] == [0x1002, 0x1004, 0x1008]
+        assert [i.address for i in d.instructions_around(0x1002, 3, 0)] == [0x1000, 0x1002]
+        assert [i.address for i in d.instructions_around(0x100c, 0, 5)] == [0x100c, 0x100e]
+        assert [i.address for i in d.instructions_around(0xff0, 2, 2)] == [0x1000, 0x1002]
+
+    def test_around_gap(self, dis):
+        d = dis.disasm_image(code(0x2001, 0xe800, 0xe800, 0x2002, 0x2003), 0)
+        assert [i.address for i in d.instructions_around(2, 1, 1)] == [0, 6]
+
+class TestIncremental:
+    def check(self, dis, old, new):
+        previous = dis.disasm_image(old, 0x1000)
+        result = dis.disasm_incremental(new, previous)
+        full = dis.disasm_image(new, 0x1000)
+        assert [(i.address, i.mnemonic, i.size) for i in result] == \
+                [(i.address, i.mnemonic, i.size) for i in full]
+        return previous, result
+
+    def test_unchanged(self, dis):
+        previous, result = self.check(dis, IMAGE, IMAGE)
+        assert all(a is b for a, b in zip(previous, result))
+
+    def test_patch_16bit(self, dis):
+        new = bytearray(IMAGE)
+        new[2:4] = code(0x2005) # movs r0, #5
+        previous, result = self.check(dis, IMAGE, new)
+        assert result.instructions[1].imm32 == 5
+        assert result.instructions[0] is previous.instructions[0]
+        assert result.instructions[1] is not previous.instructions[1]
+        assert all(a is b for a, b in zip(previous.instructions[2:], result.instructions[2:]))
+
+    def test_patch_32bit_second_halfword(self, dis):
+        new = bytearray(IMAGE)
+        new[6:8] = code(0xf804) # bl .+12
+        previous, result = self.check(dis, IMAGE, new)
+        assert result.instructions[1] is previous.instructions[1]
+        assert result.instructions[2] is not previous.instructions[2]
+        assert result.instructions[3] is previous.instructions[3]
+
+    def test_resync(self, dis):
+        # Replacing the movs with the first half of a 32-bit instruction shifts the sweep.
+        new = bytearray(IMAGE)
+        new[2:4] = code(0xf000)
+        self.check(dis, IMAGE, new)
+
+    def test_multiple(self, dis):
+        new = bytearray(IMAGE)
+        new[0:2] = code(0xb530) # push {r4, r5, lr}
+        new[12:14] = code(0x2103) # movs r1, #3
+        previous, result = self.check(dis, IMAGE, new)
+        assert result.instructions[2] is previous.instructions[2]
+        assert result.instructions[6] is previous.instructions[6]
+
+    def test_literal_moved(self, dis):
+        new = bytearray(LITERALS)
+        new[2:4] = code(0x4900) # ldr r1, [pc, #0]
+        previous, result = self.check(dis, LITERALS, new)
+        assert [i.address for i in result] == [0x1000, 0x1002, 0x100c, 0x100e, 0x1010]
+
+    def test_literal_added(self, dis):
+        new = bytearray(LITERALS)
+        new[0:2] = code(0x4803) # ldr r0, [pc, #12]
+        previous, result = self.check(dis, LITERALS, new)
+        assert 0x1010 not in [i.address for i in result]
+
+    def test_grow(self, dis):
+        self.check(dis, IMAGE, IMAGE + code(0xbf00, 0xbf00))
+
+    def test_shrink(self, dis):
+        self.check(dis, IMAGE, IMAGE[:-4])
+
+    @pytest.mark.parametrize("seed", range(8))
+    def test_random_patches(self, dis, seed):
+        rng = random.Random(seed)
+        old = bytearray(rng.randrange(256) for _ in range(2048))
+        new = bytearray(old)
+        for _ in range(rng.randrange(1, 6)):
+            offset = rng.randrange(len(new) - 8)
+            for n in range(rng.randrange(1, 8)):
+                new[offset + n] = rng.randrange(256)
+        self.check(dis, old, new)
+
+class TestShared:
+    def describe(self, d):
+        fmt = Formatter(None, d)
+        return [(i.address, i.size, i.mnemonic, getattr(i, 'target', None), fmt.format(i))
+                for i in d]
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_same_as_unshared(self, seed):
+        rng = random.Random(seed)
+        data = LITERALS + IMAGE + bytearray(rng.randrange(256) for _ in range(2048))
+        expected = Disassembler().disasm_image(data, 0x1000)
+        actual = Disassembler(shared=True).disasm_image(data, 0x1000)
+        assert self.describe(actual) == self.describe(expected)
+
+    def test_templates_shared(self):
+        # Two copies of IMAGE share templates; branch targets follow the address.
+        d = Disassembler(shared=True).disasm_image(IMAGE + IMAGE, 0x1000)
+        first = d.instruction_at(0x1004)
+        second = d.instruction_at(0x1014)
+        assert first.template is second.template
+        assert (first.target, second.target) == (0x100c, 0x101c)
+        assert isinstance(first, Branch)
+        with pytest.raises(AttributeError):
+            first.imm32 = None
+
+    def test_incremental(self):
+        dis = Disassembler(shared=True)
+        old = dis.disasm_image(IMAGE, 0x1000)
+        new = bytearray(IMAGE)
+        new[2:4] = code(0x2005)
+        d = dis.disasm_incremental(new, old)
+        assert d.instruction_at(0x1002).imm32 == 5
+        assert d.instruction_at(0x1000) is old.instruction_at(0x1000)
+
+    def test_undefined(self):
+        dis = Disassembler(shared=True)
+        for _ in range(2):
+            d = dis.disasm_image(code(0xe800, 0x2001), 0x1000)
+            assert [i.address for i in d] == [0x1002]
@@ -0,0 +1,135 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis.disasm import Disassembler
+from cmdis.functions import FunctionCache
+from .testutils import (code, summary)
+
+# 0x1000:  push {r4, lr}
+# 0x1002:  bl 0x100c
+# 0x1006:  pop {r4, pc}
+# 0x1008:  .word 0
+# 0x100c:  movs r0, #1
+# 0x100e:  bx lr
+# 0x1010:  push {r4, lr}
+# 0x1012:  ldr r0, [pc, #4]
+# 0x1014:  pop {r4, pc}
+# 0x1016:  nop
+# 0x1018:  .word 0x12345678
+IMAGE = code(0xb510, 0xf000, 0xf803, 0xbd10, 0x0000, 0x0000, 0x2001, 0x4770, 0xb510,
+            0x4801, 0xbd10, 0xbf00, 0x5678, 0x1234)
+
+class TestFunctionTable:
+    def test_boundaries(self, disasm):
+        assert [(f.start_address, f.end_address) for f in disasm.functions] == [
+            (0x1000, 0x1008), (0x100c, 0x1010), (0x1010, 0x1016)]
+
+    def test_function_at(self, disasm):
+        assert disasm.functions.function_at(0x1004).start_address == 0x1000
+        assert disasm.functions.function_at(0x100e).start_address == 0x100c
+        assert disasm.functions.function_at(0x1008) is None
+        assert disasm.functions.function_at(0x1016) is None
+        assert disasm.functions.function_at(0x0ffe) is None
+
+    def test_data(self, disasm):
+        f = disasm.functions.function_at(0x100c)
+        assert f.data == IMAGE[0xc:0x10]
+        assert len(f) == 2
+        assert [i.address for i in f.epilogues] == [0x100e]
+        assert [i.address for i in disasm.functions.functions[0].epilogues] == [0x1006]
+        assert f.is_self_contained
+
+    def test_digest(self, disasm):
+        # Two copies of push {r4, lr}; movs r0, #1; pop {r4, pc} have the same hash.
+        d = Disassembler().disasm_image(code(0xb510, 0x2001, 0xbd10) * 2, 0x1000)
+        first = d.functions.function_at(0x1000)
+        second = d.functions.function_at(0x1006)
+        assert second is not None and second is not first
+        assert first.digest == second.digest
+        assert first.digest != disasm.functions.function_at(0x1000).digest
+
+    def test_push_inside_function(self):
+        # 0x2000:  push {lr}; movs r0, #1; push {lr}; pop {pc}; pop {pc}
+        d = Disassembler().disasm_image(code(0xb500, 0x2001, 0xb500, 0xbd00, 0xbd00), 0x2000)
+        assert [(f.start_address, f.end_address) for f in d.functions] == [(0x2000, 0x200a)]
+
+    def test_shared_literal(self):
+        # 0x3000:  push {lr}; ldr r0, [pc, #4]; pop {pc}
+        # 0x3006:  push {lr}; ldr r0, [pc, #0]; pop {pc}; .word 0
+        # The second function's range contains the literal loaded by the first.
+        d = Disassembler().disasm_image(code(0xb500, 0x4801, 0xbd00, 0xb500, 0x4800,
+                0xbd00, 0x0000, 0x0000), 0x3000)
+        assert d.functions.function_at(0x3000).is_self_contained
+        assert not d.functions.function_at(0x3006).is_self_contained
+
+    def test_cached(self, disasm):
+        assert disasm.functions is disasm.functions
+
+class TestFunctionCache:
+    def test_update(self, disasm):
+        cache = FunctionCache()
+        cache.update(disasm.functions)
+        assert len(cache) == 3
+        assert all(f.digest in cache for f in disasm.functions)
+
+    def test_same_address(self):
+        cache = FunctionCache()
+        first = Disassembler().disasm_image(IMAGE, 0x1000, cache=cache)
+        second = Disassembler().disasm_image(IMAGE, 0x1000, cache=cache)
+        assert summary(second) == summary(first)
+        assert second.instruction_at(0x1002) is first.instruction_at(0x1002)
+        assert second.instruction_at(0x100e) is first.instruction_at(0x100e)
+
+    def test_moved(self):
+        cache = FunctionCache()
+        Disassembler().disasm_image(IMAGE, 0x1000, cache=cache)
+        moved = code(0xbf00, 0xbf00) + IMAGE
+        expected = Disassembler().disasm_image(moved, 0x2000)
+        actual = Disassembler().disasm_image(moved, 0x2000, cache=cache)
+        assert summary(actual) == summary(expected)
+        bl = actual.instruction_at(0x2006)
+        assert bl.target == 0x2010
+        assert actual.instruction_at(0x2016).target == 0x201c
+
+    def test_moved_by_halfword(self):
+        # Moving by 2 bytes changes which halfwords the ldr loads, so the pop becomes
+        # part of a literal and the cached function must not be reused.
+        # 0x1000:  push {r4, lr}
+        # 0x1002:  ldr r0, [pc, #4]
+        # 0x1004:  b 0x100c
+        # 0x1006:  nop
+        # 0x1008:  .word 0x12345678
+        # 0x100c:  pop {r4, pc}
+        image = code(0xb510, 0x4801, 0xe002, 0xbf00, 0x5678, 0x1234, 0xbd10)
+        cache = FunctionCache()
+        Disassembler().disasm_image(image, 0x1000, cache=cache)
+        assert len(cache) == 1
+        moved = code(0x4770) + image
+        expected = Disassembler().disasm_image(moved, 0x1000)
+        actual = Disassembler().disasm_image(moved, 0x1000, cache=cache)
+        assert summary(actual) == summary(expected)
+        assert actual.instruction_at(0x100e) is None
+
+    def test_literal_not_reused(self):
+        # The load at 0x4000 references the first halfword of a cached function, so the
+        # sweep must skip it rather than reuse the function.
+        cache = FunctionCache()
+        Disassembler().disasm_image(IMAGE, 0x1000, cache=cache)
+        image = code(0x4800, 0xbf00) + IMAGE
+        expected = Disassembler().disasm_image(image, 0x4000)
+        actual = Disassembler().disasm_image(image, 0x4000, cache=cache)
+        assert summary(actual) == summary(expected)
+        assert actual.instruction_at(0x4004) is None
@@ -16,6 +16,8 @@
 
 from cmdis.bitstring import *
 from cmdis.helpers import *
+from cmdis import helpers
+import pytest
 
 class TestAlign:
     def test_0(self):
@@ -77,6 +79,19 @@ class TestAddWithCarry:
 #         x = bitstring()
         pass
 
+    @pytest.mark.parametrize(("x", "y", "c", "expected"), [
+        (0xffffffff, 1, 0, (0, 1, 0)),
+        (0x7fffffff, 1, 0, (0x80000000, 0, 1)),
+        (0x80000000, 0x80000000, 0, (0, 1, 1)),
+        (0x80000000, 0x7fffffff, 1, (0, 1, 0)),
+        (0x12345678, 0x11111111, 1, (0x2345678a, 0, 0)),
+        ])
+    def test_word32(self, x, y, c, expected):
+        result = AddWithCarry(word32(x), word32(y), bitstring(c, 1))
+        assert isinstance(result[0], word32)
+        assert result == expected
+        assert result == AddWithCarry(bitstring(x, 32), bitstring(y, 32), bitstring(c, 1))
+
 class TestLSL:
     def test_0(self):
         assert LSL_C(bitstring('1001'), 1) == ('0010', '1')
@@ -150,7 +165,133 @@ class TestDecodeImmShift:
         assert DecodeImmShift(bitstring('11'), bitstring('00001')) == (SRType.SRType_ROR, 1)
         assert DecodeImmShift(bitstring('11'), bitstring('11111')) == (SRType.SRType_ROR, 31)
 
+class TestDecodeImmShiftTable:
+    def test_integers(self):
+        assert DecodeImmShift(0, 0) == (SRType.SRType_LSL, 0)
+        assert DecodeImmShift(1, 0) == (SRType.SRType_LSR, 32)
+        assert DecodeImmShift(2, 7) == (SRType.SRType_ASR, 7)
+        assert DecodeImmShift(3, 0) == (SRType.SRType_RRX, 1)
+
+    def test_bitstrings(self):
+        for type in range(4):
+            for imm5 in range(32):
+                assert DecodeImmShift(bitstring(type, 2), bitstring(imm5, 5)) == \
+                        DecodeImmShift(type, imm5)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            DecodeImmShift(4, 0)
+
 class TestThumbExpandImm:
     def test_a(self):
         pass
 
+    def test_table(self):
+        from cmdis.helpers import _ThumbExpandImm_C_pseudocode
+        for imm12 in range(4096):
+            for carry_in in (bit0, bit1):
+                expected = _ThumbExpandImm_C_pseudocode(bitstring(imm12, 12), carry_in)
+                result = ThumbExpandImm_C(bitstring(imm12, 12), carry_in)
+                assert result == expected
+                assert result[1].width == 1
+            assert ThumbExpandImm(imm12) == expected[0]
+
+    def test_values(self):
+        assert ThumbExpandImm(0x0ab) == 0x000000ab
+        assert ThumbExpandImm(0x1ab) == 0x00ab00ab
+        assert ThumbExpandImm(0x2ab) == 0xab00ab00
+        assert ThumbExpandImm(0x3ab) == 0xabababab
+        # 0x55 with the top bit set, rotated right by 8.
+        assert ThumbExpandImm_C(0x455, bit0) == (0xd5000000, bit1)
+
+
+INT_VALUES = [0, 1, 2, 0x7f, 0x80, 0x7fffffff, 0x80000000, 0x80000001, 0xfffffffe, 0xffffffff,
+    0x12345678, 0xdeadbeef]
+
+class TestIntHelpers:
+    @pytest.mark.parametrize("width", [8, 32])
+    def test_add_with_carry(self, width):
+        mask = (1 << width) - 1
+        for x in INT_VALUES:
+            for y in INT_VALUES:
+                for c in (0, 1):
+                    x &= mask
+                    y &= mask
+                    result, carry, overflow = AddWithCarry(bitstring(x, width), bitstring(y, width),
+                                                            bitstring(c, 1))
+                    assert AddWithCarry_int(x, y, c, width) == \
+                        (result.unsigned, carry.unsigned, overflow.unsigned)
+
+    @pytest.mark.parametrize("type", [SRType.SRType_None, SRType.SRType_LSL, SRType.SRType_LSR,
+                                    SRType.SRType_ASR, SRType.SRType_ROR])
+    @pytest.mark.parametrize("amount", [0, 1, 4, 31, 32, 33, 255])
+    def test_shift_c(self, type, amount):
+        for x in INT_VALUES:
+            for c in (0, 1):
+                result, carry = Shift_C(bitstring(x, 32), type, amount, bitstring(c, 1))
+                assert Shift_C_int(x, type, amount, c) == (result.unsigned, carry.unsigned)
+                assert Shift_int(x, type, amount, c) == result.unsigned
+
+    def test_rrx(self):
+        for x in INT_VALUES:
+            for c in (0, 1):
+                result, carry = RRX_C(bitstring(x, 32), bitstring(c, 1))
+                assert Shift_C_int(x, SRType.SRType_RRX, 1, c) == (result.unsigned, carry.unsigned)
+
+    def test_narrow(self):
+        assert LSL_C_int(0x81, 1, 8) == (0x02, 1)
+        assert ASR_C_int(0x81, 1, 8) == (0xc0, 1)
+        assert ROR_C_int(0x81, 1, 8) == (0xc0, 1)
+
+class TestDspHelpers:
+    def test_signed_sat(self):
+        assert SignedSatQ_int(127, 8) == (0x7f, 0)
+        assert SignedSatQ_int(128, 8) == (0x7f, 1)
+        assert SignedSatQ_int(-128, 8) == (0x80, 0)
+        assert SignedSatQ_int(-129, 8) == (0x80, 1)
+        assert SignedSatQ_int(-1, 16) == (0xffff, 0)
+        assert SignedSatQ_int(1 << 40, 32) == (0x7fffffff, 1)
+
+    def test_unsigned_sat(self):
+        assert UnsignedSatQ_int(255, 8) == (0xff, 0)
+        assert UnsignedSatQ_int(256, 8) == (0xff, 1)
+        assert UnsignedSatQ_int(-1, 8) == (0, 1)
+        assert UnsignedSatQ_int(5, 0) == (0, 1)
+
+    def test_signed_half(self):
+        assert SignedHalf_int(0x7fff8000, False) == -0x8000
+        assert SignedHalf_int(0x7fff8000, True) == 0x7fff
+
+    @pytest.mark.parametrize("signed", [True, False])
+    def test_saturation_table(self, signed):
+        saturate = SignedSatQ_int if signed else UnsignedSatQ_int
+        table = helpers._saturation_table(8, signed)
+        assert len(table) == 768
+        for i in range(-256, 512):
+            assert table[i + 256] == saturate(i, 8)[0]
+
+    @pytest.mark.parametrize(("prefix", "op", "x", "y", "expected"), [
+            ("s", "add16", 0x7fff8000, 0x00018000, (0x80000000, 0b1100)),
+            ("q", "add16", 0x7fff8000, 0x00018000, (0x7fff8000, None)),
+            ("sh", "add16", 0x7fff8000, 0x00018000, (0x40008000, None)),
+            ("u", "add16", 0xffff0001, 0x00020003, (0x00010004, 0b1100)),
+            ("uq", "add16", 0xffff0001, 0x00020003, (0xffff0004, None)),
+            ("uh", "add16", 0xffff0001, 0x00020003, (0x80000002, None)),
+            ("s", "sub16", 0x00010001, 0x00000002, (0x0001ffff, 0b1100)),
+            ("u", "sub16", 0x00010001, 0x00000002, (0x0001ffff, 0b1100)),
+            ("uq", "sub16", 0x00010001, 0x00000002, (0x00010000, None)),
+            ("s", "asx", 0x00050003, 0x00010002, (0x00070002, 0b1111)),
+            ("s", "sax", 0x00050003, 0x00010002, (0x00030004, 0b1111)),
+            ("s", "add8", 0x7f80ff01, 0x01ff0101, (0x807f0002, 0b1011)),
+            ("q", "add8", 0x7f80ff01, 0x01ff0101, (0x7f800002, None)),
+            ("u", "add8", 0x7f80ff01, 0x01ff0101, (0x807f0002, 0b0110)),
+            ("uq", "sub8", 0x01020304, 0x02020202, (0x00000102, None)),
+            ("u", "sub8", 0x01020304, 0x02020202, (0xff000102, 0b0111)),
+            ])
+    def test_parallel_add_sub(self, prefix, op, x, y, expected):
+        assert ParallelAddSub_int(x, y, prefix, op) == expected
+
+    def test_select(self):
+        assert Select_int(0x11223344, 0xaabbccdd, 0b0000) == 0xaabbccdd
+        assert Select_int(0x11223344, 0xaabbccdd, 0b1111) == 0x11223344
+        assert Select_int(0x11223344, 0xaabbccdd, 0b0101) == 0xaa22cc44
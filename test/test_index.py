@@ -0,0 +1,58 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis.disasm import Disassembler
+from cmdis.index import DisassemblyIndex
+from .testutils import code
+import pytest
+
+# movs r0, #1; bl .+4; bx lr
+CODE = code(0x2001, 0xf000, 0xf800, 0x4770)
+
+@pytest.fixture(scope='function')
+def index():
+    dis = Disassembler()
+    return DisassemblyIndex([
+        dis.disasm_image(CODE, 0x20000000),
+        dis.disasm_image(CODE, 0x1000),
+        ])
+
+class TestDisassemblyIndex:
+    def test_regions(self, index):
+        assert [r.address for r in index.regions] == [0x1000, 0x20000000]
+
+    def test_region_at(self, index):
+        assert index.region_at(0x1000).address == 0x1000
+        assert index.region_at(0x1007).address == 0x1000
+        assert index.region_at(0x20000004).address == 0x20000000
+        assert index.region_at(0x1008) is None
+        assert index.region_at(0) is None
+
+    def test_instruction_at(self, index):
+        assert index.instruction_at(0x1004).address == 0x1002
+        assert index.instruction_at(0x20000006).mnemonic == 'bx'
+        assert index.instruction_at(0x2000) is None
+
+    def test_around(self, index):
+        assert [i.address for i in index.instructions_around(0x20000002, 5, 5)] == \
+                [0x20000000, 0x20000002, 0x20000006]
+        assert index.instructions_around(0x2000, 1, 1) == []
+
+    def test_replace(self, index):
+        region = Disassembler().disasm_image(code(0xbf00), 0x1000)
+        index.add(region)
+        assert len(index.regions) == 2
+        assert index.region_at(0x1000) is region
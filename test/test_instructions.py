@@ -17,11 +17,16 @@
 from __future__ import print_function
 from cmdis.bitstring import *
 from cmdis.disasm import decoder
+from cmdis.decoder import (Instruction, UndefinedInstructionError, pack_instructions,
+                           unpack_instructions)
 from cmdis.model import CpuModel
 from cmdis.mock_cpu import MockCpuModelDelegate
 from cmdis.utilities import (le16_to_bytes, le32_to_bytes)
 from cmdis.formatter import Formatter
 from cmdis.registers import CORE_REGISTER
+from cmdis.instructions import (CONDITIONS, CONDITION_PASSED)
+import copy
+import pickle
 import pytest
 import string
 import six
@@ -372,6 +377,168 @@ class TestMultiply:
         i.execute(cpu)
         assert cpu.r[Rd] == (0x0c1 * 0x180)
 
+class TestDsp:
+    @pytest.fixture
+    def dsp_cpu(self, cpu):
+        cpu.has_dsp_ext = True
+        return cpu
+
+    # sadd16 r0, r1, r2
+    def test_sadd16(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x7fff8000)
+        dsp_cpu.r[2] = bitstring(0x00018000)
+        i = decoder.decode(fmt32("11111 010 1 001 {Rn:4}, 1111 {Rd:4} 0 000 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        assert fmt.format(i).split()[2:] == ["sadd16", "r0,", "r1,", "r2"]
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0x80000000
+        assert dsp_cpu.apsr.ge == '1100'
+
+    # uqsub8 r0, r1, r2
+    def test_uqsub8(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x01020304)
+        dsp_cpu.r[2] = bitstring(0x02020202)
+        i = decoder.decode(fmt32("11111 010 1 100 {Rn:4}, 1111 {Rd:4} 0 101 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        assert i.mnemonic == "uqsub8"
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0x00000102
+        assert dsp_cpu.apsr.ge == '0000'
+
+    # sel r0, r1, r2
+    def test_sel(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x11223344)
+        dsp_cpu.r[2] = bitstring(0xaabbccdd)
+        dsp_cpu.apsr.ge = 0b0110
+        i = decoder.decode(fmt32("11111 010 1 010 {Rn:4}, 1111 {Rd:4} 1 000 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0xaa2233dd
+
+    # ssat r0, #8, r1, asr #4
+    @pytest.mark.parametrize(("value", "expected", "q"), [
+            (0x00000700, 0x70, 0),
+            (0x00000800, 0x7f, 1),
+            (0xfffff800, 0xffffff80, 0),
+            (0xfffff7f0, 0xffffff80, 1),
+            ])
+    def test_ssat(self, dsp_cpu, fmt, value, expected, q):
+        dsp_cpu.r[1] = bitstring(value)
+        i = decoder.decode(fmt32("11110 0 11 00 1 0 {Rn:4}, 0 001 {Rd:4} 00 0 {imm:5}", Rn=1, Rd=0, imm=7))
+        assert fmt.format(i).split()[2:] == ["ssat", "r0,", "#8,", "r1,", "ASR", "#4"]
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == expected
+        assert dsp_cpu.apsr.q == q
+
+    # usat r0, #8, r1
+    def test_usat(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0xffffffff)
+        i = decoder.decode(fmt32("11110 0 11 10 0 0 {Rn:4}, 0 000 {Rd:4} 00 0 {imm:5}", Rn=1, Rd=0, imm=8))
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0
+        assert dsp_cpu.apsr.q == 1
+
+    # ssat16 r0, #8, r1
+    def test_ssat16(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x7fff0010)
+        i = decoder.decode(fmt32("11110 0 11 00 1 0 {Rn:4}, 0 000 {Rd:4} 00 00 {imm:4}", Rn=1, Rd=0, imm=7))
+        assert i.mnemonic == "ssat16"
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0x007f0010
+
+    # smlabt r0, r1, r2, r3
+    def test_smlabt(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x0000fffe)
+        dsp_cpu.r[2] = bitstring(0x00030000)
+        dsp_cpu.r[3] = bitstring(10)
+        i = decoder.decode(fmt32("11111 0110 001 {Rn:4}, {Ra:4} {Rd:4} 00 0 1 {Rm:4}", Rn=1, Ra=3, Rd=0, Rm=2))
+        assert fmt.format(i).split()[2:] == ["smlabt", "r0,", "r1,", "r2,", "r3"]
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 4
+        assert dsp_cpu.apsr.q == 0
+
+    # smulbb r0, r1, r2
+    def test_smulbb(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x00008000)
+        dsp_cpu.r[2] = bitstring(0x00008000)
+        i = decoder.decode(fmt32("11111 0110 001 {Rn:4}, 1111 {Rd:4} 00 0 0 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        assert i.mnemonic == "smulbb"
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0x40000000
+
+    # smlawt r0, r1, r2, r3
+    def test_smlawt(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x00020000)
+        dsp_cpu.r[2] = bitstring(0xfffd0000)
+        dsp_cpu.r[3] = bitstring(1)
+        i = decoder.decode(fmt32("11111 0110 011 {Rn:4}, {Ra:4} {Rd:4} 000 1 {Rm:4}", Rn=1, Ra=3, Rd=0, Rm=2))
+        assert i.mnemonic == "smlawt"
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0xfffffffb
+
+    # smuad r0, r1, r2
+    def test_smuad_overflow(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x80008000)
+        dsp_cpu.r[2] = bitstring(0x80008000)
+        i = decoder.decode(fmt32("11111 0110 010 {Rn:4}, 1111 {Rd:4} 000 0 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 0x80000000
+        assert dsp_cpu.apsr.q == 1
+
+    # smlsdx r0, r1, r2, r3
+    def test_smlsdx(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x00030002)
+        dsp_cpu.r[2] = bitstring(0x00050007)
+        dsp_cpu.r[3] = bitstring(100)
+        i = decoder.decode(fmt32("11111 0110 100 {Rn:4}, {Ra:4} {Rd:4} 000 1 {Rm:4}", Rn=1, Ra=3, Rd=0, Rm=2))
+        assert i.mnemonic == "smlsdx"
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 100 + 2 * 5 - 3 * 7
+
+    # smmulr r0, r1, r2
+    def test_smmulr(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x40000000)
+        dsp_cpu.r[2] = bitstring(0x00000006)
+        i = decoder.decode(fmt32("11111 0110 101 {Rn:4}, 1111 {Rd:4} 000 1 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        assert i.mnemonic == "smmulr"
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 2
+
+    # smmls r0, r1, r2, r3
+    def test_smmls(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x40000000)
+        dsp_cpu.r[2] = bitstring(0x00000008)
+        dsp_cpu.r[3] = bitstring(5)
+        i = decoder.decode(fmt32("11111 0110 110 {Rn:4}, {Ra:4} {Rd:4} 000 0 {Rm:4}", Rn=1, Ra=3, Rd=0, Rm=2))
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[0] == 3
+
+    # smlaltb r3, r4, r1, r2
+    def test_smlaltb(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0xffff0000)
+        dsp_cpu.r[2] = bitstring(0x00000002)
+        dsp_cpu.r[3] = bitstring(1)
+        dsp_cpu.r[4] = bitstring(0)
+        i = decoder.decode(fmt32("11111 0111 100 {Rn:4}, {RdLo:4} {RdHi:4} 10 1 0 {Rm:4}", Rn=1, RdLo=3, RdHi=4, Rm=2))
+        assert fmt.format(i).split()[2:] == ["smlaltb", "r3,", "r4,", "r1,", "r2"]
+        i.execute(dsp_cpu)
+        assert dsp_cpu.r[3] == 0xffffffff
+        assert dsp_cpu.r[4] == 0xffffffff
+
+    # smlald r3, r4, r1, r2
+    def test_smlald(self, dsp_cpu, fmt):
+        dsp_cpu.r[1] = bitstring(0x7fff7fff)
+        dsp_cpu.r[2] = bitstring(0x7fff7fff)
+        dsp_cpu.r[3] = bitstring(0xffffffff)
+        dsp_cpu.r[4] = bitstring(0)
+        i = decoder.decode(fmt32("11111 0111 100 {Rn:4}, {RdLo:4} {RdHi:4} 110 0 {Rm:4}", Rn=1, RdLo=3, RdHi=4, Rm=2))
+        i.execute(dsp_cpu)
+        result = 0xffffffff + 2 * 0x7fff * 0x7fff
+        assert dsp_cpu.r[3] == result & 0xffffffff
+        assert dsp_cpu.r[4] == result >> 32
+
+    def test_requires_dsp_ext(self, cpu):
+        i = decoder.decode(fmt32("11111 010 1 001 {Rn:4}, 1111 {Rd:4} 0 000 {Rm:4}", Rn=1, Rd=0, Rm=2))
+        with pytest.raises(UndefinedInstructionError):
+            i.execute(cpu)
+
 class TestBitOps:
     # ands r1, r4
     def test_and_reg_t1(self, cpu, fmt):
@@ -903,6 +1070,22 @@ class TestBranch:
         else:
             assert cpu.pc == pc + 4 - 8
 
+    @pytest.mark.parametrize("cond", range(14))
+    def test_b_t1_conditions(self, cpu, cond):
+        i = decoder.decode(le16_to_bytes(0b1101000000000100 | (cond << 8)))
+        for nzcv in range(16):
+            cpu.pc = 0x8000
+            cpu.xpsr = (nzcv << 28) | 0x01000000
+            i.execute(cpu)
+            taken = CONDITIONS[cond].expr(cpu.apsr)
+            assert cpu.pc == (0x8000 + 4 + 8 if taken else 0x8002)
+
+    def test_condition_table(self, cpu):
+        for nzcv in range(16):
+            cpu.xpsr = nzcv << 28
+            for cond in range(16):
+                assert CONDITION_PASSED[cond][nzcv] == bool(CONDITIONS[cond].expr(cpu.apsr))
+
     # bl .+0x1f5e
     def test_bl_t1(self, cpu, fmt):
         i = decoder.decode(bytearray([0x01, 0xf0, 0xaf, 0xff]))
@@ -1710,3 +1893,102 @@ class TestMisc:
         print(fmt.format(i))
 #         i.execute(cpu)
 
+
+class TestOperands:
+    def test_lazy(self, cpu, fmt):
+        # adds r1, r2, #3
+        i = decoder.decode(fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=3, Rn=2, Rd=1))
+        i.execute(cpu)
+        assert i._operands is None
+        assert len(i.operands) == 3
+        assert i.operands is i.operands
+        assert fmt.format(i).split()[-3:] == ['r1,', 'r2,', '#3']
+
+    def test_no_decoder(self):
+        i = Instruction('nop', 0xbf00, False)
+        assert i.operands == []
+
+class TestSpecialize:
+    def test_shared_evaluators(self):
+        # adds r1, r2, #3; adds r4, r5, #6; adds r1, r2, r3
+        a = decoder.decode(fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=3, Rn=2, Rd=1))
+        b = decoder.decode(fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=6, Rn=5, Rd=4))
+        c = decoder.decode(fmt16('000 11 0 0 {Rm:3} {Rn:3} {Rd:3}', Rm=3, Rn=2, Rd=1))
+        assert a._evaluator is b._evaluator
+        assert a._evaluator is not c._evaluator
+
+    def test_flags_outside_it_block(self, cpu):
+        # adds r0, r0, #0 with r0 = 0 sets Z.
+        i = decoder.decode(fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=0, Rn=0, Rd=0))
+        cpu.r[0] = 0
+        i.execute(cpu)
+        assert cpu.apsr.z == 1
+
+    def test_repeat_subtract_immediate(self, cpu):
+        # subs r0, r0, #1 executed twice.
+        i = decoder.decode(fmt16('000 11 1 1 {imm3:3} {Rn:3} {Rd:3}', imm3=1, Rn=0, Rd=0))
+        cpu.r[0] = 5
+        i.execute(cpu)
+        i.execute(cpu)
+        assert cpu.r[0] == 3
+        assert i.imm32 == 1
+
+    def test_flags_never(self, cpu):
+        # add sp, sp, #4 doesn't change the flags.
+        i = decoder.decode(fmt16('1011 0000 0 {imm7:7}', imm7=1))
+        cpu.apsr.z = 1
+        i.execute(cpu)
+        assert cpu.apsr.z == 1
+        assert cpu.sp == 0x20004004
+
+class TestSerialize:
+    def test_pickle(self, fmt):
+        # adds r1, r2, #3; bl
+        for word in (fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=3, Rn=2, Rd=1),
+                    b'\xff\xf7\xfd\xff'):
+            i = decoder.decode(word, 0x1000)
+            j = pickle.loads(pickle.dumps(i, 2))
+            assert type(j) is type(i)
+            assert j.address == 0x1000
+            assert j._word == i._word
+            assert fmt.format(j) == fmt.format(i)
+
+    def test_pickle_placed(self):
+        d = decoder.decode_shared(fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=3, Rn=2, Rd=1), 0x20)
+        j = pickle.loads(pickle.dumps(d, 2))
+        assert type(j) is d.__class__
+        assert j.address == 0x20
+        assert j.imm32 == d.imm32
+
+    def test_copy(self):
+        i = decoder.decode(fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=3, Rn=2, Rd=1), 0x10)
+        j = copy.copy(i)
+        j.address = 0x20
+        assert i.address == 0x10
+        assert j.imm32 is i.imm32
+        assert j._evaluator is i._evaluator
+
+    def test_pack(self):
+        words = [fmt16('000 11 1 0 {imm3:3} {Rn:3} {Rd:3}', imm3=3, Rn=2, Rd=1),
+                b'\xff\xf7\xfd\xff',
+                fmt16('1011 0000 0 {imm7:7}', imm7=1)]
+        instructions = [decoder.decode(w, 0x100 + 4 * n) for n, w in enumerate(words)]
+        data = pack_instructions(instructions)
+        assert len(data) == 12 + 10 * len(instructions)
+        result = unpack_instructions(data)
+        assert [(type(i), i._word, i.address) for i in result] == \
+                [(type(i), i._word, i.address) for i in instructions]
+
+    def test_pack_other_decoders(self):
+        data = bytearray(pack_instructions([]))
+        data[0] ^= 0xff
+        with pytest.raises(ValueError):
+            unpack_instructions(bytes(data))
+
+class TestInterned:
+    def test_fields_shared(self):
+        # adds r1, r2, #3
+        word = 0x1cd1
+        d = decoder.decoders[decoder.decode(le16_to_bytes(word)).decoder_id]
+        assert d._attrs['Rd'](word) is d._attrs['Rd'](word)
+        assert d._attrs['imm3'](word) == '011'
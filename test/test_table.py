@@ -0,0 +1,69 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis.disasm import Disassembler
+from cmdis.instructions import (Branch, Push)
+from cmdis.table import InstructionTable
+from .testutils import (code, summary, BRANCHES_IMAGE)
+import pytest
+
+IMAGE = BRANCHES_IMAGE
+
+@pytest.fixture(scope='module')
+def table(disasm):
+    return InstructionTable(disasm)
+
+class TestInstructionTable:
+    def test_columns(self, table):
+        assert len(table) == 5
+        assert list(table.addresses) == [0x1000, 0x1002, 0x1006, 0x1008, 0x100a]
+        assert list(table.sizes) == [2, 4, 2, 2, 2]
+        assert table.words[1] == 0xf803f000
+        assert table.mnemonic(2) == 'beq'
+
+    def test_materialize(self, disasm, table):
+        assert summary(table) == summary(disasm)
+        bl = table[1]
+        assert isinstance(bl, Branch)
+        assert bl.target == 0x100c
+        assert isinstance(table[-5], Push)
+        with pytest.raises(IndexError):
+            table[5]
+
+    def test_slice(self, disasm, table):
+        part = table[1:3]
+        assert isinstance(part, InstructionTable)
+        assert summary(part) == summary(disasm.instructions[1:3])
+
+    def test_lookup(self, table):
+        assert table.index_of(0x1006) == 2
+        assert table.index_of(0x1004) is None
+        assert table.index_at(0x1004) == 1
+        assert table.instruction_at(0x1004).address == 0x1002
+        assert table.instruction_at(0x100c) is None
+
+    def test_record(self, table):
+        r = table.record(3)
+        assert (r.mnemonic, r.d, r.n, r.imm32) == ('adds', 0, 1, 2)
+
+    def test_disasm_table(self, disasm):
+        table = Disassembler().disasm_table(IMAGE + code(0xe800, 0x2001), 0x1000)
+        assert summary(table)[:5] == summary(disasm)
+        assert list(table.addresses)[5:] == [0x100e]
+
+    def test_shared(self, disasm):
+        table = Disassembler(shared=True).disasm_table(IMAGE, 0x1000)
+        assert [(i.address, i.mnemonic) for i in table] == [(i.address, i.mnemonic) for i in disasm]
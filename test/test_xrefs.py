@@ -0,0 +1,61 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .testutils import code
+
+# 0x1000:  bl 0x1010
+# 0x1004:  ldr r0, [pc, #4]
+# 0x1006:  adr r1, 0x100c
+# 0x1008:  b 0x1006
+# 0x100a:  nop
+# 0x100c:  .word 0
+# 0x1010:  beq 0x1006
+# 0x1012:  bl 0x1010
+# 0x1016:  bx lr
+IMAGE = code(0xf000, 0xf806, 0x4801, 0xa101, 0xe7fd, 0xbf00, 0x0000, 0x0000, 0xd0f9,
+            0xf7ff, 0xfffd, 0x4770)
+
+class TestCrossReferenceIndex:
+    def test_calls(self, disasm):
+        assert list(disasm.xrefs.calls_to(0x1010)) == [0x1000, 0x1012]
+        assert list(disasm.xrefs.calls_to(0x1006)) == []
+        assert disasm.xrefs.call_targets == [0x1010]
+
+    def test_branches(self, disasm):
+        assert list(disasm.xrefs.branches_to(0x1006)) == [0x1008, 0x1010]
+        assert list(disasm.xrefs.branches_to(0x1010)) == []
+        assert disasm.xrefs.branch_targets == [0x1006]
+
+    def test_loads(self, disasm):
+        assert list(disasm.xrefs.loads_from(0x100c)) == [0x1004, 0x1006]
+        assert disasm.xrefs.load_targets == [0x100c]
+
+    def test_references(self, disasm):
+        assert disasm.xrefs.references_to(0x1006) == [0x1008, 0x1010]
+        assert disasm.xrefs.references_to(0x1010) == [0x1000, 0x1012]
+        assert disasm.xrefs.references_to(0x2000) == []
+
+    def test_results_read_only(self, disasm):
+        assert isinstance(disasm.xrefs.calls_to(0x1010), tuple)
+        assert disasm.xrefs.branches_to(0x2000) == ()
+        assert disasm.xrefs.loads_from(0x2000) == ()
+
+    def test_register_branches(self, disasm):
+        # bx lr has no static target.
+        assert all(0x1016 not in refs for refs in disasm.xrefs._branches.values())
+
+    def test_cached(self, disasm):
+        assert disasm.xrefs is disasm.xrefs
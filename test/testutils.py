@@ -0,0 +1,38 @@
+# Copyright (c) 2016-2019 Chris Reed
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from cmdis.utilities import u16leListToByteList
+
+## @brief Build test code from a list of halfwords.
+#
+# @param halfwords The halfwords, stored little-endian.
+# @param type Type of the result, bytearray by default.
+def code(*halfwords, **kwargs):
+    type = kwargs.pop('type', bytearray)
+    return type(bytearray(u16leListToByteList(halfwords)))
+
+## @brief Address, size, class and mnemonic of each instruction, for comparisons.
+def summary(instructions):
+    return [(i.address, i.size, type(i), i.mnemonic) for i in instructions]
+
+# Image shared by the columnar and instruction table tests.
+#
+# 0x1000:  push {r4, lr}
+# 0x1002:  bl 0x100c
+# 0x1006:  beq 0x1002
+# 0x1008:  adds r0, r1, #2
+# 0x100a:  pop {r4, pc}
+BRANCHES_IMAGE = code(0xb510, 0xf000, 0xf803, 0xd0fc, 0x1c88, 0xbd10)